@@ -0,0 +1,161 @@
+# ================= ASYNC OHLCV FETCH ENGINE =================
+# Tüm sembol x timeframe isteklerini eşzamanlı atar.
+# Token-bucket ağırlık bütçesi ile Binance rate-limit'i aşılmaz;
+# deadline dolunca gelmeyen istekler iptal edilir.
+
+import asyncio
+import time
+
+# Binance Futures: 2400 weight / dakika
+DEFAULT_WEIGHT_PER_MINUTE = 2400
+
+
+def ohlcv_weight(limit):
+    """Binance Futures klines istek ağırlığı"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class TokenBucket:
+    """
+    Asyncio token-bucket (exchange weight bütçesi)
+
+    capacity kadar weight birikebilir, saniyede refill_rate kadar dolar.
+    """
+
+    def __init__(self, capacity=DEFAULT_WEIGHT_PER_MINUTE, refill_rate=None):
+        self.capacity = capacity
+        self.refill_rate = refill_rate or capacity / 60
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    async def acquire(self, weight=1):
+        """Yeterli weight birikene kadar bekle"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        weight = min(weight, self.capacity)
+
+        # Lock FIFO sırayı korur; büyük istek küçüklerin arkasında ezilmez
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                await asyncio.sleep((weight - self.tokens) / self.refill_rate)
+
+    def available(self):
+        self._refill()
+        return self.tokens
+
+
+class AsyncOHLCVFetcher:
+    """
+    Eşzamanlı OHLCV fetcher
+
+    Kullanış:
+        fetcher = AsyncOHLCVFetcher(create_async_exchange())
+        results = fetcher.fetch_all(SYMBOLS, ["1m", "5m"], deadline=4)
+        fetcher.close()
+    """
+
+    def __init__(self, exchange, bucket=None, max_concurrency=20):
+        self.exchange = exchange
+        self.bucket = bucket or TokenBucket()
+        self.max_concurrency = max_concurrency
+        # Aynı loop korunur: ccxt async session'ı loop'a bağlıdır
+        self.loop = asyncio.new_event_loop()
+
+        self.metrics = {
+            "requests": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "weight_used": 0,
+            "last_duration_ms": 0
+        }
+
+    async def _fetch_one(self, semaphore, symbol, timeframe, limit, since):
+        weight = ohlcv_weight(limit)
+        await self.bucket.acquire(weight)
+        async with semaphore:
+            self.metrics["requests"] += 1
+            self.metrics["weight_used"] += weight
+            return await self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+
+    async def fetch_all_async(self, symbols, timeframes, limit=500, deadline=None, since=None,
+                              limits=None):
+        """
+        Tüm (symbol, timeframe) çiftlerini eşzamanlı çek.
+
+        Args:
+            since: Opsiyonel {(symbol, timeframe): timestamp_ms} sözlüğü
+            limits: Opsiyonel {(symbol, timeframe): limit} (yoksa limit)
+            deadline: Saniye; dolunca bekleyen istekler iptal edilir
+
+        Returns:
+            dict: {(symbol, timeframe): ohlcv} (hata/timeout olanlar hariç)
+        """
+        start = time.time()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        since = since or {}
+        limits = limits or {}
+
+        tasks = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                key = (symbol, timeframe)
+                tasks[asyncio.ensure_future(
+                    self._fetch_one(
+                        semaphore, symbol, timeframe, limits.get(key, limit), since.get(key)
+                    )
+                )] = key
+
+        results = {}
+        if tasks:
+            done, pending = await asyncio.wait(tasks.keys(), timeout=deadline)
+
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.metrics["timeouts"] += len(pending)
+                await asyncio.gather(*pending, return_exceptions=True)
+
+            for task in done:
+                key = tasks[task]
+                if task.exception() is not None:
+                    self.metrics["errors"] += 1
+                    print(f"❌ Async Fetch Error ({key[0]} {key[1]}): {task.exception()}")
+                    continue
+                results[key] = task.result()
+
+        self.metrics["last_duration_ms"] = (time.time() - start) * 1000
+        return results
+
+    def fetch_all(self, symbols, timeframes, limit=500, deadline=None, since=None, limits=None):
+        """Senkron kod için fetch_all_async sarmalayıcısı"""
+        return self.loop.run_until_complete(
+            self.fetch_all_async(symbols, timeframes, limit, deadline, since, limits)
+        )
+
+    def close(self):
+        try:
+            self.loop.run_until_complete(self.exchange.close())
+        except Exception as e:
+            print(f"⚠️  Async exchange close failed: {e}")
+        self.loop.close()
+
+    def get_stats(self):
+        stats = dict(self.metrics)
+        stats["available_weight"] = self.bucket.available()
+        return stats
@@ -1,43 +1,25 @@
 # ================= ATOMIC JOURNAL WRITE ENGINE =================
-import os
-import json
-import tempfile
+# Kayıtlar event_store_engine'deki trades tablosuna tek transaction'la yazılır:
+# yazma maliyeti journal boyutundan bağımsızdır.
+from event_store_engine import get_store
 
 class AtomicJournal:
-    def __init__(self, journal_path="trade_journal.json"):
-        self.journal_path = journal_path
+    def __init__(self, store=None):
+        self.store = store or get_store()
     
     def write_atomic(self, data):
-        """Atomik yazma"""
+        """Atomik yazma (bekleyen batch ile birlikte hemen commit edilir)"""
         try:
-            journal = []
-            if os.path.exists(self.journal_path):
-                with open(self.journal_path, "r") as f:
-                    journal = json.load(f)
-            
-            journal.append(data)
-            
-            fd, temp_path = tempfile.mkstemp(suffix=".json", prefix="journal_")
-            try:
-                with os.fdopen(fd, "w") as f:
-                    json.dump(journal[-1000:], f, indent=2)
-                
-                os.replace(temp_path, self.journal_path)
-                return True
-            except Exception as e:
-                os.unlink(temp_path)
-                raise e
+            self.store.insert_trade(data, flush=True)
+            return True
         
         except Exception as e:
             print(f"❌ Atomic journal write failed: {e}")
             return False
     
-    def read_safe(self):
+    def read_safe(self, symbol=None, since=None, until=None):
         """Güvenli okuma"""
         try:
-            if not os.path.exists(self.journal_path):
-                return []
-            with open(self.journal_path, "r") as f:
-                return json.load(f)
+            return self.store.trades(symbol=symbol, since=since, until=until)
         except:
-            return []
\ No newline at end of file
+            return []
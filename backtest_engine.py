@@ -0,0 +1,598 @@
+# ================= BACKTEST ENGINE =================
+# Arşivlenmiş mumları (candle_archive_engine) bar bar canlı karar zincirinden geçirir:
+# indikatörler -> structure_engine -> score_engine + pattern_engine
+# -> risk_engine.dynamic_risk -> execution_engine.calculate_size
+# -> partial_tp_engine / smart_trailing_engine
+# Emirler SimulatedExchange'de fee + slippage ile eşleşir.
+# Bar döngüsü disk/JSON'a dokunmaz: indikatörler, snapshot'lar ve trend kodları
+# tüm geçmiş için önceden tek vektörel geçişte hesaplanır, trade geçmişi bellekte tutulur.
+
+import time
+
+import numpy as np
+
+from batch_indicator_engine import compute_indicators_2d
+from candle_archive_engine import CandleArchive
+from config import BASE_RISK, CANDLE_ARCHIVE_DIR, MOCK_INITIAL_BALANCE, SYMBOLS, TIMEFRAME
+from execution_engine import calculate_size
+from feature_snapshot_engine import build_snapshot_history
+from indicator_engine import OHLCV_COLUMNS
+from partial_tp_engine import manage_partial_tp
+from pattern_engine import pattern_score
+from r_engine import dynamic_R_multiplier
+from risk_engine import dynamic_risk
+from score_engine import compute_score
+from smart_trailing_engine import compute_smart_trailing_stop
+from structure_engine import trend_signals
+from trade_stats_engine import TradeStatsAccumulator
+
+TAKER_FEE = 0.0004   # Binance USDT-M taker
+SLIPPAGE = 0.0002    # Market / stop emirlerinde %0.02 kayma
+
+PATTERN_COLUMNS = ["open", "high", "low", "close"]
+TRAILING_COLUMNS = ["high", "low"]
+RISK_COLUMNS = ["atr"]
+
+# Strateji düğmeleri (parametre taraması bunları override eder)
+DEFAULT_PARAMS = {
+    "base_risk": BASE_RISK,         # risk_engine.dynamic_risk
+    "adx_strong": 25,               # score_engine.compute_score
+    "adx_weak": 20,
+    "volume_surge": 1.3,
+    "r_base": 2.0,                  # r_engine.dynamic_R_multiplier
+    "r_step": 0.5,
+    "trail_sensitivity": 0.7,       # smart_trailing_engine
+    "trail_activation": 1.5
+}
+
+
+class SimulatedExchange:
+    """
+    Backtest borsası (ccxt / MockBinance çağrı imzaları)
+
+    - MARKET emirleri mevcut barın kapanışından slippage ile dolar
+    - STOP_MARKET emirleri sonraki barlarda high/low ile tetiklenir
+      (gap varsa açılış fiyatından dolar)
+    - Her dolumda taker fee kesilir; pozisyonlar sembol başına nettir
+    """
+
+    def __init__(self, balance=MOCK_INITIAL_BALANCE, fee_rate=TAKER_FEE, slippage=SLIPPAGE,
+                 amount_decimals=4):
+        self.balance = balance
+        self.fee_rate = fee_rate
+        self.slippage = slippage
+        self.amount_decimals = amount_decimals
+
+        self.positions = {}     # symbol -> {"size": +long / -short, "entry": ortalama fiyat}
+        self.stop_orders = {}   # order id -> emir
+        self.bars = {}          # symbol -> (ts, open, high, low, close)
+        self.realized = {}      # symbol -> realized PnL - fee (kümülatif)
+        self.fills = []
+        self._next_id = 0
+
+        self.metrics = {
+            "orders": 0,
+            "fills": 0,
+            "stop_fills": 0,
+            "rejected": 0,
+            "fees_paid": 0.0,
+            "slippage_cost": 0.0
+        }
+
+    # ===== ccxt uyumlu yardımcılar =====
+    def amount_to_precision(self, symbol, amount):
+        return round(amount, self.amount_decimals)
+
+    def price_to_precision(self, symbol, price):
+        return round(price, 2)
+
+    def _order_id(self):
+        self._next_id += 1
+        return f"sim_{self._next_id}"
+
+    def _fill(self, symbol, side, amount, price, reference, reduce_only=False, reason="market"):
+        """Dolum: pozisyonu netle, realized PnL ve fee'yi bakiyeye yaz"""
+        position = self.positions.get(symbol)
+        size = position["size"] if position else 0.0
+        signed = amount if side == "BUY" else -amount
+
+        if reduce_only:
+            if size == 0 or size * signed > 0:
+                self.metrics["rejected"] += 1
+                return None
+            if abs(signed) > abs(size):
+                signed = -size
+                amount = abs(size)
+
+        fee = amount * price * self.fee_rate
+        realized = 0.0
+        if size * signed < 0:
+            closed = min(abs(signed), abs(size))
+            realized = (price - position["entry"]) * closed * (1 if size > 0 else -1)
+
+        new_size = size + signed
+        if abs(new_size) < 1e-12:
+            self.positions.pop(symbol, None)
+            # Pozisyon kapandı: bekleyen stop'lar iptal
+            for order_id in [oid for oid, o in self.stop_orders.items() if o["symbol"] == symbol]:
+                del self.stop_orders[order_id]
+        elif position is None or size * new_size < 0:
+            self.positions[symbol] = {"size": new_size, "entry": price}
+        else:
+            if abs(new_size) > abs(size):
+                position["entry"] = (position["entry"] * abs(size) + price * amount) / abs(new_size)
+            position["size"] = new_size
+
+        self.balance += realized - fee
+        self.realized[symbol] = self.realized.get(symbol, 0.0) + realized - fee
+        self.metrics["fills"] += 1
+        self.metrics["fees_paid"] += fee
+        self.metrics["slippage_cost"] += abs(price - reference) * amount
+
+        fill = {
+            "id": self._order_id(),
+            "timestamp": self.bars[symbol][0],
+            "symbol": symbol,
+            "side": side,
+            "amount": amount,
+            "price": price,
+            "fee": fee,
+            "realized_pnl": realized,
+            "reason": reason
+        }
+        self.fills.append(fill)
+        return fill
+
+    def set_bar(self, symbol, ts, open_, high, low, close):
+        """
+        Yeni barı işle: bekleyen stop'ları barın aralığına göre tetikle.
+
+        Returns:
+            list: Bu barda dolan stop emirleri
+        """
+        self.bars[symbol] = (ts, open_, high, low, close)
+        if not self.stop_orders:
+            return []
+
+        triggered = []
+        for order in list(self.stop_orders.values()):
+            if order["symbol"] != symbol or order["id"] not in self.stop_orders:
+                continue
+
+            stop = order["stopPrice"]
+            if order["side"] == "SELL" and low <= stop:
+                reference = min(open_, stop)
+                price = reference * (1 - self.slippage)
+            elif order["side"] == "BUY" and high >= stop:
+                reference = max(open_, stop)
+                price = reference * (1 + self.slippage)
+            else:
+                continue
+
+            del self.stop_orders[order["id"]]
+            fill = self._fill(symbol, order["side"], order["amount"], price, reference,
+                              order["reduceOnly"], reason="stop")
+            if fill:
+                self.metrics["stop_fills"] += 1
+                triggered.append(fill)
+
+        return triggered
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        params = params or {}
+        order_type = type.upper()
+        side = side.upper()
+        amount = float(amount)
+        self.metrics["orders"] += 1
+
+        if amount <= 0:
+            self.metrics["rejected"] += 1
+            raise ValueError(f"Invalid amount: {amount}")
+
+        if order_type == "MARKET":
+            close = self.bars[symbol][4]
+            fill_price = close * (1 + self.slippage) if side == "BUY" else close * (1 - self.slippage)
+            fill = self._fill(symbol, side, amount, fill_price, close, params.get("reduceOnly", False))
+            if fill is None:
+                raise ValueError(f"ReduceOnly order rejected: {symbol} {side} {amount}")
+            return {
+                "id": fill["id"],
+                "symbol": symbol,
+                "type": "market",
+                "side": side.lower(),
+                "amount": amount,
+                "filled": fill["amount"],
+                "average": fill_price,
+                "status": "closed",
+                "fee": {"cost": fill["fee"], "currency": "USDT"}
+            }
+
+        if order_type in ("STOP_MARKET", "STOP"):
+            order = {
+                "id": self._order_id(),
+                "symbol": symbol,
+                "type": "stop_market",
+                "side": side,
+                "amount": amount,
+                "stopPrice": float(params.get("stopPrice", price)),
+                "reduceOnly": bool(params.get("reduceOnly", False)),
+                "status": "open"
+            }
+            self.stop_orders[order["id"]] = order
+            return dict(order)
+
+        self.metrics["rejected"] += 1
+        raise ValueError(f"Unsupported order type: {type}")
+
+    def cancel_order(self, order_id, symbol=None):
+        order = self.stop_orders.pop(order_id, None)
+        if order is None:
+            raise ValueError(f"Order not found: {order_id}")
+        order = dict(order)
+        order["status"] = "canceled"
+        return order
+
+    def fetch_open_orders(self, symbol=None):
+        return [dict(o) for o in self.stop_orders.values() if symbol is None or o["symbol"] == symbol]
+
+    def unrealized_pnl(self, symbol=None):
+        total = 0.0
+        for sym, position in self.positions.items():
+            if symbol is None or sym == symbol:
+                total += (self.bars[sym][4] - position["entry"]) * position["size"]
+        return total
+
+    def equity(self):
+        return self.balance + self.unrealized_pnl() if self.positions else self.balance
+
+    def fetch_positions(self, symbols=None):
+        positions = []
+        for symbol, position in self.positions.items():
+            if symbols and symbol not in symbols:
+                continue
+            mark = self.bars[symbol][4]
+            positions.append({
+                "symbol": symbol,
+                "contracts": abs(position["size"]),
+                "side": "long" if position["size"] > 0 else "short",
+                "entryPrice": position["entry"],
+                "unrealizedPnl": (mark - position["entry"]) * position["size"],
+                "info": {"markPrice": str(mark), "positionAmt": str(position["size"])}
+            })
+        return positions
+
+    def fetch_balance(self):
+        equity = self.equity()
+        return {
+            "USDT": {"free": self.balance, "total": equity},
+            "total": {"USDT": equity}
+        }
+
+
+def _to_columns(raw):
+    """OHLCV listesi, (n x 6) dizi (CandleArchive.read) ya da kolon sözlüğü -> kolonlar"""
+    if isinstance(raw, dict):
+        return {col: np.asarray(raw[col], dtype=np.float64) for col in OHLCV_COLUMNS}
+    records = np.asarray(raw, dtype=np.float64)
+    return {col: records[:, j] for j, col in enumerate(OHLCV_COLUMNS)}
+
+
+def compute_columns(raw):
+    """Tek sembolün tüm geçmişi için OHLCV + indikatör kolonları (pahalı kısım)"""
+    columns = _to_columns(raw)
+    ohlcv = {col: columns[col][None, :] for col in OHLCV_COLUMNS[1:]}
+    for col, matrix in compute_indicators_2d(ohlcv).items():
+        columns[col] = matrix[0]
+    return columns
+
+
+def build_dataset(columns):
+    """Bar döngüsünün okuduğu yapı: snapshot'lar, trend kodları ve skaler listeler"""
+    return {
+        "columns": columns,
+        "snapshots": build_snapshot_history(columns),
+        "trend": trend_signals(columns).tolist(),
+        "timestamp": np.asarray(columns["timestamp"]).astype(np.int64).tolist(),
+        "open": columns["open"].tolist(),
+        "high": columns["high"].tolist(),
+        "low": columns["low"].tolist(),
+        "close": columns["close"].tolist(),
+        "atr": columns["atr"].tolist()
+    }
+
+
+def _window(columns, i, n, cols):
+    start = i - n + 1 if i >= n else 0
+    return {col: columns[col][start:i + 1] for col in cols}
+
+
+class BacktestEngine:
+    """
+    Event-driven backtest: canlı karar zinciri + simüle borsa
+
+    Kullanış:
+        engine = BacktestEngine(min_score=0.85)
+        result = engine.run_archive(["BTC/USDT", "ETH/USDT"])
+        # ya da: engine.run({"BTC/USDT": ohlcv_list})
+        engine.trades          # kapanan trade'ler (performance_engine formatı, "R" dahil)
+        engine.equity_curve    # olay başına equity
+
+    Bar akışı (her olay = bir sembolün bir barı, zaman sıralı):
+        1. Bekleyen stop'lar barın high/low'u ile eşleşir
+        2. Açık pozisyon: partial TP + smart trailing (bar kapanışında)
+        3. Pozisyon yoksa: trend -> skor -> risk -> boyut -> market giriş + stop
+    """
+
+    def __init__(self, balance=MOCK_INITIAL_BALANCE, fee_rate=TAKER_FEE, slippage=SLIPPAGE,
+                 min_score=0.85, warmup=200, max_positions=1, trailing=True, window=500,
+                 params=None):
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.initial_balance = balance
+        self.fee_rate = fee_rate
+        self.slippage = slippage
+        self.min_score = min_score
+        self.warmup = warmup
+        self.max_positions = max_positions
+        self.trailing = trailing
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.exchange = SimulatedExchange(self.initial_balance, self.fee_rate, self.slippage)
+        self.trades = []
+        self.trade_stats = TradeStatsAccumulator()
+        self.open_trades = {}
+        self.peak = self.initial_balance
+        self.halted = False
+        self.equity_curve = np.empty(0)
+        self.metrics = {
+            "bars": 0,
+            "symbols": 0,
+            "signals": 0,
+            "entries": 0,
+            "trailing_updates": 0,
+            "prepare_ms": 0,
+            "loop_ms": 0,
+            "bars_per_minute": 0
+        }
+
+    # ===== TRADE LIFECYCLE =====
+    def _try_entry(self, symbol, data, i, code):
+        snapshot = data["snapshots"][i]
+        direction = "LONG" if code > 0 else "SHORT"
+        columns = data["columns"]
+        params = self.params
+
+        score = compute_score(
+            snapshot, params["adx_strong"], params["adx_weak"], params["volume_surge"]
+        ) + pattern_score(_window(columns, i, 2, PATTERN_COLUMNS), direction)
+        if score < self.min_score:
+            return
+        self.metrics["signals"] += 1
+
+        exchange = self.exchange
+        equity = exchange.equity()
+        if equity <= 0:
+            self.halted = True
+            return
+        self.peak = max(self.peak, equity)
+
+        risk = dynamic_risk(equity, self.peak, _window(columns, i, self.window, RISK_COLUMNS),
+                            logs=self.trade_stats, base_risk=params["base_risk"])
+        if not risk:
+            # Circuit breaker: canlı motor gibi yeni pozisyon açılmaz
+            self.halted = True
+            return
+
+        R = snapshot["atr"] * dynamic_R_multiplier(snapshot, score, params["r_base"], params["r_step"])
+        if not R > 0:
+            return
+
+        price = data["close"][i]
+        sl = price - R if direction == "LONG" else price + R
+        amount = calculate_size(symbol, equity, price, sl, risk, exchange=exchange)
+        if not amount:
+            return
+
+        ledger = exchange.realized.get(symbol, 0.0)
+        side, exit_side = ("BUY", "SELL") if direction == "LONG" else ("SELL", "BUY")
+        order = exchange.create_order(symbol, "MARKET", side, amount)
+
+        entry = order["average"]
+        sl = entry - R if direction == "LONG" else entry + R
+        stop = exchange.create_order(symbol, "STOP_MARKET", exit_side, amount,
+                                     params={"stopPrice": sl, "reduceOnly": True})
+
+        self.metrics["entries"] += 1
+        self.open_trades[symbol] = {
+            "symbol": symbol,
+            "direction": direction,
+            "exit_side": exit_side,
+            "entry": entry,
+            "sl": sl,
+            "R": R,
+            "amount": amount,
+            "risk_amount": equity * risk,
+            "score": score,
+            "opened_at": data["timestamp"][i],
+            "open_index": i,
+            "ledger": ledger,
+            "stop_id": stop["id"],
+            "tp_state": {}
+        }
+
+    def _manage(self, symbol, trade, data, i):
+        exchange = self.exchange
+        price = data["close"][i]
+
+        trade["tp_state"] = manage_partial_tp(
+            exchange, symbol, trade["direction"], trade["entry"], price,
+            trade["amount"], trade["R"], trade["tp_state"]
+        )
+        if symbol not in exchange.positions or not self.trailing:
+            return
+
+        new_sl = compute_smart_trailing_stop(
+            price, trade["entry"], trade["direction"], data["atr"][i],
+            sensitivity=self.params["trail_sensitivity"],
+            activation_ratio=self.params["trail_activation"],
+            df=_window(data["columns"], i, 10, TRAILING_COLUMNS)
+        )
+        if new_sl is None:
+            return
+
+        # Stop sadece kâr yönünde sıkılaştırılır
+        if (new_sl > trade["sl"]) if trade["direction"] == "LONG" else (new_sl < trade["sl"]):
+            exchange.cancel_order(trade["stop_id"], symbol)
+            stop = exchange.create_order(
+                symbol, "STOP_MARKET", trade["exit_side"], abs(exchange.positions[symbol]["size"]),
+                params={"stopPrice": new_sl, "reduceOnly": True}
+            )
+            trade["sl"] = new_sl
+            trade["stop_id"] = stop["id"]
+            self.metrics["trailing_updates"] += 1
+
+    def _close_trade(self, symbol, trade, data, i):
+        exchange = self.exchange
+        pnl = exchange.realized.get(symbol, 0.0) - trade["ledger"]
+        exit_fill = next(f for f in reversed(exchange.fills) if f["symbol"] == symbol)
+
+        self.trades.append({
+            "symbol": symbol,
+            "direction": trade["direction"],
+            "entry": trade["entry"],
+            "exit": exit_fill["price"],
+            "exit_reason": exit_fill["reason"],
+            "R": pnl / trade["risk_amount"] if trade["risk_amount"] else 0,
+            "pnl": pnl,
+            "score": trade["score"],
+            "opened_at": trade["opened_at"],
+            "closed_at": data["timestamp"][i],
+            "bars_held": i - trade["open_index"]
+        })
+        self.trade_stats.add(self.trades[-1])
+        del self.open_trades[symbol]
+        self.peak = max(self.peak, exchange.equity())
+
+    def _on_bar(self, symbol, data, i):
+        exchange = self.exchange
+        exchange.set_bar(symbol, data["timestamp"][i], data["open"][i], data["high"][i],
+                         data["low"][i], data["close"][i])
+
+        trade = self.open_trades.get(symbol)
+        if trade is not None:
+            if symbol in exchange.positions:
+                self._manage(symbol, trade, data, i)
+            if symbol not in exchange.positions:
+                self._close_trade(symbol, trade, data, i)
+            return
+
+        if self.halted or i < self.warmup or len(self.open_trades) >= self.max_positions:
+            return
+
+        code = data["trend"][i]
+        if code:
+            self._try_entry(symbol, data, i, code)
+
+    # ===== RUN =====
+    def run(self, raw_by_symbol):
+        """
+        Args:
+            raw_by_symbol: {symbol: OHLCV listesi | (n x 6) dizi | kolon sözlüğü}
+
+        Returns:
+            dict: get_results()
+        """
+        start = time.time()
+        datasets = {
+            symbol: build_dataset(compute_columns(raw))
+            for symbol, raw in raw_by_symbol.items()
+            if raw is not None and len(raw)
+        }
+        prepare_ms = (time.time() - start) * 1000
+
+        results = self.run_datasets(datasets)
+        self.metrics["prepare_ms"] = prepare_ms
+        return results
+
+    def run_datasets(self, datasets):
+        """
+        Önceden hazırlanmış veriyle backtest (build_dataset çıktıları).
+        Aynı datasets farklı parametrelerle tekrar tekrar koşulabilir.
+        """
+        self.reset()
+        symbols = list(datasets)
+        self.metrics["symbols"] = len(symbols)
+        if not symbols:
+            return self.get_results()
+
+        # Zaman sıralı tek olay akışı (aynı ts'de sembol sırası)
+        timestamps = np.concatenate([datasets[s]["columns"]["timestamp"] for s in symbols])
+        symbol_ids = np.concatenate([np.full(len(datasets[s]["close"]), k) for k, s in enumerate(symbols)])
+        indices = np.concatenate([np.arange(len(datasets[s]["close"])) for s in symbols])
+        order = np.lexsort((symbol_ids, timestamps))
+
+        loop_start = time.time()
+        exchange = self.exchange
+        curve = np.empty(len(order))
+        for k, (s, i) in enumerate(zip(symbol_ids[order].tolist(), indices[order].tolist())):
+            symbol = symbols[s]
+            self._on_bar(symbol, datasets[symbol], i)
+            curve[k] = exchange.equity()
+
+        # Veri bitti: açık pozisyonlar son kapanıştan kapatılır
+        for symbol, trade in list(self.open_trades.items()):
+            data = datasets[symbol]
+            position = exchange.positions.get(symbol)
+            if position:
+                exchange.create_order(symbol, "MARKET", trade["exit_side"], abs(position["size"]),
+                                      params={"reduceOnly": True})
+            self._close_trade(symbol, trade, data, len(data["close"]) - 1)
+        if len(curve):
+            curve[-1] = exchange.equity()
+
+        elapsed = time.time() - loop_start
+        self.equity_curve = curve
+        self.metrics["bars"] = len(order)
+        self.metrics["loop_ms"] = elapsed * 1000
+        self.metrics["bars_per_minute"] = len(order) / elapsed * 60 if elapsed > 0 else 0
+        return self.get_results()
+
+    def run_archive(self, symbols=None, timeframe=TIMEFRAME, archive=None, since=None, n=None):
+        """Kalıcı mum arşivinden (memmap) backtest"""
+        archive = archive or CandleArchive(CANDLE_ARCHIVE_DIR)
+        return self.run({
+            symbol: archive.read(symbol, timeframe, n=n, since=since)
+            for symbol in (symbols or SYMBOLS)
+        })
+
+    def get_results(self):
+        pnl = np.array([t["pnl"] for t in self.trades])
+        r = np.array([t["R"] for t in self.trades])
+        curve = self.equity_curve
+        final_equity = self.exchange.equity()
+
+        max_drawdown = 0.0
+        if len(curve):
+            peak = np.maximum.accumulate(np.concatenate(([self.initial_balance], curve)))
+            max_drawdown = float(np.max((peak[1:] - curve) / peak[1:]))
+
+        gross_profit = pnl[pnl > 0].sum() if len(pnl) else 0.0
+        gross_loss = -pnl[pnl < 0].sum() if len(pnl) else 0.0
+
+        return {
+            "bars": self.metrics["bars"],
+            "symbols": self.metrics["symbols"],
+            "trades": len(self.trades),
+            "final_equity": final_equity,
+            "return_pct": (final_equity / self.initial_balance - 1) * 100,
+            "max_drawdown": max_drawdown,
+            "winrate": float(np.mean(pnl > 0)) if len(pnl) else 0,
+            "avg_R": float(r.mean()) if len(r) else 0,
+            "expectancy": float(pnl.mean()) if len(pnl) else 0,
+            "profit_factor": float(gross_profit / gross_loss) if gross_loss > 0 else float("inf") if gross_profit > 0 else 0,
+            "fees_paid": self.exchange.metrics["fees_paid"],
+            "slippage_cost": self.exchange.metrics["slippage_cost"],
+            "halted": self.halted,
+            "bars_per_minute": self.metrics["bars_per_minute"]
+        }
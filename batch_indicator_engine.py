@@ -0,0 +1,208 @@
+# ================= BATCH INDICATOR ENGINE =================
+# Tüm sembollerin OHLCV verisini tek (sembol x mum) NumPy matrisine dizer
+# ve indikatörleri tüm semboller için tek vektörel geçişte hesaplar.
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicator_engine import OHLCV_COLUMNS, INDICATOR_COLUMNS
+
+
+def _column_length(raw):
+    return len(raw["timestamp"]) if isinstance(raw, dict) else len(raw)
+
+
+def stack_ohlcv(raw_by_symbol):
+    """
+    Sembol -> OHLCV sözlüğünü 2D matrislere çevir.
+
+    Değerler OHLCV listesi ya da kolon view sözlüğü (OHLCVRingBuffer.view)
+    olabilir. Kısa geçmişi olan semboller başa NaN ile doldurulur; böylece
+    her satırın indikatörleri kendi serisi üzerinden hesaplanmış gibi olur.
+
+    Returns:
+        (symbols, timestamps[int64 S x N], ohlcv{"open": float64 S x N, ...})
+    """
+    symbols = [s for s, raw in raw_by_symbol.items() if raw is not None and _column_length(raw)]
+    bars = max((_column_length(raw_by_symbol[s]) for s in symbols), default=0)
+
+    timestamps = np.zeros((len(symbols), bars), dtype=np.int64)
+    ohlcv = {col: np.full((len(symbols), bars), np.nan) for col in OHLCV_COLUMNS[1:]}
+
+    for i, symbol in enumerate(symbols):
+        raw = raw_by_symbol[symbol]
+        n = _column_length(raw)
+
+        if isinstance(raw, dict):
+            timestamps[i, bars - n:] = raw["timestamp"]
+            for col in OHLCV_COLUMNS[1:]:
+                ohlcv[col][i, bars - n:] = raw[col]
+            continue
+
+        raw = np.asarray(raw, dtype=np.float64)
+        timestamps[i, bars - n:] = raw[:, 0].astype(np.int64)
+        for j, col in enumerate(OHLCV_COLUMNS[1:]):
+            ohlcv[col][i, bars - n:] = raw[:, j + 1]
+
+    return symbols, timestamps, ohlcv
+
+
+# ================= VECTORIZED INDICATORS (axis=1) =================
+
+def _ema_row(row, alpha):
+    out = row.tolist()
+    prev = np.nan
+    for t, value in enumerate(out):
+        prev = value if prev != prev else prev + alpha * (value - prev)
+        out[t] = prev
+    return out
+
+
+def ema_2d(x, length):
+    alpha = 2 / (length + 1)
+    if x.shape[0] < 16:
+        # Az sembol / uzun geçmiş (backtest): satır başına skaler döngü,
+        # sütun başına NumPy çağrısından çok daha hızlı
+        return np.array([_ema_row(row, alpha) for row in x], dtype=np.float64).reshape(x.shape)
+
+    out = np.empty_like(x)
+    out[:, 0] = x[:, 0]
+    for t in range(1, x.shape[1]):
+        prev = out[:, t - 1]
+        out[:, t] = np.where(np.isnan(prev), x[:, t], prev + alpha * (x[:, t] - prev))
+    return out
+
+
+def rolling_mean_2d(x, length):
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= length:
+        out[:, length - 1:] = sliding_window_view(x, length, axis=1).mean(axis=-1)
+    return out
+
+
+def diff_2d(x):
+    out = np.full_like(x, np.nan)
+    out[:, 1:] = x[:, 1:] - x[:, :-1]
+    return out
+
+
+def shift_2d(x):
+    out = np.full_like(x, np.nan)
+    out[:, 1:] = x[:, :-1]
+    return out
+
+
+def rolling_extreme(x, window, ufunc=np.maximum):
+    """
+    Son eksen boyunca kayan max/min (ufunc=np.maximum / np.minimum).
+
+    out[..., i] = x[..., max(0, i - window + 1):i + 1] üzerindeki max/min;
+    ilk window-1 eleman genişleyen pencere (df.iloc[-window:] ile aynı).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty_like(x)
+    n = x.shape[-1]
+    head = min(window - 1, n)
+    if head:
+        out[..., :head] = ufunc.accumulate(x[..., :head], axis=-1)
+    if n >= window:
+        out[..., window - 1:] = ufunc.reduce(sliding_window_view(x, window, axis=-1), axis=-1)
+    return out
+
+
+def rsi_2d(close, length=14):
+    delta = diff_2d(close)
+    gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+
+    rs = rolling_mean_2d(gain, length) / rolling_mean_2d(loss, length)
+    return 100 - (100 / (1 + rs))
+
+
+def atr_2d(high, low, close, length=14):
+    prev_close = shift_2d(close)
+    # fmax NaN'ı yok sayar (pd.concat(...).max(axis=1) gibi)
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return rolling_mean_2d(tr, length)
+
+
+def adx_2d(high, low, close, length=14):
+    plus_dm = diff_2d(high)
+    minus_dm = diff_2d(low)
+
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm > 0] = 0
+
+    tr = atr_2d(high, low, close, length)
+
+    plus_di = 100 * (rolling_mean_2d(plus_dm, length) / tr)
+    minus_di = 100 * (rolling_mean_2d(np.abs(minus_dm), length) / tr)
+
+    dx = (np.abs(plus_di - minus_di) / (plus_di + minus_di)) * 100
+    return rolling_mean_2d(dx, length)
+
+
+def macd_2d(close, fast=12, slow=26, signal=9):
+    macd_line = ema_2d(close, fast) - ema_2d(close, slow)
+    return macd_line, ema_2d(macd_line, signal)
+
+
+def compute_indicators_2d(ohlcv):
+    """Tüm semboller için indikatör matrisleri (S x N)"""
+    close = ohlcv["close"]
+    high = ohlcv["high"]
+    low = ohlcv["low"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        macd_line, signal_line = macd_2d(close)
+        return {
+            "ema20": ema_2d(close, 20),
+            "ema50": ema_2d(close, 50),
+            "ema200": ema_2d(close, 200),
+            "rsi": rsi_2d(close, 14),
+            "macd": macd_line,
+            "macds": signal_line,
+            "atr": atr_2d(high, low, close, 14),
+            "adx": adx_2d(high, low, close, 14),
+            "vol_avg": rolling_mean_2d(ohlcv["volume"], 20),
+        }
+
+
+def columns_to_dataframe(columns):
+    """Kolon view sözlüğünden fetch_dataframe formatında DataFrame (dropna uygulanmış)"""
+    valid = np.ones(len(columns["timestamp"]), dtype=bool)
+    for col in OHLCV_COLUMNS[1:] + INDICATOR_COLUMNS:
+        valid &= ~np.isnan(columns[col])
+
+    df = pd.DataFrame({col: columns[col][valid] for col in OHLCV_COLUMNS})
+    df["t"] = pd.to_datetime(df["timestamp"], unit="ms")
+    for col in INDICATOR_COLUMNS:
+        df[col] = columns[col][valid]
+    return df
+
+
+class BatchIndicators:
+    """Tek geçişte hesaplanan çoklu sembol indikatörleri"""
+
+    def __init__(self, raw_by_symbol):
+        self.symbols, self.timestamps, self.ohlcv = stack_ohlcv(raw_by_symbol)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.indicators = compute_indicators_2d(self.ohlcv) if self.symbols else {}
+
+    def view(self, symbol):
+        """Sembolün kolonları (2D matrislerin satır view'ları, kopya yok)"""
+        i = self.index[symbol]
+        columns = {"timestamp": self.timestamps[i]}
+        for col, matrix in self.ohlcv.items():
+            columns[col] = matrix[i]
+        for col, matrix in self.indicators.items():
+            columns[col] = matrix[i]
+        return columns
+
+    def to_dataframe(self, symbol):
+        """fetch_dataframe ile aynı kolonlara sahip DataFrame (dropna uygulanmış)"""
+        return columns_to_dataframe(self.view(symbol))
+
+    def to_dataframes(self):
+        return {symbol: self.to_dataframe(symbol) for symbol in self.symbols}
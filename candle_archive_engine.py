@@ -0,0 +1,118 @@
+# ================= CANDLE ARCHIVE ENGINE =================
+# Kapanmış mumların kalıcı arşivi.
+# (symbol, timeframe) başına append-only binary dosya; her kayıt
+# 6 x float64 (ts, open, high, low, close, volume) = 48 byte.
+# Okuma np.memmap ile yapılır: restart sonrası warm start ve backtest için.
+
+import os
+
+import numpy as np
+
+RECORD_FIELDS = 6
+RECORD_SIZE = RECORD_FIELDS * 8
+
+
+class CandleArchive:
+    """Memory-mapped mum arşivi"""
+
+    def __init__(self, directory="candle_archive"):
+        self.directory = directory
+        self.last_ts_cache = {}
+
+    def path(self, symbol, timeframe):
+        safe_symbol = symbol.replace("/", "_").replace(":", "_")
+        return os.path.join(self.directory, f"{safe_symbol}_{timeframe}.f64")
+
+    def count(self, symbol, timeframe):
+        """Arşivdeki tam kayıt sayısı"""
+        path = self.path(symbol, timeframe)
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // RECORD_SIZE
+
+    def _repair(self, path):
+        """Yarım yazılmış son kaydı (crash) kes"""
+        size = os.path.getsize(path)
+        if size % RECORD_SIZE:
+            with open(path, "r+b") as f:
+                f.truncate(size - size % RECORD_SIZE)
+            print(f"⚠️  Truncated partial candle record: {path}")
+
+    def last_ts(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        if key in self.last_ts_cache:
+            return self.last_ts_cache[key]
+
+        path = self.path(symbol, timeframe)
+        last_ts = None
+        if os.path.exists(path):
+            self._repair(path)
+            count = os.path.getsize(path) // RECORD_SIZE
+            if count:
+                with open(path, "rb") as f:
+                    f.seek((count - 1) * RECORD_SIZE)
+                    last_ts = int(np.frombuffer(f.read(8), dtype=np.float64)[0])
+
+        self.last_ts_cache[key] = last_ts
+        return last_ts
+
+    def append(self, symbol, timeframe, candles):
+        """
+        Kapanmış mumları ekle (arşivdeki son ts'ten eski olanlar atlanır).
+
+        Returns:
+            int: Yazılan kayıt sayısı
+        """
+        last_ts = self.last_ts(symbol, timeframe)
+        new = [c for c in candles if last_ts is None or c[0] > last_ts]
+        if not new:
+            return 0
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            records = np.asarray([c[:RECORD_FIELDS] for c in new], dtype=np.float64)
+            with open(self.path(symbol, timeframe), "ab") as f:
+                f.write(records.tobytes())
+            self.last_ts_cache[(symbol, timeframe)] = int(new[-1][0])
+            return len(new)
+        except Exception as e:
+            print(f"❌ Candle archive write failed ({symbol} {timeframe}): {e}")
+            return 0
+
+    def read(self, symbol, timeframe, n=None, since=None):
+        """
+        Arşivi memmap olarak oku (salt okunur, kopyasız).
+
+        Args:
+            n: Sadece son n kayıt
+            since: Sadece ts >= since olan kayıtlar
+
+        Returns:
+            np.ndarray (count x 6) ya da boşsa None
+        """
+        path = self.path(symbol, timeframe)
+        if not os.path.exists(path):
+            return None
+
+        self._repair(path)
+        count = os.path.getsize(path) // RECORD_SIZE
+        if count == 0:
+            return None
+
+        records = np.memmap(path, dtype=np.float64, mode="r", shape=(count, RECORD_FIELDS))
+        if since is not None:
+            records = records[np.searchsorted(records[:, 0], since):]
+        if n is not None:
+            records = records[-n:]
+        return records
+
+    def read_columns(self, symbol, timeframe, n=None, since=None):
+        """read() sonucunun kolon view'ları (OHLCVRingBuffer.view ile aynı anahtarlar)"""
+        records = self.read(symbol, timeframe, n, since)
+        if records is None:
+            return None
+        columns = {"timestamp": records[:, 0].astype(np.int64)}
+        for j, col in enumerate(["open", "high", "low", "close", "volume"]):
+            columns[col] = records[:, j + 1]
+        return columns
+
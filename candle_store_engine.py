@@ -0,0 +1,174 @@
+# ================= DELTA CANDLE STORE ENGINE =================
+# (symbol, timeframe) başına sabit pencereli mum deposu (OHLCVRingBuffer).
+# İlk istekte tam pencere çekilir; sonrasında sadece since=son_ts ile
+# yeni mumlar istenir, sona eklenir ve en eski mumlar düşürülür.
+
+from ring_buffer_engine import OHLCVRingBuffer
+
+# Binance Futures'ta limit < 100 -> weight 1 (limit=500 -> weight 5)
+DELTA_LIMIT = 99
+
+
+class CandleStore:
+    """
+    Delta fetch yapan mum deposu
+
+    Son mum henüz kapanmamış olabilir; bu yüzden since=son mumun ts'i
+    gönderilir ve dönen ilk mum depodaki son mumun üzerine yazılır.
+
+    archive (CandleArchive) verilirse kapanan mumlar diske yazılır ve
+    restart sonrası depo arşivden doldurulup sadece aradaki boşluk çekilir.
+    """
+
+    def __init__(self, window=500, delta_limit=DELTA_LIMIT, archive=None):
+        self.window = window
+        self.delta_limit = delta_limit
+        self.archive = archive
+        self.candles = {}
+        # Arşivden yüklenen seriler: ilk istek boşluğu kapatmak için tam limitle
+        self.gap_keys = set()
+
+        self.metrics = {
+            "full_fetches": 0,
+            "delta_fetches": 0,
+            "warm_starts": 0,
+            "bars_received": 0
+        }
+
+    def _warm_start(self, key):
+        records = self.archive.read(key[0], key[1], n=self.window)
+        if records is None:
+            return None
+
+        candles = OHLCVRingBuffer(self.window)
+        candles.extend(records)
+        self.candles[key] = candles
+        self.gap_keys.add(key)
+        self.metrics["warm_starts"] += 1
+        return candles
+
+    def since(self, symbol, timeframe):
+        """Delta fetch için since (depo boşsa None)"""
+        key = (symbol, timeframe)
+        candles = self.candles.get(key)
+        if candles is None and self.archive is not None:
+            candles = self._warm_start(key)
+        if candles is None:
+            return None
+        return candles.last_ts()
+
+    def request_limit(self, symbol, timeframe):
+        """Bir sonraki istek için limit (boş/arşivden gelen seri: tam pencere)"""
+        if self.since(symbol, timeframe) is None or (symbol, timeframe) in self.gap_keys:
+            return self.window
+        return self.delta_limit
+
+    def limit_map(self, symbols, timeframes):
+        """async_fetch_engine için {(symbol, timeframe): limit}"""
+        return {
+            (symbol, timeframe): self.request_limit(symbol, timeframe)
+            for symbol in symbols
+            for timeframe in timeframes
+        }
+
+    def since_map(self, symbols, timeframes):
+        """async_fetch_engine için {(symbol, timeframe): since}"""
+        since = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                ts = self.since(symbol, timeframe)
+                if ts is not None:
+                    since[(symbol, timeframe)] = ts
+        return since
+
+    def get(self, symbol, timeframe):
+        """Tüm pencere liste olarak (kopya; sıcak yolda view() tercih edin)"""
+        candles = self.candles.get((symbol, timeframe))
+        return candles.rows() if candles is not None else []
+
+    def tail(self, symbol, timeframe, count):
+        """Son count mum liste olarak"""
+        candles = self.candles.get((symbol, timeframe))
+        return candles.rows(count) if candles is not None else []
+
+    def view(self, symbol, timeframe, n=None):
+        """Son n mumun kolon view'ları (kopyasız, bkz. OHLCVRingBuffer)"""
+        candles = self.candles.get((symbol, timeframe))
+        return candles.view(n) if candles is not None else None
+
+    def merge(self, symbol, timeframe, new_candles, delta=False):
+        """
+        Yeni mumları depoya ekle.
+
+        Args:
+            delta: since ile yapılmış istek mi (dolu yanıt = boşluk olabilir)
+
+        Returns:
+            int: Eklenen/güncellenen mum sayısı (-1: boşluk var, tam fetch gerekli)
+        """
+        key = (symbol, timeframe)
+        self.metrics["bars_received"] += len(new_candles)
+
+        if delta and len(new_candles) >= self.request_limit(symbol, timeframe):
+            # Aradaki mumlar eksik olabilir: seriyi sıfırla (tam fetch gerekir)
+            self.candles[key].clear()
+            self.gap_keys.discard(key)
+            return -1
+
+        if not new_candles:
+            return 0
+
+        first_ts = new_candles[0][0]
+        candles = self.candles.get(key)
+        if candles is None:
+            candles = OHLCVRingBuffer(self.window)
+            self.candles[key] = candles
+        elif not delta:
+            candles.clear()
+
+        # Dönen ilk mumdan itibaren olanları yenileriyle değiştir (canlı mum)
+        while len(candles) and candles.last_ts() >= first_ts:
+            candles.pop()
+
+        # Kapasite dolunca en eski mumların üzerine yazılır
+        candles.extend(new_candles)
+        self.gap_keys.discard(key)
+
+        if self.archive is not None:
+            # Son mum hariç hepsi kapanmış (arşiv daha eskileri atlar)
+            self.archive.append(symbol, timeframe, candles.rows(len(new_candles) + 1)[:-1])
+
+        return len(new_candles)
+
+    def fetch(self, exchange, symbol, timeframe):
+        """
+        Senkron delta fetch.
+
+        Returns:
+            int: Eklenen/güncellenen mum sayısı
+        """
+        since = self.since(symbol, timeframe)
+
+        if since is not None:
+            self.metrics["delta_fetches"] += 1
+            limit = self.request_limit(symbol, timeframe)
+            raw = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+            changed = self.merge(symbol, timeframe, raw, delta=True)
+            if changed >= 0:
+                return changed
+
+        self.metrics["full_fetches"] += 1
+        raw = exchange.fetch_ohlcv(symbol, timeframe, limit=self.window)
+        return self.merge(symbol, timeframe, raw)
+
+    def make_fetch_func(self, exchange):
+        """MTFCache.get_or_fetch ile uyumlu fetch_func (kolon view'ları döndürür)"""
+        def fetch_func(symbol, timeframe):
+            self.fetch(exchange, symbol, timeframe)
+            return self.view(symbol, timeframe)
+        return fetch_func
+
+    def get_stats(self):
+        stats = dict(self.metrics)
+        stats["series"] = len(self.candles)
+        return stats
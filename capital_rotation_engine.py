@@ -1,11 +1,15 @@
+from feature_snapshot_engine import feature_snapshot
+
+
 def rotation_filter(df, stats):
 
+    last = feature_snapshot(df)
     score_bonus = 0
 
     # Momentum kontrolü (EMA farkı)
-    ema_gap = df.iloc[-1]["ema20"] - df.iloc[-1]["ema50"]
+    ema_gap = last["ema20"] - last["ema50"]
 
-    if abs(ema_gap) > df.iloc[-1]["atr"]:
+    if abs(ema_gap) > last["atr"]:
         score_bonus += 0.1
 
     # Equity uyumu
@@ -13,7 +17,7 @@ def rotation_filter(df, stats):
         score_bonus += 0.05
 
     # RSI momentum
-    rsi = df.iloc[-1]["rsi"]
+    rsi = last["rsi"]
     if rsi > 60 or rsi < 40:
         score_bonus += 0.05
 
@@ -0,0 +1,269 @@
+# ================= CHECK SCHEDULER ENGINE =================
+# Watchdog check'leri tek döngüde seri çalışıyordu; yavaş bir exchange
+# çağrısı emergency / state check'lerini geciktiriyordu. Scheduler her
+# check'i kendi interval / priority / timeout'u ile küçük bir worker
+# havuzunda eşzamanlı çalıştırır:
+#   - boş slot varsa vadesi gelen check'lerden en yüksek öncelikli başlar
+#   - aynı check bir önceki çalışması bitmeden yeniden başlatılmaz
+#   - timeout'u aşan çalışma slotunu bırakır (thread durdurulamaz, arka
+#     planda biter); takılan exchange çağrısı hızlı check'leri bloklamaz
+# Her check için süre histogramı tutulur (get_status).
+
+import threading
+import time
+import traceback
+
+# Süre histogramı üst sınırları (ms)
+DURATION_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class DurationHistogram:
+    """Sabit bucket'lı süre histogramı (ms)"""
+
+    def __init__(self, buckets=DURATION_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # son bucket: +inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = None
+
+    def observe(self, ms):
+        index = next((i for i, bound in enumerate(self.buckets) if ms <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.last_ms = ms
+
+    def quantile(self, q):
+        """Bucket üst sınırı olarak yaklaşık quantile"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max_ms
+
+    def to_dict(self):
+        labels = [f"<={b}" for b in self.buckets] + ["+inf"]
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else None,
+            "max_ms": self.max_ms,
+            "last_ms": self.last_ms,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+class ScheduledCheck:
+    """Tek check'in ayarları ve çalışma durumu"""
+
+    def __init__(self, name, func, interval, priority=5, timeout=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.priority = priority
+        self.timeout = timeout
+
+        self.next_run = 0.0
+        self.running = False
+        self.timed_out = False
+        self.run_id = 0
+        self.started_at = None
+        self.deadline = None
+        self.last_result = None
+        self.last_error = None
+
+        self.histogram = DurationHistogram()
+        self.metrics = {
+            "runs": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "late_completions": 0
+        }
+
+    def to_dict(self):
+        return {
+            "interval": self.interval,
+            "priority": self.priority,
+            "timeout": self.timeout,
+            "running": self.running,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+            "metrics": self.metrics,
+            "duration": self.histogram.to_dict()
+        }
+
+
+class CheckScheduler:
+    """
+    Öncelikli, timeout'lu eşzamanlı check scheduler
+
+    Kullanış:
+        scheduler = CheckScheduler(max_workers=3)
+        scheduler.add("emergency", check_emergency, interval=2, priority=0, timeout=2)
+        scheduler.add("reconcile", check_exchange, interval=30, priority=2, timeout=20)
+        scheduler.start()
+
+    priority: küçük sayı = yüksek öncelik. Check fonksiyonunun dönüş değeri
+    last_result olarak saklanır; exception failure sayılır.
+    """
+
+    def __init__(self, max_workers=3, on_complete=None, name="CheckScheduler"):
+        self.max_workers = max_workers
+        self.on_complete = on_complete
+        self.name = name
+
+        self.checks = {}
+        self.active = 0
+        self.stopping = False
+        self.thread = None
+        self.cond = threading.Condition()
+
+        self.metrics = {
+            "launched": 0,
+            "completed": 0,
+            "timeouts": 0,
+            "queue_waits": 0
+        }
+
+    def add(self, name, func, interval, priority=5, timeout=None, delay=0.0):
+        """Check ekle (delay: ilk çalışmadan önce bekleme)"""
+        check = ScheduledCheck(name, func, interval, priority, timeout)
+        check.next_run = time.monotonic() + delay
+        with self.cond:
+            self.checks[name] = check
+            self.cond.notify()
+        return check
+
+    # ===== ÇALIŞTIRMA =====
+    def _execute(self, check, run_id):
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = check.func()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        with self.cond:
+            if check.run_id != run_id:
+                return
+            check.histogram.observe(duration_ms)
+            check.metrics["runs"] += 1
+            check.last_result = result
+            check.last_error = error
+            if error is not None:
+                check.metrics["failures"] += 1
+            if check.timed_out:
+                # Slot timeout'ta zaten bırakıldı
+                check.metrics["late_completions"] += 1
+            else:
+                self.active -= 1
+            check.running = False
+            check.timed_out = False
+            self.metrics["completed"] += 1
+            self.cond.notify()
+
+        if self.on_complete is not None:
+            try:
+                self.on_complete(check.name, result, error, duration_ms)
+            except Exception as e:
+                print(f"⚠️  Scheduler on_complete error: {e}")
+
+    def _launch(self, check, now):
+        check.running = True
+        check.timed_out = False
+        check.run_id += 1
+        check.started_at = now
+        check.deadline = now + check.timeout if check.timeout else None
+        # Sabit oran: bir sonraki çalışma başlangıçtan itibaren hesaplanır
+        check.next_run = max(check.next_run + check.interval, now)
+        self.active += 1
+        self.metrics["launched"] += 1
+
+        threading.Thread(
+            target=self._execute, args=(check, check.run_id),
+            daemon=True, name=f"{self.name}-{check.name}"
+        ).start()
+
+    def _expire(self, now):
+        """Deadline'ı geçen çalışmaların slotunu bırak"""
+        for check in self.checks.values():
+            if (check.running and not check.timed_out
+                    and check.deadline is not None and now >= check.deadline):
+                check.timed_out = True
+                check.metrics["timeouts"] += 1
+                self.metrics["timeouts"] += 1
+                self.active -= 1
+                print(f"⏱️  Check timed out: {check.name} (>{check.timeout}s)")
+
+    def _schedule(self):
+        """Lock altında: timeout'ları işle, boş slotlara vadesi gelenleri başlat"""
+        now = time.monotonic()
+        self._expire(now)
+
+        due = sorted(
+            (c for c in self.checks.values() if not c.running and c.next_run <= now),
+            key=lambda c: (c.priority, c.next_run)
+        )
+        for check in due:
+            if self.active >= self.max_workers:
+                self.metrics["queue_waits"] += 1
+                break
+            self._launch(check, now)
+
+        wakeups = [c.deadline for c in self.checks.values()
+                   if c.running and not c.timed_out and c.deadline is not None]
+        if self.active < self.max_workers:
+            wakeups += [c.next_run for c in self.checks.values() if not c.running]
+        # Slotlar doluysa biten check notify eder
+        return max(0.0, min(wakeups) - now) if wakeups else 1.0
+
+    def run_pending(self):
+        """
+        Tek scheduling adımı
+
+        Returns:
+            float: Bir sonraki olaya kadar bekleme (saniye)
+        """
+        with self.cond:
+            return self._schedule()
+
+    def run(self):
+        """Scheduler döngüsü (stop() çağrılana kadar bloklar)"""
+        with self.cond:
+            while not self.stopping:
+                self.cond.wait(min(self._schedule(), 1.0))
+
+    def start(self):
+        if self.thread is not None:
+            return self.thread
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, daemon=True, name=self.name)
+        self.thread.start()
+        return self.thread
+
+    def stop(self, timeout=5.0):
+        with self.cond:
+            self.stopping = True
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def get_status(self):
+        with self.cond:
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "metrics": dict(self.metrics),
+                "checks": {name: check.to_dict() for name, check in self.checks.items()}
+            }
@@ -7,6 +7,7 @@ MIN_VOLUME = 0
 MIN_VOLATILITY = 0
 DD_LIMIT = 0.30
 STATE_FILE = "engine_state.json"
+CANDLE_ARCHIVE_DIR = "candle_archive"
 
 # ===== TIMING PARAMETERS =====
 CHECK_INTERVAL = 5  # saniye
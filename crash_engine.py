@@ -3,20 +3,24 @@ import signal
 import sys
 import traceback
 from datetime import datetime
-import json
-import os
+
+from event_store_engine import get_store
+from exchange_snapshot_engine import get_snapshot_service, is_open
 
 class CrashRecoveryHandler:
     """Crash detection ve recovery"""
     
-    def __init__(self, state_manager, binance, symbols):
+    def __init__(self, state_manager, binance, symbols, install_signals=True):
         self.state_manager = state_manager
         self.binance = binance
         self.symbols = symbols
-        self.crash_log_file = "crash_logs.json"
+        self.store = get_store()
+        self.snapshots = get_snapshot_service(binance)
         
-        signal.signal(signal.SIGINT, self._handle_crash)
-        signal.signal(signal.SIGTERM, self._handle_crash)
+        # Watchdog process'i handler'ı sadece emergency_shutdown için kullanır
+        if install_signals:
+            signal.signal(signal.SIGINT, self._handle_crash)
+            signal.signal(signal.SIGTERM, self._handle_crash)
     
     def _handle_crash(self, signum, frame):
         """Crash handler"""
@@ -39,8 +43,7 @@ class CrashRecoveryHandler:
             
             print("2️⃣ Documenting positions...")
             try:
-                positions = self.binance.fetch_positions()
-                open_positions = [p for p in positions if float(p.get("contracts", 0)) != 0]
+                open_positions = self._open_positions()
                 
                 if open_positions:
                     print(f"   Found {len(open_positions)} open position(s)")
@@ -56,6 +59,18 @@ class CrashRecoveryHandler:
             print(f"❌ Shutdown error: {e}")
             traceback.print_exc()
     
+    def _open_positions(self):
+        """
+        Açık pozisyonlar; sinyal handler'ında da güvenli
+
+        Snapshot lock'u beklenmez (kesilen thread get() içindeyse deadlock olur);
+        taze snapshot yoksa doğrudan exchange'e sorulur.
+        """
+        snapshot = self.snapshots.peek(blocking=False)
+        if snapshot is not None:
+            return snapshot.open_positions
+        return [p for p in self.binance.fetch_positions() if is_open(p)]
+    
     def _log_crash(self, state):
         """Crash'ı log'a kaydet"""
         try:
@@ -66,18 +81,8 @@ class CrashRecoveryHandler:
                 "recovery_available": True
             }
             
-            crash_logs = []
-            if os.path.exists(self.crash_log_file):
-                try:
-                    with open(self.crash_log_file, "r") as f:
-                        crash_logs = json.load(f)
-                except:
-                    pass
-            
-            crash_logs.append(crash_info)
-            
-            with open(self.crash_log_file, "w") as f:
-                json.dump(crash_logs[-100:], f, indent=2)
+            # Process sonlanmadan önce hemen commit
+            self.store.log_event("crash", crash_info, flush=True)
         
         except Exception as e:
             print(f"   Crash logging failed: {e}")
@@ -1,7 +1,14 @@
+import asyncio
 import ccxt
 import pandas as pd
 import time
-from config import MOCK_MODE, MOCK_INITIAL_BALANCE, TIMEFRAME
+from config import MOCK_MODE, MOCK_INITIAL_BALANCE, TIMEFRAME, SYMBOLS, CHECK_INTERVAL, CANDLE_ARCHIVE_DIR
+from indicator_engine import IndicatorEngine
+from batch_indicator_engine import BatchIndicators
+from async_fetch_engine import AsyncOHLCVFetcher
+from candle_store_engine import CandleStore
+from candle_archive_engine import CandleArchive
+from multi_timeframe_engine import mtf_engine
 
 if MOCK_MODE:
     # Mock Binance client
@@ -99,14 +106,23 @@ if MOCK_MODE:
             """Set leverage"""
             return {'leverage': 5, 'maxNotionalValue': 100000}
         
-        def fetch_ohlcv(self, symbol, timeframe, limit=100):
+        def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
             import random
             # Generate realistic OHLCV data
             ohlcv = []
             price = 40000
-            timestamp = int(time.time() * 1000) - (limit * 5 * 60 * 1000)  # 5m candles
+            step = 5 * 60 * 1000  # 5m candles
+            last_open = int(time.time() * 1000) // step * step
+            timestamp = last_open - (limit - 1) * step
+            count = limit
+
+            if since is not None:
+                # Sadece since'den itibaren oluşan mumlar (delta fetch)
+                timestamp = max(timestamp, -(-since // step) * step)
+                count = min(limit, (last_open - timestamp) // step + 1)
+                price = self.mock_price
             
-            for i in range(limit):
+            for i in range(count):
                 price += random.uniform(-50, 50)
                 open_p = price
                 close_p = price + random.uniform(-30, 30)
@@ -115,7 +131,7 @@ if MOCK_MODE:
                 volume = random.uniform(100, 1000)
                 
                 ohlcv.append([timestamp, open_p, high_p, low_p, close_p, volume])
-                timestamp += 5 * 60 * 1000  # 5m
+                timestamp += step
             
             return ohlcv
         
@@ -131,6 +147,20 @@ if MOCK_MODE:
             """Round cost to exchange precision"""
             return round(cost, 2)
     
+    # Async twin (async_fetch_engine için)
+    class AsyncMockBinance:
+        def __init__(self, client, latency=0):
+            self.client = client
+            self.latency = latency
+
+        async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return self.client.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+
+        async def close(self):
+            pass
+
     binance = MockBinance()
     print("��� MOCK MODE ENABLED - No real trades!")
 else:
@@ -139,6 +169,18 @@ else:
         'secret': 'YOUR_API_SECRET',
     })
 
+def create_async_exchange():
+    """async_fetch_engine için async client"""
+    if MOCK_MODE:
+        return AsyncMockBinance(binance)
+
+    import ccxt.async_support as ccxt_async
+    return ccxt_async.binance({
+        'apiKey': 'YOUR_API_KEY',
+        'secret': 'YOUR_API_SECRET',
+        'enableRateLimit': False,  # bütçe TokenBucket'ta
+    })
+
 # ================= INDICATORS =================
 
 def ema(series, length):
@@ -186,43 +228,134 @@ def macd(series, fast=12, slow=26, signal=9):
 
 # ================= DATA FETCH =================
 
+indicator_engine = IndicatorEngine(history=500)
+# Mock mumlar her çağrıda rastgele üretilir; arşivlemeye değmez
+candle_store = CandleStore(
+    window=500,
+    archive=None if MOCK_MODE else CandleArchive(CANDLE_ARCHIVE_DIR)
+)
+
+def build_dataframe(raw_data):
+    """Tüm indikatörleri pandas ile baştan hesapla (referans yol)"""
+    df = pd.DataFrame(
+        raw_data,
+        columns=["timestamp", "open", "high", "low", "close", "volume"]
+    )
+
+    df["t"] = pd.to_datetime(df["timestamp"], unit="ms")
+
+    # EMA
+    df["ema20"] = ema(df["close"], 20)
+    df["ema50"] = ema(df["close"], 50)
+    df["ema200"] = ema(df["close"], 200)
+
+    # RSI
+    df["rsi"] = rsi(df["close"], 14)
+
+    # MACD
+    macd_line, signal_line = macd(df["close"])
+    df["macd"] = macd_line
+    df["macds"] = signal_line
+
+    # ATR
+    df["atr"] = atr(df["high"], df["low"], df["close"], 14)
+
+    # ADX
+    df["adx"] = adx(df["high"], df["low"], df["close"], 14)
+
+    # Volume average
+    df["vol_avg"] = df["volume"].rolling(20).mean()
+
+    return df.dropna().reset_index(drop=True)
+
 def fetch_dataframe(symbol):
     try:
-        raw_data = binance.fetch_ohlcv(symbol, TIMEFRAME, limit=500)
+        # Depo doluysa sadece son mumdan sonrası çekilir (bkz. candle_store_engine)
+        changed = candle_store.fetch(binance, symbol, TIMEFRAME)
+        mtf_engine.update(symbol, candle_store.view(symbol, TIMEFRAME), changed)
 
-        df = pd.DataFrame(
-            raw_data,
-            columns=["timestamp", "open", "high", "low", "close", "volume"]
-        )
+        # Sadece yeni kapanan mumlar işlenir (bkz. indicator_engine);
+        # bir mum fazlası verilir ki son commit edilen mumla örtüşsün
+        raw_data = candle_store.tail(symbol, TIMEFRAME, changed + 1)
 
-        df["t"] = pd.to_datetime(df["timestamp"], unit="ms")
+        # İndikatör durumu yoksa (ilk çağrı / arşivden warm start) ya da tail
+        # son commit edilen mumla örtüşmüyorsa ısınma için tüm pencere verilir
+        last_ts = indicator_engine.last_ts(symbol)
+        if last_ts is None or not raw_data or raw_data[0][0] > last_ts:
+            raw_data = candle_store.get(symbol, TIMEFRAME)
 
-        # EMA
-        df["ema20"] = ema(df["close"], 20)
-        df["ema50"] = ema(df["close"], 50)
-        df["ema200"] = ema(df["close"], 200)
+        return indicator_engine.update(symbol, raw_data)
 
-        # RSI
-        df["rsi"] = rsi(df["close"], 14)
+    except Exception as e:
+        print(f"❌ Data Fetch Error ({symbol}): {e}")
+        return None
 
-        # MACD
-        macd_line, signal_line = macd(df["close"])
-        df["macd"] = macd_line
-        df["macds"] = signal_line
+_async_fetcher = None
 
-        # ATR
-        df["atr"] = atr(df["high"], df["low"], df["close"], 14)
+def get_async_fetcher():
+    global _async_fetcher
+    if _async_fetcher is None:
+        _async_fetcher = AsyncOHLCVFetcher(create_async_exchange())
+    return _async_fetcher
 
-        # ADX
-        df["adx"] = adx(df["high"], df["low"], df["close"], 14)
+def fetch_batch(symbols=None, deadline=CHECK_INTERVAL):
+    """
+    Tüm semboller için tek BatchIndicators.
 
-        # Volume average
-        df["vol_avg"] = df["volume"].rolling(20).mean()
+    OHLCV istekleri eşzamanlı atılır, indikatörler tek vektörel geçişte
+    hesaplanır. Deadline'a yetişmeyen semboller bu döngüde atlanır.
 
-        df = df.dropna().reset_index(drop=True)
+    Returns:
+        BatchIndicators ya da None (hata)
+    """
+    symbols = symbols or SYMBOLS
+    try:
+        fetcher = get_async_fetcher()
+        since = candle_store.since_map(symbols, [TIMEFRAME])
 
-        return df
+        # Boş depolar tam pencere, dolu olanlar delta ile (tek eşzamanlı tur)
+        results = fetcher.fetch_all(
+            symbols, [TIMEFRAME], limit=500, deadline=deadline, since=since,
+            limits=candle_store.limit_map(symbols, [TIMEFRAME])
+        )
+        for (symbol, timeframe), raw in results.items():
+            changed = candle_store.merge(symbol, timeframe, raw, delta=(symbol, timeframe) in since)
+            if changed > 0:
+                mtf_engine.update(symbol, candle_store.view(symbol, timeframe), changed)
 
+        # Ring buffer view'ları doğrudan matrise kopyalanır (ara liste yok)
+        raw_by_symbol = {
+            symbol: candle_store.view(symbol, TIMEFRAME)
+            for symbol in symbols
+            if (symbol, TIMEFRAME) in results
+        }
+        return BatchIndicators(raw_by_symbol)
     except Exception as e:
-        print(f"❌ Data Fetch Error ({symbol}): {e}")
-        return None
\ No newline at end of file
+        print(f"❌ Batch Fetch Error: {e}")
+        return None
+
+def fetch_dataframes(symbols=None, deadline=CHECK_INTERVAL):
+    """
+    Tüm semboller için DataFrame'ler (bkz. fetch_batch).
+
+    Returns:
+        dict: symbol -> DataFrame (fetch hatası olan semboller hariç)
+    """
+    batch = fetch_batch(symbols, deadline)
+    return batch.to_dataframes() if batch is not None else {}
+
+def seed_multi_timeframe(symbols=None, deadline=CHECK_INTERVAL):
+    """
+    Üst zaman dilimlerini açılışta bir kez exchange geçmişiyle doldur.
+    Sonrasında mtf_engine sadece TIMEFRAME akışından resample eder.
+    """
+    try:
+        results = get_async_fetcher().fetch_all(
+            symbols or SYMBOLS, mtf_engine.timeframes, limit=500, deadline=deadline
+        )
+        for (symbol, timeframe), raw in results.items():
+            mtf_engine.seed(symbol, timeframe, raw)
+        return len(results)
+    except Exception as e:
+        print(f"❌ MTF Seed Error: {e}")
+        return 0
@@ -1,37 +1,104 @@
 # ================= DYNAMIC MTF CACHE ENGINE =================
 # Volatiliteye göre cache TTL'ı dinamik olarak ayarla
+# Sınırlı boyut (entry + byte), LRU eviction ve hit/miss/eviction/latency metrikleri
+# Single-flight: aynı anahtar için eşzamanlı miss'ler tek fetch'i bekler
 
+import sys
+import threading
 import time
-from datetime import datetime
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def estimate_size(data):
+    """Cache girdisinin yaklaşık bellek kullanımı (byte)"""
+    try:
+        if hasattr(data, "memory_usage"):
+            return int(data.memory_usage(index=True, deep=False).sum())
+        if hasattr(data, "nbytes"):
+            return int(data.nbytes)
+        if isinstance(data, dict):
+            return sum(estimate_size(v) for v in data.values())
+        if isinstance(data, (list, tuple)):
+            return sys.getsizeof(data) + (sys.getsizeof(data[0]) * len(data) if data else 0)
+        return sys.getsizeof(data)
+    except Exception:
+        return 0
+
+
+class _Flight:
+    """Devam eden tek bir fetch (single-flight)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
 
 class DynamicMTFCache:
     """
     Multi-timeframe cache, dinamik TTL ile
-    
+
     Logik:
     - Düşük volatilite (ATR < 0.5%): Cache 120 saniye
     - Normal volatilite (0.5%-1%): Cache 60 saniye
     - Yüksek volatilite (> 1%): Cache 30 saniye
+
+    Kapasite:
+    - max_entries / max_bytes aşılınca en uzun süre kullanılmayan (LRU) girdi silinir
+
+    Eşzamanlılık:
+    - Aynı (symbol, timeframe) için eşzamanlı miss'ler tek fetch'in sonucunu paylaşır
+    - stale_ttl > 0 ise süresi dolmuş girdi (ttl + stale_ttl içinde) hemen döndürülür
+      ve arka planda yenilenir (stale-while-revalidate)
     """
-    
-    def __init__(self, base_ttl=60):
+
+    def __init__(self, base_ttl=60, max_entries=1200, max_bytes=None, latency_history=500,
+                 stale_ttl=0, refresh_workers=4, flight_timeout=30):
         self.base_ttl = base_ttl
-        self.cache = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.refresh_workers = refresh_workers
+        self.flight_timeout = flight_timeout
+        # (symbol, timeframe) -> entry; sıralama = LRU (en eski başta)
+        self.cache = OrderedDict()
         self.volatility_cache = {}
-        
+        self.total_bytes = 0
+        self._lock = threading.RLock()
+        self._inflight = {}
+        self._executor = None
+
         # TTL boundaries
         self.ttl_low_volatility = 120      # %0.5 altında
         self.ttl_normal_volatility = 60    # %0.5-1% arası
         self.ttl_high_volatility = 30      # %1 üstünde
-    
+
+        # ===== METRIKS =====
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "fetches": 0,
+            "fetch_errors": 0,
+            "stale_served": 0,
+            "coalesced": 0,
+            "flight_timeouts": 0,
+            "background_refreshes": 0
+        }
+        self.fetch_latency_ms = deque(maxlen=latency_history)
+
     def get_dynamic_ttl(self, symbol, atr_percent):
         """
         ATR yüzdesine göre dinamik TTL hesapla
-        
+
         Args:
             symbol: Trading pair
             atr_percent: ATR as percentage (örn: 0.75)
-            
+
         Returns:
             int: TTL in seconds
         """
@@ -44,129 +111,253 @@ class DynamicMTFCache:
         else:
             ttl = self.ttl_high_volatility
             volatility_level = "HIGH"
-        
+
         self.volatility_cache[symbol] = {
             "atr_percent": atr_percent,
             "volatility_level": volatility_level,
             "ttl": ttl,
             "updated_at": time.time()
         }
-        
+
         return ttl
-    
+
+    def _ttl_for(self, symbol, ttl=None):
+        """Öncelik: verilen TTL > sembolün son dinamik TTL'ı > base_ttl"""
+        if ttl:
+            return ttl
+        volatility = self.volatility_cache.get(symbol)
+        if volatility:
+            return volatility["ttl"]
+        return self.base_ttl
+
+    def _remove(self, key):
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry["size"]
+        return entry
+
+    def _evict(self):
+        """Kapasite aşıldıysa LRU girdileri sil"""
+        while self.cache and (
+            len(self.cache) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            key = next(iter(self.cache))
+            self._remove(key)
+            self.metrics["evictions"] += 1
+
     def set_cache(self, symbol, timeframe, data, ttl=None):
         """
         Cache'e veri ekle (TTL ile)
-        
+
         Args:
             symbol: Trading pair
             timeframe: 1m, 5m, 15m, 1h
             data: DataFrame veya dict
-            ttl: Custom TTL (opsiyonel)
+            ttl: Custom TTL (opsiyonel, yoksa dinamik TTL)
         """
-        if symbol not in self.cache:
-            self.cache[symbol] = {}
-        
-        self.cache[symbol][timeframe] = {
-            "data": data,
-            "cached_at": time.time(),
-            "ttl": ttl or self.base_ttl
-        }
-    
+        key = (symbol, timeframe)
+        size = estimate_size(data)
+
+        with self._lock:
+            self._remove(key)
+            self.cache[key] = {
+                "data": data,
+                "cached_at": time.time(),
+                "ttl": self._ttl_for(symbol, ttl),
+                "size": size
+            }
+            self.total_bytes += size
+            self._evict()
+
     def get_cache(self, symbol, timeframe):
         """
         Cache'den veri al (eğer valid ise)
-        
+
         Returns:
             data veya None (expired ise)
         """
-        if symbol not in self.cache or timeframe not in self.cache[symbol]:
-            return None
-        
-        cached_entry = self.cache[symbol][timeframe]
-        age = time.time() - cached_entry["cached_at"]
-        ttl = cached_entry["ttl"]
-        
-        if age > ttl:
-            # Expired - sil ve None döndür
-            del self.cache[symbol][timeframe]
-            return None
-        
-        return cached_entry["data"]
-    
+        key = (symbol, timeframe)
+        with self._lock:
+            cached_entry = self.cache.get(key)
+            if cached_entry is None:
+                self.metrics["misses"] += 1
+                return None
+
+            age = time.time() - cached_entry["cached_at"]
+
+            if age > cached_entry["ttl"]:
+                # Expired - sil ve None döndür
+                self._remove(key)
+                self.metrics["expired"] += 1
+                self.metrics["misses"] += 1
+                return None
+
+            self.cache.move_to_end(key)
+            self.metrics["hits"] += 1
+            return cached_entry["data"]
+
+    def _run_flight(self, key, flight, fetch_func, ttl):
+        """Fetch'i çalıştır, sonucu cache'e yaz ve bekleyenleri uyandır"""
+        start = time.time()
+        try:
+            flight.result = fetch_func(key[0], key[1])
+            self.set_cache(key[0], key[1], flight.result, ttl)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.metrics["fetch_errors"] += 1
+        finally:
+            with self._lock:
+                self.metrics["fetches"] += 1
+                self.fetch_latency_ms.append((time.time() - start) * 1000)
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _start_refresh(self, key, fetch_func, ttl):
+        """Arka planda yenile (lock altında çağrılır; zaten uçuştaysa no-op)"""
+        if key in self._inflight:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.refresh_workers, thread_name_prefix="mtf-refresh"
+            )
+        flight = _Flight()
+        self._inflight[key] = flight
+        self.metrics["background_refreshes"] += 1
+        self._executor.submit(self._run_flight, key, flight, fetch_func, ttl)
+
+    def get_or_fetch(self, symbol, timeframe, fetch_func, ttl=None):
+        """
+        Cache varsa döndür, yoksa fetch et
+
+        Aynı anahtar için zaten bir fetch sürüyorsa onun sonucu beklenir.
+        Fetch hata verirse (silinmemişse) eski veri döndürülür.
+        """
+        key = (symbol, timeframe)
+
+        with self._lock:
+            cached_entry = self.cache.get(key)
+            if cached_entry is not None:
+                age = time.time() - cached_entry["cached_at"]
+                if age <= cached_entry["ttl"]:
+                    self.cache.move_to_end(key)
+                    self.metrics["hits"] += 1
+                    return cached_entry["data"]
+
+                self.metrics["expired"] += 1
+                if self.stale_ttl and age <= cached_entry["ttl"] + self.stale_ttl:
+                    # Stale-while-revalidate
+                    self.cache.move_to_end(key)
+                    self.metrics["stale_served"] += 1
+                    self._start_refresh(key, fetch_func, ttl)
+                    return cached_entry["data"]
+
+            self.metrics["misses"] += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+            else:
+                self.metrics["coalesced"] += 1
+
+        # Timeout bu takipçiye özel: paylaşılan flight'a sadece leader yazar
+        timed_out = False
+        if leader:
+            self._run_flight(key, flight, fetch_func, ttl)
+        elif not flight.event.wait(self.flight_timeout):
+            timed_out = True
+            with self._lock:
+                self.metrics["flight_timeouts"] += 1
+
+        if not timed_out and flight.error is None:
+            return flight.result
+
+        with self._lock:
+            if cached_entry is not None and key in self.cache:
+                self.metrics["stale_served"] += 1
+                return cached_entry["data"]
+        return None
+
     def get_cache_status(self, symbol):
         """Symbol için cache status'unu al"""
-        if symbol not in self.cache:
+        with self._lock:
+            entries = {tf: entry for (sym, tf), entry in self.cache.items() if sym == symbol}
+        if not entries:
             return None
-        
+
         status = {
             "symbol": symbol,
-            "timeframes_cached": list(self.cache[symbol].keys()),
+            "timeframes_cached": list(entries.keys()),
             "volatility": self.volatility_cache.get(symbol),
             "entries": {}
         }
-        
-        for timeframe, entry in self.cache[symbol].items():
-            age = time.time() - entry["cached_at"]
+
+        now = time.time()
+        for timeframe, entry in entries.items():
+            age = now - entry["cached_at"]
             ttl = entry["ttl"]
             is_valid = age < ttl
-            
+
             status["entries"][timeframe] = {
                 "age_seconds": age,
                 "ttl_seconds": ttl,
                 "valid": is_valid,
-                "expires_in": ttl - age
+                "expires_in": ttl - age,
+                "size_bytes": entry["size"]
             }
-        
+
         return status
-    
-    def clear_expired(self, symbol=None):
+
+    def clear_expired(self, symbol=None, ttl_multiplier=1):
         """Expired cache'leri sil"""
         try:
-            if symbol:
-                # Specific symbol
-                if symbol in self.cache:
-                    expired = []
-                    for tf, entry in self.cache[symbol].items():
-                        age = time.time() - entry["cached_at"]
-                        if age > entry["ttl"]:
-                            expired.append(tf)
-                    
-                    for tf in expired:
-                        del self.cache[symbol][tf]
-                    
-                    return len(expired)
-            else:
-                # All symbols
-                total_cleared = 0
-                for symbol in list(self.cache.keys()):
-                    total_cleared += self.clear_expired(symbol)
-                
-                return total_cleared
+            now = time.time()
+            with self._lock:
+                expired = [
+                    key for key, entry in self.cache.items()
+                    if (symbol is None or key[0] == symbol)
+                    and now - entry["cached_at"] > entry["ttl"] * ttl_multiplier
+                ]
+                for key in expired:
+                    self._remove(key)
+                self.metrics["expired"] += len(expired)
+            return len(expired)
         except Exception as e:
             print(f"⚠️  Cache clear failed: {e}")
             return 0
-    
+
     def get_cache_efficiency(self):
         """Cache efficiency metrikleri al"""
-        total_entries = 0
-        total_age = 0
-        
-        for symbol in self.cache:
-            for timeframe, entry in self.cache[symbol].items():
-                total_entries += 1
-                age = time.time() - entry["cached_at"]
-                total_age += age
-        
-        if total_entries == 0:
-            return {
-                "total_entries": 0,
-                "average_age_seconds": 0,
-                "symbols_cached": 0
-            }
-        
-        return {
-            "total_entries": total_entries,
-            "average_age_seconds": total_age / total_entries,
-            "symbols_cached": len(self.cache)
-        }
\ No newline at end of file
+        with self._lock:
+            efficiency = dict(self.metrics)
+            entries = list(self.cache.items())
+            latencies = list(self.fetch_latency_ms)
+
+        lookups = efficiency["hits"] + efficiency["misses"]
+        efficiency.update({
+            "total_entries": len(entries),
+            "symbols_cached": len({symbol for (symbol, _), _ in entries}),
+            "total_bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hit_rate": efficiency["hits"] / lookups if lookups else 0,
+            "inflight": len(self._inflight),
+            "average_age_seconds": 0
+        })
+
+        if entries:
+            now = time.time()
+            efficiency["average_age_seconds"] = (
+                sum(now - entry["cached_at"] for _, entry in entries) / len(entries)
+            )
+
+        if latencies:
+            efficiency.update({
+                "fetch_avg_ms": np.mean(latencies),
+                "fetch_p95_ms": np.percentile(latencies, 95),
+                "fetch_max_ms": np.max(latencies)
+            })
+
+        return efficiency
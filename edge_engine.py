@@ -1,34 +1,12 @@
 # ================= EDGE VALIDATION ENGINE v2 =================
 
-import numpy as np
-from performance_engine import load_logs
+from performance_engine import get_trade_stats
 
 LOOKBACK = 30
 
-def edge_metrics():
-    logs = load_logs()
-
-    if not logs or len(logs) < 10:  # 30 beklemiyoruz artık
-        return None
-
-    last = logs[-LOOKBACK:]
-
-    R_values = [x.get("R", 0) for x in last if "R" in x]
-
-    if not R_values:
-        return None
-
-    winrate = len([x for x in R_values if x > 0]) / len(R_values)
-
-    avg_win = np.mean([x for x in R_values if x > 0]) if any(x > 0 for x in R_values) else 0
-    avg_loss = abs(np.mean([x for x in R_values if x <= 0])) if any(x <= 0 for x in R_values) else 0
-
-    expectancy = (winrate * avg_win) - ((1 - winrate) * avg_loss)
-
-    return {
-        "winrate": winrate,
-        "expectancy": expectancy
-    }
+def edge_metrics(logs=None):
+    # 30 beklemiyoruz artık: 10 trade yeterli
+    return get_trade_stats(logs).edge_metrics(LOOKBACK, min_trades=10)
 
 
 def mode_switch():
@@ -0,0 +1,578 @@
+# ================= EVENT STORE ENGINE =================
+# Trade journal, lifecycle, watchdog, reconciliation, rebuild ve crash log'ları
+# için tek gömülü SQLite deposu (WAL modu). Her biri ayrı JSON dizisi olarak
+# okunup yeniden yazılıyor ve 100-1000 kayıtla kırpılıyordu; burada insert'ler
+# bellekte toplanıp tek transaction'da yazılır, eski kayıtlar tür başına
+# retention politikasıyla silinir ve analizler SQL aggregate olarak çalışır.
+# Teşhis log'ları (lifecycle / watchdog / reconciliation / rebuild) trading
+# thread'inde diske hiç dokunmaz: BackgroundLogWriter'ın sınırlı kuyruğuna
+# girer, tek thread batch halinde yazar (batch başına bir commit / fsync).
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from trade_log_engine import SegmentedLog, log_directory, to_epoch
+
+STORE_PATH = "trading_store.db"
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 1.0
+RETENTION_CHECK_INTERVAL = 3600
+
+# Arka plan log yazıcısı
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 500
+LOG_LINGER = 0.2
+
+# Tür başına saklama süresi (gün); None = sınırsız
+RETENTION_DAYS = {
+    "journal": None,
+    "lifecycle": 365,
+    "watchdog": 90,
+    "reconciliation": 90,
+    "rebuild": 365,
+    "crash": None
+}
+
+# İlk açılışta bir kez içe aktarılan eski JSON dosyaları (dosyalara dokunulmaz)
+LEGACY_FILES = {
+    "journal": "trade_journal.json",
+    "lifecycle": "trade_lifecycle_log.json",
+    "watchdog": "watchdog_log.json",
+    "reconciliation": "exchange_reconciliation_log.json",
+    "rebuild": "position_rebuild_log.json",
+    "crash": "crash_logs.json"
+}
+
+# Journal kayıtlarından kolonlara çıkarılan alanlar (geri kalanı data JSON'unda)
+TRADE_COLUMNS = [
+    "trade_id", "symbol", "direction", "entry_price", "exit_price",
+    "exit_reason", "hold_time_minutes", "pnl_percent"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL,
+    trade_id TEXT,
+    symbol TEXT,
+    direction TEXT,
+    entry_price REAL,
+    exit_price REAL,
+    exit_reason TEXT,
+    hold_time_minutes REAL,
+    pnl_percent REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_symbol_ts ON trades (symbol, timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades (timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_trade_id ON trades (trade_id);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    timestamp REAL,
+    symbol TEXT,
+    trade_id TEXT,
+    event TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_kind_ts ON events (kind, timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_symbol_ts ON events (symbol, timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_trade_id ON events (trade_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _event_name(entry):
+    return entry.get("event") or entry.get("issue_type") or entry.get("action")
+
+
+class EventStore:
+    """
+    SQLite (WAL) trade/event deposu
+
+    Kullanış:
+        store = get_store()
+        store.log_event("watchdog", {"timestamp": ..., "issue_type": ..., ...})
+        store.insert_trade(trade)                      # journal
+        store.events("reconciliation", symbol="BTC/USDT", since=cutoff)
+        store.query("SELECT COUNT(*) FROM trades WHERE timestamp > ?", (cutoff,))
+
+    Yazmalar batch_size kayıt ya da flush_interval saniyede bir tek
+    transaction'da diske iner (yeni kayıt gelmese de: zamanlayıcı thread'i);
+    okumalar önce bekleyenleri yazar. flush=True (crash log gibi) hemen
+    yazar; journal kayıtları varsayılan olarak hemen yazılır.
+    Thread-safe (watchdog thread'i).
+    """
+
+    def __init__(self, path=STORE_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 retention_days=None, import_legacy=True):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = dict(RETENTION_DAYS, **(retention_days or {}))
+
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Commit'ler batch'li olduğundan WAL her commit'te fsync'lenir
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(SCHEMA)
+
+        self.pending_trades = []
+        self.pending_events = []
+        self.first_pending = None
+        self.flush_timer = None
+        self.last_retention = 0
+
+        self.metrics = {
+            "trades_written": 0,
+            "events_written": 0,
+            "batches": 0,
+            "rows_expired": 0
+        }
+
+        if import_legacy:
+            self._import_legacy()
+
+    # ===== YAZMA =====
+    def _trade_row(self, trade):
+        return (
+            to_epoch(trade.get("timestamp")) or time.time(),
+            *(trade.get(col) for col in TRADE_COLUMNS),
+            json.dumps(trade, default=str)
+        )
+
+    def _queued(self, flush):
+        if self.first_pending is None:
+            self.first_pending = time.time()
+        pending = len(self.pending_trades) + len(self.pending_events)
+        if flush or pending >= self.batch_size or time.time() - self.first_pending >= self.flush_interval:
+            self.flush()
+        elif self.flush_timer is None:
+            # Sonraki kayıt gelmezse de flush_interval içinde diske iner
+            self.flush_timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self.flush_timer.daemon = True
+            self.flush_timer.start()
+
+    def _timed_flush(self):
+        with self.lock:
+            self.flush_timer = None
+            if self.conn is None:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Event store timed flush failed ({self.path}): {e}")
+
+    def insert_trade(self, trade, flush=True):
+        """Journal kaydı ekle (varsayılan: hemen yaz; eski JSON journal gibi)"""
+        with self.lock:
+            self.pending_trades.append(self._trade_row(trade))
+            self._queued(flush)
+
+    def log_event(self, kind, entry, flush=False):
+        """
+        Log kaydı ekle.
+
+        Args:
+            kind: lifecycle / watchdog / reconciliation / rebuild / crash
+            entry: Kayıt dict'i (timestamp, symbol, trade_id varsa kolonlara da yazılır)
+        """
+        with self.lock:
+            self.pending_events.append(self.event_row(kind, entry))
+            self._queued(flush)
+
+    @staticmethod
+    def event_row(kind, entry):
+        """events tablosu satırı (kayıt o anki haliyle serialize edilir)"""
+        return (
+            kind,
+            to_epoch(entry.get("timestamp")) or time.time(),
+            entry.get("symbol"),
+            entry.get("trade_id"),
+            _event_name(entry),
+            json.dumps(entry, default=str)
+        )
+
+    def write_events(self, rows):
+        """Hazır satırları tek transaction'da yaz (BackgroundLogWriter)"""
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO events (kind, timestamp, symbol, trade_id, event, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+            self.metrics["events_written"] += len(rows)
+            self.metrics["batches"] += 1
+            self._maybe_apply_retention()
+
+    def flush(self):
+        """Bekleyen kayıtları tek transaction'da yaz"""
+        with self.lock:
+            if not self.pending_trades and not self.pending_events:
+                self.first_pending = None
+                return
+
+            placeholders = ", ".join("?" * (len(TRADE_COLUMNS) + 2))
+            with self.conn:
+                if self.pending_trades:
+                    self.conn.executemany(
+                        f"INSERT INTO trades (timestamp, {', '.join(TRADE_COLUMNS)}, data) "
+                        f"VALUES ({placeholders})",
+                        self.pending_trades
+                    )
+                if self.pending_events:
+                    self.conn.executemany(
+                        "INSERT INTO events (kind, timestamp, symbol, trade_id, event, data) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        self.pending_events
+                    )
+
+            self.metrics["trades_written"] += len(self.pending_trades)
+            self.metrics["events_written"] += len(self.pending_events)
+            self.metrics["batches"] += 1
+            self.pending_trades = []
+            self.pending_events = []
+            self.first_pending = None
+
+            self._maybe_apply_retention()
+
+    def _maybe_apply_retention(self):
+        # Hem flush (journal / crash) hem write_events (BackgroundLogWriter) yolundan
+        if time.time() - self.last_retention >= RETENTION_CHECK_INTERVAL:
+            self.apply_retention()
+
+    def apply_retention(self, now=None):
+        """
+        Retention politikası: süresi dolan kayıtları sil
+
+        Returns:
+            int: Silinen satır sayısı
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        with self.lock, self.conn:
+            for kind, days in self.retention_days.items():
+                if days is None:
+                    continue
+                cutoff = now - days * 86400
+                if kind == "journal":
+                    cursor = self.conn.execute("DELETE FROM trades WHERE timestamp < ?", (cutoff,))
+                else:
+                    cursor = self.conn.execute(
+                        "DELETE FROM events WHERE kind = ? AND timestamp < ?", (kind, cutoff)
+                    )
+                removed += cursor.rowcount
+            self.last_retention = now
+
+        self.metrics["rows_expired"] += removed
+        return removed
+
+    # ===== JOURNAL =====
+    def last_trade(self):
+        """(id, kayıt) ya da None"""
+        row = self.query_one("SELECT id, data FROM trades ORDER BY id DESC LIMIT 1")
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def update_trade(self, row_id, trade):
+        with self.lock:
+            self.flush()
+            with self.conn:
+                self.conn.execute(
+                    f"UPDATE trades SET timestamp = ?, {', '.join(c + ' = ?' for c in TRADE_COLUMNS)}, "
+                    f"data = ? WHERE id = ?",
+                    (*self._trade_row(trade), row_id)
+                )
+
+    def trades(self, symbol=None, since=None, until=None, limit=None):
+        return self._select("trades", None, symbol, since, until, limit)
+
+    # ===== OKUMA =====
+    def query(self, sql, params=()):
+        with self.lock:
+            self.flush()
+            return self.conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        rows = self.query(sql, params)
+        return rows[0] if rows else None
+
+    def _select(self, table, kind, symbol, since, until, limit):
+        where, params = [], []
+        if kind is not None:
+            where.append("kind = ?")
+            params.append(kind)
+        if symbol is not None:
+            where.append("symbol = ?")
+            params.append(symbol)
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(to_epoch(since))
+        if until is not None:
+            where.append("timestamp <= ?")
+            params.append(to_epoch(until))
+
+        sql = f"SELECT id, data FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if limit is not None:
+            # Son `limit` kayıt, eskiden yeniye
+            sql = f"SELECT id, data FROM ({sql} ORDER BY id DESC LIMIT ?) ORDER BY id"
+            params.append(limit)
+        else:
+            sql += " ORDER BY id"
+        return [json.loads(row[1]) for row in self.query(sql, params)]
+
+    def events(self, kind, symbol=None, since=None, until=None, limit=None):
+        """Tür için kayıtlar (eskiden yeniye); limit verilirse son limit kayıt"""
+        return self._select("events", kind, symbol, since, until, limit)
+
+    def count(self, kind):
+        if kind == "journal":
+            return self.query_one("SELECT COUNT(*) FROM trades")[0]
+        return self.query_one("SELECT COUNT(*) FROM events WHERE kind = ?", (kind,))[0]
+
+    # ===== LEGACY =====
+    def _legacy_records(self, kind, path):
+        # Segment journal (trade_journal/) varsa JSON dosyasından daha günceldir
+        if kind == "journal" and os.path.isdir(log_directory(path)):
+            return list(SegmentedLog(log_directory(path), legacy_path=path))
+        if not os.path.exists(path):
+            return []
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _import_legacy(self):
+        for kind, path in LEGACY_FILES.items():
+            key = f"legacy_import:{kind}"
+            if self.query_one("SELECT value FROM meta WHERE key = ?", (key,)):
+                continue
+            try:
+                records = self._legacy_records(kind, path)
+            except Exception as e:
+                print(f"⚠️  Legacy {kind} log unreadable ({path}): {e}")
+                records = []
+
+            for record in records:
+                if kind == "journal":
+                    self.pending_trades.append(self._trade_row(record))
+                else:
+                    self.log_event(kind, record)
+            with self.lock:
+                self.flush()
+                with self.conn:
+                    self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, str(len(records))))
+            if records:
+                print(f"📦 Imported {len(records)} {kind} records from {path} into {self.path}")
+
+    def close(self):
+        with self.lock:
+            if self.conn is None:
+                return
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            self.flush()
+            self.conn.close()
+            self.conn = None
+
+
+# ================= ARKA PLAN LOG YAZICISI =================
+
+_STOP = object()
+
+
+class BackgroundLogWriter:
+    """
+    Write-behind log yazıcısı
+
+    submit() kaydı serialize edip sınırlı kuyruğa koyar ve hemen döner;
+    tek bir daemon thread kuyruğu boşaltır, linger süresi boyunca biriken
+    kayıtları (en fazla batch_size) tek transaction'da yazar.
+
+    Kuyruk doluysa: put_timeout > 0 ise o kadar beklenir (backpressure),
+    sonra kayıt düşürülür ve drop sayaçları artar. Varsayılan 0: trading
+    thread'i hiç beklemez.
+
+    Okumalar (store.events) en fazla bir batch geriden gelir; güncel
+    okuma gerekiyorsa önce flush().
+    """
+
+    def __init__(self, store, maxsize=LOG_QUEUE_SIZE, batch_size=LOG_BATCH_SIZE,
+                 linger=LOG_LINGER, put_timeout=0.0):
+        self.store = store
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.linger = linger
+        self.put_timeout = put_timeout
+        self.thread = None
+        self.start_lock = threading.Lock()
+
+        self.metrics = {
+            "submitted": 0,
+            "written": 0,
+            "batches": 0,
+            "dropped": 0,
+            "dropped_by_kind": {},
+            "write_errors": 0,
+            "queue_high_water": 0,
+            "last_batch_ms": 0
+        }
+
+    def _ensure_started(self):
+        if self.thread is not None:
+            return
+        with self.start_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self.thread.start()
+
+    def submit(self, kind, entry):
+        """
+        Kaydı kuyruğa al (diske yazmaz).
+
+        Returns:
+            bool: False ise kuyruk dolu olduğu için düşürüldü
+        """
+        self._ensure_started()
+        row = self.store.event_row(kind, entry)
+        try:
+            if self.put_timeout > 0:
+                self.queue.put(row, timeout=self.put_timeout)
+            else:
+                self.queue.put_nowait(row)
+        except queue.Full:
+            self.metrics["dropped"] += 1
+            dropped = self.metrics["dropped_by_kind"]
+            dropped[kind] = dropped.get(kind, 0) + 1
+            return False
+
+        self.metrics["submitted"] += 1
+        size = self.queue.qsize()
+        if size > self.metrics["queue_high_water"]:
+            self.metrics["queue_high_water"] = size
+        return True
+
+    def _collect(self, first):
+        """first + linger içinde gelenler (stop işareti varsa ikinci değer True)"""
+        batch = [first]
+        deadline = time.time() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                row = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is _STOP:
+                return batch, True
+            batch.append(row)
+        return batch, False
+
+    def _write(self, batch):
+        start = time.time()
+        try:
+            self.store.write_events(batch)
+            self.metrics["written"] += len(batch)
+            self.metrics["batches"] += 1
+        except Exception as e:
+            self.metrics["write_errors"] += 1
+            print(f"⚠️  Log writer batch failed ({len(batch)} events): {e}")
+        self.metrics["last_batch_ms"] = (time.time() - start) * 1000
+
+    def _run(self):
+        while True:
+            first = self.queue.get()
+            if first is _STOP:
+                self.queue.task_done()
+                return
+
+            batch, stop = self._collect(first)
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self.queue.task_done()
+            if stop:
+                return
+
+    def flush(self, timeout=None):
+        """
+        Kuyruktaki her şey yazılana kadar bekle.
+
+        Returns:
+            bool: timeout dolmadan boşaldıysa True
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout=5.0):
+        """Kuyruğu boşalt ve thread'i durdur"""
+        if self.thread is None:
+            return
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+        self.thread = None
+
+
+# ================= PAYLAŞILAN DEPO =================
+
+_stores = {}
+_writers = {}
+
+
+def get_store(path=STORE_PATH):
+    """Process başına dosya başına tek EventStore (çıkışta flush edilir)"""
+    key = os.path.abspath(path)
+    store = _stores.get(key)
+    if store is None:
+        store = EventStore(path)
+        _stores[key] = store
+    return store
+
+
+def get_log_writer(path=STORE_PATH):
+    """Store başına tek BackgroundLogWriter (çıkışta kuyruk boşaltılır)"""
+    key = os.path.abspath(path)
+    writer = _writers.get(key)
+    if writer is None:
+        writer = BackgroundLogWriter(get_store(path))
+        _writers[key] = writer
+    return writer
+
+
+def _forget_after_fork():
+    # Fork edilen process (ör. watchdog process) ebeveynin SQLite bağlantısını
+    # ve writer thread'ini kullanamaz; kendi store / writer'ını açar
+    _stores.clear()
+    _writers.clear()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
+
+
+@atexit.register
+def _close_all():
+    for writer in _writers.values():
+        writer.stop()
+    for store in _stores.values():
+        try:
+            store.close()
+        except Exception as e:
+            print(f"⚠️  Event store close failed ({store.path}): {e}")
@@ -1,10 +1,11 @@
 # ================= EXCHANGE RECONCILIATION ENGINE =================
 # State ↔ Exchange senkronizasyonu (iki yönlü)
 
-import json
 import time
 from datetime import datetime
 
+from event_store_engine import get_store, get_log_writer
+
 class ExchangeReconciliation:
     """
     State ve Exchange her zaman sync olmalı
@@ -23,7 +24,8 @@ class ExchangeReconciliation:
     def __init__(self, binance, stop_manager=None):
         self.binance = binance
         self.stop_manager = stop_manager
-        self.recon_log = "exchange_reconciliation_log.json"
+        self.store = get_store()
+        self.log_writer = get_log_writer()
         self.last_recon = {}
     
     def reconcile_position(self, symbol, state, open_positions):
@@ -270,17 +272,9 @@ class ExchangeReconciliation:
         try:
             print(f"🔄 Force resyncing stops for {symbol}...")
             
-            # 1️⃣ Eski stop'ları sil
-            active_stops = self.stop_manager.get_active_stops(symbol)
-            for stop in active_stops:
-                try:
-                    self.stop_manager.cancel_stop_order(
-                        self.binance, 
-                        symbol, 
-                        stop.get('stopOrderId')
-                    )
-                except:
-                    pass
+            # 1️⃣ Eski stop'lar exchange'den yeniden listelenir; yeni stop
+            #    yerleşince hepsi iptal edilir (cancel-replace)
+            self.stop_manager.mark_unsynced(self.binance, symbol)
             
             # 2️⃣ Yenisini koy
             if state.get('sl'):
@@ -301,38 +295,23 @@ class ExchangeReconciliation:
     def _log_reconciliation(self, log_entry):
         """Log reconciliation"""
         try:
-            logs = []
-            try:
-                with open(self.recon_log, "r") as f:
-                    logs = json.load(f)
-            except:
-                logs = []
-            
-            logs.append(log_entry)
-            
-            # Son 200 log tutun
-            if len(logs) > 200:
-                logs = logs[-200:]
-            
-            with open(self.recon_log, "w") as f:
-                json.dump(logs, f, indent=2)
+            self.log_writer.submit("reconciliation", log_entry)
         except:
             pass
     
     def get_reconciliation_status(self):
         """Reconciliation status'u al"""
         try:
-            with open(self.recon_log, "r") as f:
-                logs = json.load(f)
+            total = self.store.count("reconciliation")
+            recent = self.store.events("reconciliation", limit=10)
             
-            recent = logs[-10:] if logs else []
             issues_count = sum(1 for log in recent if log.get('issues_found', 0) > 0)
             
             return {
-                "total_reconciliations": len(logs),
+                "total_reconciliations": total,
                 "recent_10_reconciliations": len(recent),
                 "recent_with_issues": issues_count,
-                "last_reconciliation": logs[-1] if logs else None
+                "last_reconciliation": recent[-1] if recent else None
             }
         except:
             return {
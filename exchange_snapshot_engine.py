@@ -0,0 +1,309 @@
+# ================= EXCHANGE SNAPSHOT ENGINE =================
+# Watchdog check'leri, safety/verify motorları ve crash handler'ı her biri ayrı
+# fetch_positions / fetch_open_orders çağırıyordu (watchdog pass'i başına ~5x
+# aynı REST çağrısı ve rate-limit weight). Snapshot servisi pozisyonları, açık
+# emirleri ve bakiyeyi döngü başına bir kez çeker, sürüm numarası basar ve
+# tüm tüketicilere aynı değiştirilemez (immutable) snapshot'ı verir.
+#
+# Snapshot max_staleness saniyeden eskiyse bir sonraki get() yeniden çeker.
+# Bot kendi emir/pozisyon aksiyonundan sonra invalidate() çağırır; böylece
+# stop yeniden kurulduktan sonra eski snapshot "stop yok" diye okunmaz.
+#
+# stream_engine.StreamClient bağlıysa (is_live) snapshot REST yerine
+# stream'in yerel defterlerinden kurulur; defter değişmedikçe aynı sürüm döner.
+
+import os
+import threading
+import time
+from types import MappingProxyType
+
+MAX_STALENESS = 5.0
+
+
+def freeze(value):
+    """dict -> MappingProxyType, list -> tuple (iç içe)"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def is_open(position):
+    try:
+        return float(position.get("contracts") or 0) != 0
+    except (TypeError, ValueError):
+        return False
+
+
+class ExchangeSnapshot:
+    """
+    Tek bir fetch döngüsünün değiştirilemez sonucu
+
+    positions / open_positions: pozisyon tuple'ı (her pozisyon read-only mapping)
+    open_orders: {symbol: emir tuple'ı}; emir çekilemediyse None
+    balance: read-only mapping ya da None
+    """
+
+    __slots__ = ("version", "taken_at", "positions", "open_positions",
+                 "open_orders", "balance", "errors")
+
+    def __init__(self, version, positions, open_orders=None, balance=None, errors=None):
+        set_ = object.__setattr__
+        set_(self, "version", version)
+        set_(self, "taken_at", time.time())
+        set_(self, "positions", freeze(positions))
+        set_(self, "open_positions", tuple(p for p in self.positions if is_open(p)))
+        set_(self, "open_orders", freeze(open_orders) if open_orders is not None else None)
+        set_(self, "balance", freeze(balance) if balance is not None else None)
+        set_(self, "errors", freeze(errors or {}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ExchangeSnapshot is immutable")
+
+    def age(self):
+        return time.time() - self.taken_at
+
+    def position_for(self, symbol):
+        """Sembolün açık pozisyonu ya da None"""
+        return next((p for p in self.open_positions if p.get("symbol") == symbol), None)
+
+    def orders_for(self, symbol):
+        """Sembolün açık emirleri; sembol bu snapshot'ta çekilmediyse None"""
+        if self.open_orders is None:
+            return None
+        return self.open_orders.get(symbol)
+
+    def __repr__(self):
+        return (f"ExchangeSnapshot(v{self.version}, positions={len(self.open_positions)}, "
+                f"age={self.age():.1f}s)")
+
+
+class ExchangeSnapshotService:
+    """
+    Versiyonlu exchange snapshot'ı; aynı anda gelen istekler tek fetch'i paylaşır
+
+    Kullanış:
+        snapshots = get_snapshot_service(binance)
+        snap = snapshots.get()                  # max_staleness içinde cache'ten
+        for p in snap.open_positions: ...
+        orders = snapshots.open_orders(symbol)  # snapshot'tan, yoksa tek fetch
+        snapshots.invalidate()                  # kendi emir aksiyonundan sonra
+    """
+
+    def __init__(self, binance, max_staleness=MAX_STALENESS, symbols=None,
+                 fetch_orders=True, fetch_balance=True, stream=None):
+        """
+        Args:
+            binance: Binance client
+            max_staleness: Snapshot'ın yeniden kullanılabileceği max yaş (saniye)
+            symbols: Açık emirleri her snapshot'ta çekilecek semboller
+                (açık pozisyonu olan semboller her zaman eklenir)
+            fetch_orders: Açık emirler snapshot'a dahil edilsin mi
+            fetch_balance: Bakiye snapshot'a dahil edilsin mi
+            stream: stream_engine.StreamClient (canlıyken REST çağrısı yapılmaz)
+        """
+        self.binance = binance
+        self.max_staleness = max_staleness
+        self.symbols = set(symbols or ())
+        self.fetch_orders = fetch_orders
+        self.fetch_balance = fetch_balance
+        self.stream = stream
+        self.stream_version = None
+
+        self.snapshot = None
+        self.version = 0
+        self.lock = threading.Lock()
+
+        self.metrics = {
+            "refreshes": 0,
+            "stream_refreshes": 0,
+            "hits": 0,
+            "invalidations": 0,
+            "order_misses": 0,
+            "fetch_errors": 0,
+            "rest_calls": 0,
+            "last_fetch_ms": 0.0
+        }
+
+    def _call(self, name, *args):
+        self.metrics["rest_calls"] += 1
+        return getattr(self.binance, name)(*args)
+
+    def _stream_live(self):
+        return self.stream is not None and self.stream.is_live()
+
+    def _refresh_from_stream(self):
+        """Stream defterlerinden snapshot (REST yok)"""
+        stream_version = self.stream.version
+        positions = self.stream.get_positions()
+        open_orders = None
+        if self.fetch_orders:
+            symbols = self.symbols | {p.get("symbol") for p in positions if is_open(p)}
+            open_orders = {}
+            for symbol in symbols:
+                orders = self.stream.get_open_orders(symbol)
+                if orders is not None:
+                    open_orders[symbol] = orders
+        balance = self.stream.get_balance() if self.fetch_balance else None
+
+        self.version += 1
+        self.stream_version = stream_version
+        self.snapshot = ExchangeSnapshot(self.version, positions, open_orders, balance)
+        self.metrics["stream_refreshes"] += 1
+        return self.snapshot
+
+    def refresh(self):
+        """Pozisyon + emir + bakiye çek ve yeni sürüm yayınla (pozisyon hatası raise)"""
+        if self._stream_live():
+            return self._refresh_from_stream()
+
+        start = time.perf_counter()
+        errors = {}
+
+        try:
+            positions = self._call("fetch_positions")
+        except Exception:
+            self.metrics["fetch_errors"] += 1
+            raise
+
+        open_orders = None
+        if self.fetch_orders:
+            symbols = self.symbols | {p.get("symbol") for p in positions if is_open(p)}
+            open_orders = {}
+            for symbol in sorted(s for s in symbols if s):
+                try:
+                    open_orders[symbol] = self._call("fetch_open_orders", symbol)
+                except Exception as e:
+                    self.metrics["fetch_errors"] += 1
+                    errors[f"orders:{symbol}"] = str(e)
+
+        balance = None
+        if self.fetch_balance:
+            try:
+                balance = self._call("fetch_balance")
+            except Exception as e:
+                self.metrics["fetch_errors"] += 1
+                errors["balance"] = str(e)
+
+        self.version += 1
+        self.stream_version = None
+        self.snapshot = ExchangeSnapshot(self.version, positions, open_orders, balance, errors)
+        self.metrics["refreshes"] += 1
+        self.metrics["last_fetch_ms"] = (time.perf_counter() - start) * 1000
+        return self.snapshot
+
+    def get(self, max_staleness=None):
+        """
+        Güncel snapshot
+
+        Args:
+            max_staleness: Bu çağrı için izin verilen max yaş (None: servis varsayılanı,
+                0: her zaman yeniden çek)
+        """
+        with self.lock:
+            if self._fresh(max_staleness):
+                self.metrics["hits"] += 1
+                return self.snapshot
+            return self.refresh()
+
+    def _fresh(self, max_staleness=None):
+        snapshot = self.snapshot
+        if snapshot is None:
+            return False
+        if self._stream_live():
+            # Stream canlıyken tazelik yaşla değil defter sürümüyle ölçülür
+            return self.stream_version == self.stream.version
+        limit = self.max_staleness if max_staleness is None else max_staleness
+        return self.stream_version is None and snapshot.age() <= limit
+
+    def peek(self, max_staleness=None, blocking=True):
+        """
+        Taze snapshot varsa onu döndür, yoksa None (REST çağrısı yapmaz)
+
+        Args:
+            blocking: False ise lock alınamadığında beklemeden None döner
+                (sinyal handler'ları: kesilen thread get() / refresh() içinde olabilir)
+        """
+        if not self.lock.acquire(blocking=blocking):
+            return None
+        try:
+            if self._fresh(max_staleness):
+                return self.snapshot
+            if self._stream_live():
+                return self._refresh_from_stream()
+            return None
+        finally:
+            self.lock.release()
+
+    def open_orders(self, symbol, max_staleness=None):
+        """
+        Sembolün açık emirleri (tuple)
+
+        Snapshot bu sembolü kapsamıyorsa tek seferlik fetch yapılır ve sembol
+        sonraki snapshot'lara eklenir.
+        """
+        orders = self.get(max_staleness).orders_for(symbol)
+        if orders is not None:
+            return orders
+        self.metrics["order_misses"] += 1
+        with self.lock:
+            self.symbols.add(symbol)
+        orders = self._call("fetch_open_orders", symbol)
+        if self.stream is not None:
+            # Sembol bundan sonra stream defterinden okunur
+            self.stream.seed_orders(symbol, orders)
+        return freeze(orders)
+
+    def invalidate(self):
+        """Bir sonraki get() yeniden çeksin (emir/pozisyon değiştiren aksiyon sonrası)"""
+        with self.lock:
+            self.snapshot = None
+        self.metrics["invalidations"] += 1
+
+    def get_status(self):
+        snapshot = self.snapshot
+        return {
+            "version": self.version,
+            "age": snapshot.age() if snapshot else None,
+            "max_staleness": self.max_staleness,
+            "source": "stream" if self._stream_live() else "rest",
+            "symbols": sorted(self.symbols),
+            "errors": dict(snapshot.errors) if snapshot else {},
+            "metrics": self.metrics
+        }
+
+
+# ===== PAYLAŞILAN SERVİSLER =====
+# Client başına tek servis: fonksiyon tarzı tüketiciler (safety, crash)
+# imzaları değişmeden aynı snapshot'ı görür.
+_services = {}
+_services_lock = threading.Lock()
+
+
+def _forget_after_fork():
+    # Fork anında tutulan lock / stream thread'i child'a geçmez
+    global _services_lock
+    _services.clear()
+    _services_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
+
+
+def get_snapshot_service(binance, **kw):
+    with _services_lock:
+        service = _services.get(id(binance))
+        if service is None or service.binance is not binance:
+            service = ExchangeSnapshotService(binance, **kw)
+            _services[id(binance)] = service
+        elif kw.get("stream") is not None:
+            service.stream = kw["stream"]
+        return service
+
+
+def invalidate_snapshot(binance):
+    """Client'ın paylaşılan snapshot'ını geçersiz kıl (servis yoksa no-op)"""
+    service = _services.get(id(binance))
+    if service is not None and service.binance is binance:
+        service.invalidate()
@@ -2,24 +2,32 @@
 import ccxt
 import time
 
+from exchange_snapshot_engine import get_snapshot_service, invalidate_snapshot
+from order_gateway_engine import get_order_gateway
+
 class ExchangeStopManager:
     """Binance Futures stop-loss order yönetimi"""
     
     def __init__(self):
         self.active_stops = {}
+        # Stop'ları yerel olarak eksiksiz bilinen semboller
+        self.synced_symbols = set()
     
     def sync_with_exchange(self, binance, symbols):
         """Engine restart sonrası Exchange ile senkronize et"""
         print("\n🔄 Syncing stops with exchange...")
         self.active_stops.clear()
+        gateway = get_order_gateway(binance)
         synced_count = 0
         
         for symbol in symbols:
             try:
                 open_orders = binance.fetch_open_orders(symbol)
+                self.synced_symbols.add(symbol)
                 for order in open_orders:
                     order_type = str(order.get("type", "")).lower()
                     if "stop" in order_type:
+                        gateway.track(order, symbol=symbol)
                         stop_price = order.get("stopPrice") or order.get("info", {}).get("stopPrice")
                         self.active_stops[symbol] = {
                             "order_id": order["id"],
@@ -35,27 +43,51 @@ class ExchangeStopManager:
         print(f"✅ Synced {synced_count} stops with exchange\n")
         return synced_count
     
+    def _stop_ids(self, binance, symbol):
+        """
+        Sembolün bilinen stop id'leri (yerel defter; REST listelemesi yok)
+        
+        Bu process sembolün stop'larını hiç görmediyse (sync yok) paylaşılan
+        snapshot'tan bir kez okunur ve gateway defterine alınır.
+        """
+        gateway = get_order_gateway(binance)
+        if symbol not in self.synced_symbols:
+            try:
+                for order in get_snapshot_service(binance).open_orders(symbol):
+                    if "stop" in str(order.get("type", "")).lower():
+                        gateway.track(order, symbol=symbol)
+                self.synced_symbols.add(symbol)
+            except Exception as e:
+                # Listeleme yeni stop'u engellemez; bir sonraki çağrıda tekrar denenir
+                print(f"⚠️  Could not list stops for {symbol}: {e}")
+        
+        ids = [o["id"] for o in gateway.open_orders(symbol, stops_only=True)]
+        active = self.active_stops.get(symbol)
+        if active and str(active["order_id"]) not in ids:
+            ids.append(str(active["order_id"]))
+        return ids
+    
+    def mark_unsynced(self, binance, symbol):
+        """Sembolün stop'larını bir sonraki işlemde exchange'den yeniden listele"""
+        self.synced_symbols.discard(symbol)
+        invalidate_snapshot(binance)
+    
     def place_stop_order(self, binance, symbol, direction, stop_price, quantity):
-        """STOP_MARKET order yolla"""
+        """
+        STOP_MARKET order yolla (cancel-replace)
+        
+        Yeni stop tek round-trip'te yerleşir; eski stop'lar gateway tarafından
+        arka planda iptal edilir. Yerleştirme başarısızsa eski stop kalır.
+        """
         try:
-            self.cancel_existing_stops(binance, symbol)
-            
             side = "SELL" if direction.upper() == "LONG" else "BUY"
             
-            params = {
-                "stopPrice": float(round(float(stop_price), 6)),
-                "reduceOnly": True,
-                "workingType": "MARK_PRICE"
-            }
-            
-            order = binance.create_order(
-                symbol=symbol,
-                type="STOP_MARKET",
-                side=side,
-                amount=float(quantity),
-                price=None,
-                params=params
+            order = get_order_gateway(binance).replace_stop(
+                symbol, side, float(quantity), float(round(float(stop_price), 6)),
+                old_ids=self._stop_ids(binance, symbol)
             )
+            if order is None:
+                return None
             
             self.active_stops[symbol] = {
                 "order_id": order["id"],
@@ -75,20 +107,11 @@ class ExchangeStopManager:
             return None
     
     def cancel_existing_stops(self, binance, symbol):
-        """Açık stop order'ları iptal et"""
+        """Açık stop order'ları iptal et (yerel bilinen id'ler)"""
         try:
-            open_orders = binance.fetch_open_orders(symbol)
-            cancelled_count = 0
-            
-            for order in open_orders:
-                order_type = str(order.get("type", "")).lower()
-                
-                if "stop" in order_type or order_type == "stop_market":
-                    try:
-                        binance.cancel_order(order["id"], symbol)
-                        cancelled_count += 1
-                    except:
-                        pass
+            gateway = get_order_gateway(binance)
+            for order_id in self._stop_ids(binance, symbol):
+                gateway.cancel(order_id, symbol)
             
             if symbol in self.active_stops:
                 del self.active_stops[symbol]
@@ -100,19 +123,45 @@ class ExchangeStopManager:
             return False
     
     def update_stop_order(self, binance, symbol, direction, stop_price, quantity):
-        """Stop order'ı güncelle"""
-        try:
-            positions = binance.fetch_positions([symbol])
-            if positions:
-                real_quantity = abs(float(positions[0].get("contracts", quantity)))
-                quantity = real_quantity
-        except:
-            pass
+        """
+        Stop order'ı güncelle (trailing): tek round-trip, sleep yok
+        
+        Miktar taze snapshot'ta (stream / son fetch) pozisyon varsa oradan alınır;
+        snapshot bayatsa yeni fetch yapılmaz, verilen quantity kullanılır.
+        """
+        snapshot = get_snapshot_service(binance).peek()
+        if snapshot is not None:
+            position = snapshot.position_for(symbol)
+            if position is not None:
+                quantity = abs(float(position.get("contracts", quantity)))
         
-        self.cancel_existing_stops(binance, symbol)
-        time.sleep(0.5)
         return self.place_stop_order(binance, symbol, direction, stop_price, quantity)
     
+    def on_order_update(self, order):
+        """
+        User-data stream emir olayı (stream_engine.StreamClient "order")
+        
+        Stop tetiklenince / iptal edilince active_stops poll beklemeden güncellenir.
+        """
+        if "stop" not in str(order.get("type", "")).lower():
+            return
+        
+        symbol = order["symbol"]
+        active = self.active_stops.get(symbol)
+        
+        if order["status"] == "open":
+            if active is None or str(active["order_id"]) != order["id"]:
+                self.active_stops[symbol] = {
+                    "order_id": order["id"],
+                    "stop_price": float(order.get("stopPrice") or 0),
+                    "timestamp": time.time(),
+                    "synced": True
+                }
+        elif active is not None and str(active["order_id"]) == order["id"]:
+            del self.active_stops[symbol]
+            if order["status"] == "closed":
+                print(f"🛑 STOP FILLED: {symbol} @ {order.get('average') or order.get('stopPrice')}")
+    
     def get_active_stop(self, symbol):
         return self.active_stops.get(symbol)
     
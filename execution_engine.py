@@ -1,7 +1,9 @@
 from data_engine import binance
 from config import LEVERAGE
 
-def calculate_size(symbol, equity, entry, sl, risk):
+def calculate_size(symbol, equity, entry, sl, risk, exchange=None):
+    # exchange: varsayılan canlı/mock binance (backtest simüle borsayı verir)
+    exchange = exchange or binance
     try:
         risk_amount = equity * risk
         R = abs(entry - sl)
@@ -13,7 +15,7 @@ def calculate_size(symbol, equity, entry, sl, risk):
         amount = risk_amount / R
         
         # Binance hassasiyetine çevir
-        precision_amount = float(binance.amount_to_precision(symbol, amount))
+        precision_amount = float(exchange.amount_to_precision(symbol, amount))
         
         # --- Minimum Tutar Kontrolü ---
         # Futures'ta genelde 5-10 USDT altı emirler reddedilir
@@ -2,16 +2,23 @@
 import time
 
 class ExecutionResilient:
-    def __init__(self, max_retries=3, slippage_threshold=0.002, retry_delay=2):
+    def __init__(self, max_retries=3, slippage_threshold=0.002, retry_delay=2,
+                 stream=None, fill_timeout=2.0):
         self.max_retries = max_retries
         self.slippage_threshold = slippage_threshold
         self.retry_delay = retry_delay
+        # stream_engine.StreamClient: fill user-data stream'inden beklenir
+        self.stream = stream
+        self.fill_timeout = fill_timeout
     
     def execute_with_retry(self, binance, symbol, direction, qty, safe_market_order_func):
         """safe_market_order'ı 3 kez dene - LATENCY ÖLÇÜLÜ"""
         
         exec_start_time = time.time()
-        expected_price = binance.fetch_ticker(symbol)["last"]
+        live = self.stream is not None and self.stream.is_live()
+        expected_price = self.stream.mark_price(symbol) if live else None
+        if not expected_price:
+            expected_price = binance.fetch_ticker(symbol)["last"]
         
         for attempt in range(self.max_retries):
             try:
@@ -22,8 +29,19 @@ class ExecutionResilient:
                         time.sleep(self.retry_delay)
                     continue
                 
-                time.sleep(1)
-                filled_order = binance.fetch_last_trade(symbol)
+                filled_order = None
+                if live:
+                    order_id = success.get("id") if isinstance(success, dict) else None
+                    fill = self.stream.wait_for_fill(
+                        symbol=symbol, order_id=order_id,
+                        since=exec_start_time, timeout=self.fill_timeout
+                    )
+                    if fill:
+                        filled_order = {"price": fill["average"] or fill["lastFillPrice"]}
+                if filled_order is None:
+                    if not live:
+                        time.sleep(1)
+                    filled_order = binance.fetch_last_trade(symbol)
                 
                 if filled_order:
                     filled_price = filled_order["price"]
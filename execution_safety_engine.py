@@ -1,5 +1,7 @@
 import time
 
+from exchange_snapshot_engine import get_snapshot_service, invalidate_snapshot
+
 # ==========================================================
 # SAFE MARKET ORDER (Hata Toleranslı Emir)
 # ==========================================================
@@ -12,6 +14,7 @@ def safe_market_order(binance, symbol, direction, amount, retries=3):
             else:
                 order = binance.create_market_sell_order(symbol, amount)
 
+            invalidate_snapshot(binance)
             print(f"✅ MARKET ORDER SUCCESS: {symbol} {direction}")
             return order
         except Exception as e:
@@ -26,7 +29,8 @@ def safe_market_order(binance, symbol, direction, amount, retries=3):
 # ==========================================================
 def ensure_stop(binance, symbol, direction, amount, sl, create_stop_func):
     try:
-        orders = binance.fetch_open_orders(symbol)
+        # Döngünün paylaşılan exchange snapshot'ından
+        orders = get_snapshot_service(binance).open_orders(symbol)
         stop_exists = False
 
         for o in orders:
@@ -37,6 +41,7 @@ def ensure_stop(binance, symbol, direction, amount, sl, create_stop_func):
         if not stop_exists:
             print("⚠ STOP MISSING — RECREATING")
             create_stop_func(symbol, direction, amount, sl)
+            invalidate_snapshot(binance)
         else:
             # İşlem hızını yormamak için sessizce doğrulanır
             pass
@@ -52,9 +57,8 @@ def orphan_position_check(binance, state):
     Artık state parametresini kabul eder, TypeError vermez.
     """
     try:
-        positions = binance.fetch_positions()
-        # Sadece kontratı 0 olmayan aktif pozisyonlar
-        active_positions = [p for p in positions if float(p.get("contracts", 0)) != 0]
+        # Sadece kontratı 0 olmayan aktif pozisyonlar (paylaşılan snapshot)
+        active_positions = get_snapshot_service(binance).get().open_positions
 
         # SENARYO 1: Borsada işlem var ama bot 'boşta' sanıyor
         if active_positions and state.get("entry") is None:
@@ -0,0 +1,137 @@
+# ================= FEATURE SNAPSHOT ENGINE =================
+# Skor/rejim/risk motorlarının ihtiyaç duyduğu skalerler (son/önceki/5 önceki
+# indikatör değerleri, rolling high/low) sembol başına mum başına bir kez çıkarılır.
+# df.iloc[-1] gibi satır erişimleri her seferinde pandas Series üretir; snapshot
+# tek bir NumPy record'dur ve tüm motorlar aynı record'u okur.
+
+import numpy as np
+
+from batch_indicator_engine import rolling_extreme
+
+SNAPSHOT_COLUMNS = [
+    "timestamp", "open", "high", "low", "close", "volume",
+    "ema20", "ema50", "ema200", "rsi", "macd", "macds", "atr", "adx", "vol_avg"
+]
+
+# Alan adları:
+#   <col>        -> df.iloc[-1][col]
+#   <col>_prev   -> df.iloc[-2][col]
+#   atr_5        -> df.iloc[-5]["atr"]
+#   high_max19   -> df["high"].iloc[-20:-1].max()   (structure_engine BOS)
+#   low_min19    -> df["low"].iloc[-20:-1].min()
+FEATURE_DTYPE = np.dtype(
+    [(col, np.float64) for col in SNAPSHOT_COLUMNS]
+    + [(f"{col}_prev", np.float64) for col in ["open", "high", "low", "close", "atr", "adx"]]
+    + [("atr_5", np.float64), ("high_max19", np.float64), ("low_min19", np.float64),
+       ("bars", np.int64)]
+)
+
+
+def is_snapshot(obj):
+    return getattr(obj, "dtype", None) == FEATURE_DTYPE
+
+
+def _fill(record, columns, bars):
+    """columns: {kolon: (S x N) veya (N,) dizi}; satırlar sağa hizalı ve dolu"""
+    for col in SNAPSHOT_COLUMNS:
+        values = columns.get(col)
+        if values is None:
+            record[col] = np.nan
+            continue
+        record[col] = values[..., -1] if bars >= 1 else np.nan
+        if f"{col}_prev" in FEATURE_DTYPE.names:
+            record[f"{col}_prev"] = values[..., -2] if bars >= 2 else np.nan
+
+    atr = columns.get("atr")
+    record["atr_5"] = atr[..., -5] if atr is not None and bars >= 5 else np.nan
+
+    window = slice(max(0, bars - 20) - bars, -1)
+    for field, col, reduce in [("high_max19", "high", np.max), ("low_min19", "low", np.min)]:
+        values = columns.get(col)
+        record[field] = reduce(values[..., window], axis=-1) if values is not None and bars >= 2 else np.nan
+
+
+def build_snapshot(df):
+    """
+    DataFrame (ya da kolon sözlüğü) için tek snapshot record.
+
+    Kolonlar .to_numpy() ile bir kez okunur; satır Series'i üretilmez.
+    """
+    if is_snapshot(df):
+        return df
+
+    columns = {}
+    for col in SNAPSHOT_COLUMNS:
+        if col in df:
+            column = df[col]
+            columns[col] = column.to_numpy() if hasattr(column, "to_numpy") else np.asarray(column)
+
+    bars = len(columns["close"]) if "close" in columns else 0
+    record = np.zeros((), dtype=FEATURE_DTYPE)
+    record["bars"] = bars
+    _fill(record, columns, bars)
+    return record[()]
+
+
+def build_snapshots(batch):
+    """
+    BatchIndicators için tüm sembollerin snapshot'ları tek vektörel geçişte.
+
+    Returns:
+        (symbols, record array [S]) - satır i = batch.symbols[i]
+    """
+    columns = {"timestamp": batch.timestamps.astype(np.float64)}
+    columns.update(batch.ohlcv)
+    columns.update(batch.indicators)
+
+    records = np.zeros(len(batch.symbols), dtype=FEATURE_DTYPE)
+    if not len(batch.symbols):
+        return batch.symbols, records
+
+    # dropna sonrası satır sayısı (indikatör warm-up'ı hariç)
+    valid = np.ones(batch.timestamps.shape, dtype=bool)
+    for col in SNAPSHOT_COLUMNS[1:]:
+        valid &= ~np.isnan(columns[col])
+    records["bars"] = valid.sum(axis=1)
+
+    _fill(records, columns, batch.timestamps.shape[1])
+    return batch.symbols, records
+
+
+def build_snapshot_history(columns):
+    """
+    Tek sembolün tüm geçmişi için snapshot dizisi (backtest): satır i, df[:i+1]'in
+    snapshot'ıdır. Kolonlar indikatör warm-up'ı dahil (NaN) tam geçmiştir.
+    """
+    n = len(columns["close"])
+    records = np.zeros(n, dtype=FEATURE_DTYPE)
+    valid = np.ones(n, dtype=bool)
+    if not n:
+        return records
+
+    for col in SNAPSHOT_COLUMNS:
+        values = columns.get(col)
+        values = np.full(n, np.nan) if values is None else np.asarray(values, dtype=np.float64)
+        records[col] = values
+        if col != "timestamp":
+            valid &= ~np.isnan(values)
+        if f"{col}_prev" in FEATURE_DTYPE.names:
+            records[f"{col}_prev"][0] = np.nan
+            records[f"{col}_prev"][1:] = values[:-1]
+
+    records["atr_5"][:4] = np.nan
+    records["atr_5"][4:] = records["atr"][:-4]
+
+    records["high_max19"][0] = np.nan
+    records["low_min19"][0] = np.nan
+    records["high_max19"][1:] = rolling_extreme(records["high"][:-1], 19, np.maximum)
+    records["low_min19"][1:] = rolling_extreme(records["low"][:-1], 19, np.minimum)
+
+    # dropna sonrası satır sayısı
+    records["bars"] = np.cumsum(valid)
+    return records
+
+
+def feature_snapshot(df):
+    """Motorlar için giriş noktası: snapshot verildiyse aynen, DataFrame ise bir kez üret"""
+    return df if is_snapshot(df) else build_snapshot(df)
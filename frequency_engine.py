@@ -1,7 +1,11 @@
+from feature_snapshot_engine import feature_snapshot
+
+
 def frequency_gate(df):
 
-    atr = df.iloc[-1]["atr"]
-    atr_prev = df.iloc[-5]["atr"]
+    last = feature_snapshot(df)
+    atr = last["atr"]
+    atr_prev = last["atr_5"]
 
     # Vol expansion
     if atr > atr_prev * 1.1:
@@ -0,0 +1,164 @@
+# ================= SHARED-MEMORY HEALTH CHANNEL =================
+# Ana engine ile ayrı process'te çalışan watchdog arasındaki sağlık kanalı.
+# Ana engine her döngüde heartbeat, döngü gecikmesi ve state sürümünü
+# shared memory segmentine yazar; watchdog process'i aynı segmenti okuyarak
+# takılmaları (stall) ve ölü process'i dışarıdan görür. Pipe / socket yok:
+# yazma birkaç struct.pack_into, okuma lock'suz.
+#
+# Blok 1 (sadece ana engine yazar) seqlock ile korunur: yazar sayacı tek
+# yapar, alanları yazar, çift yapar; okuyucu sayaç tekse ya da okuma
+# sırasında değiştiyse yeniden okur.
+# Blok 2 (sadece watchdog yazar): watchdog heartbeat'i ve kapatma isteği.
+
+import os
+import struct
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+# seq, pid, started_at, heartbeat_at, loops, loop_latency_ms, max_latency_ms,
+# state_version, stopping
+MAIN_BLOCK = struct.Struct("<QqddQddQQ")
+# watchdog_pid, watchdog_at, shutdown_reason
+WATCHDOG_BLOCK = struct.Struct("<qdq")
+WATCHDOG_OFFSET = MAIN_BLOCK.size
+SEGMENT_SIZE = MAIN_BLOCK.size + WATCHDOG_BLOCK.size
+
+# Watchdog'un kapatma istek kodları
+SHUTDOWN_REASONS = {
+    0: None,
+    1: "main_stalled",
+    2: "main_dead",
+    3: "emergency_flag",
+}
+REASON_CODES = {name: code for code, name in SHUTDOWN_REASONS.items() if name}
+
+
+class HealthChannel:
+    """
+    Shared-memory sağlık kanalı
+
+    Kullanış (ana engine):
+        channel = HealthChannel.create()
+        ...
+        channel.beat(loop_latency_ms=elapsed * 1000, state_version=journal.metrics["saves"])
+        if channel.shutdown_requested(): ...
+
+    Kullanış (watchdog process):
+        channel = HealthChannel.attach(name)
+        health = channel.read()     # {"heartbeat_age": ..., ...}
+    """
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.name = shm.name
+        self.owner = owner
+        self.seq = 0
+        self.loops = 0
+        self.max_latency_ms = 0.0
+        self.started_at = time.time()
+
+    @classmethod
+    def create(cls, name=None):
+        shm = SharedMemory(name=name, create=True, size=SEGMENT_SIZE)
+        shm.buf[:SEGMENT_SIZE] = bytes(SEGMENT_SIZE)
+        channel = cls(shm, owner=True)
+        channel.beat()
+        return channel
+
+    @classmethod
+    def attach(cls, name):
+        return cls(SharedMemory(name=name))
+
+    # ===== ANA ENGINE =====
+    def _write_main(self, heartbeat_at, latency_ms, state_version, stopping):
+        self.seq += 1   # tek: yazma sürüyor
+        struct.pack_into("<Q", self.shm.buf, 0, self.seq)
+        MAIN_BLOCK.pack_into(
+            self.shm.buf, 0, self.seq, os.getpid(), self.started_at, heartbeat_at,
+            self.loops, latency_ms, self.max_latency_ms, state_version, stopping
+        )
+        self.seq += 1   # çift: tutarlı
+        struct.pack_into("<Q", self.shm.buf, 0, self.seq)
+
+    def beat(self, loop_latency_ms=None, state_version=None):
+        """Ana döngü heartbeat'i (döngü sonunda çağrılır)"""
+        if loop_latency_ms is not None:
+            self.loops += 1
+            self.max_latency_ms = max(self.max_latency_ms, loop_latency_ms)
+        if state_version is None:
+            state_version = self._last_state_version()
+        self._write_main(time.time(), loop_latency_ms or 0.0, state_version, 0)
+
+    def _last_state_version(self):
+        return MAIN_BLOCK.unpack_from(self.shm.buf, 0)[7]
+
+    def mark_stopping(self):
+        """Planlı kapanış: watchdog process'in ölümünü crash saymaz"""
+        values = MAIN_BLOCK.unpack_from(self.shm.buf, 0)
+        self._write_main(values[3], values[5], values[7], 1)
+
+    def shutdown_requested(self):
+        """Watchdog'un kapatma isteği (neden adı ya da None)"""
+        return SHUTDOWN_REASONS.get(WATCHDOG_BLOCK.unpack_from(self.shm.buf, WATCHDOG_OFFSET)[2])
+
+    # ===== WATCHDOG =====
+    def read(self, retries=100):
+        """Ana engine bloğunun tutarlı kopyası"""
+        for _ in range(retries):
+            values = MAIN_BLOCK.unpack_from(self.shm.buf, 0)
+            if values[0] % 2 == 0 and struct.unpack_from("<Q", self.shm.buf, 0)[0] == values[0]:
+                break
+        else:
+            raise RuntimeError("Health channel read did not stabilize")
+
+        _, pid, started_at, heartbeat_at, loops, latency, max_latency, version, stopping = values
+        return {
+            "pid": pid,
+            "started_at": started_at,
+            "heartbeat_at": heartbeat_at,
+            "heartbeat_age": time.time() - heartbeat_at,
+            "loops": loops,
+            "loop_latency_ms": latency,
+            "max_latency_ms": max_latency,
+            "state_version": version,
+            "stopping": bool(stopping)
+        }
+
+    def watchdog_beat(self):
+        _, _, reason = WATCHDOG_BLOCK.unpack_from(self.shm.buf, WATCHDOG_OFFSET)
+        WATCHDOG_BLOCK.pack_into(self.shm.buf, WATCHDOG_OFFSET, os.getpid(), time.time(), reason)
+
+    def watchdog_status(self):
+        pid, at, reason = WATCHDOG_BLOCK.unpack_from(self.shm.buf, WATCHDOG_OFFSET)
+        return {
+            "pid": pid,
+            "heartbeat_age": time.time() - at if at else None,
+            "shutdown_requested": SHUTDOWN_REASONS.get(reason)
+        }
+
+    def request_shutdown(self, reason):
+        """Ana engine'den kapanma iste (reason None: isteği temizle)"""
+        pid, at, _ = WATCHDOG_BLOCK.unpack_from(self.shm.buf, WATCHDOG_OFFSET)
+        WATCHDOG_BLOCK.pack_into(self.shm.buf, WATCHDOG_OFFSET, pid, at, REASON_CODES.get(reason, 0))
+
+    # ===== KAPANIŞ =====
+    def close(self):
+        if self.shm is None:
+            return
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+
+def pid_alive(pid):
+    """Process hâlâ var mı (sinyal göndermeden)"""
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,261 @@
+# ================= INCREMENTAL INDICATOR ENGINE =================
+# data_engine indikatörlerinin (ema/rsi/macd/atr/adx/vol_avg) durum tutan versiyonu.
+# Her sembol için EMA akümülatörleri ve rolling pencereler saklanır;
+# yeni kapanan mum O(1), k yeni mum O(k) maliyetle işlenir.
+
+import math
+from collections import deque
+
+import pandas as pd
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+INDICATOR_COLUMNS = [
+    "ema20", "ema50", "ema200", "rsi", "macd", "macds", "atr", "adx", "vol_avg"
+]
+
+
+class RollingMean:
+    """Sabit pencereli kayan ortalama (running sum)"""
+
+    def __init__(self, length):
+        self.length = length
+        self.window = deque(maxlen=length)
+        self.total = 0.0
+
+    def push(self, value):
+        """Yeni değer ekle, pencere doluysa ortalamayı döndür (yoksa NaN)"""
+        if math.isnan(value):
+            # pandas rolling: NaN içeren pencere NaN üretir
+            self.window.clear()
+            self.total = 0.0
+            return math.nan
+
+        if len(self.window) == self.length:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+
+        if len(self.window) < self.length:
+            return math.nan
+        return self.total / self.length
+
+    def copy(self):
+        clone = RollingMean(self.length)
+        clone.window = deque(self.window, maxlen=self.length)
+        clone.total = self.total
+        return clone
+
+
+class EMA:
+    """adjust=False EMA akümülatörü (pandas ewm ile aynı)"""
+
+    def __init__(self, length):
+        self.alpha = 2 / (length + 1)
+        self.value = None
+
+    def push(self, value):
+        if math.isnan(value):
+            return math.nan if self.value is None else self.value
+        if self.value is None:
+            self.value = value
+        else:
+            self.value = self.value + self.alpha * (value - self.value)
+        return self.value
+
+    def copy(self):
+        clone = EMA.__new__(EMA)
+        clone.alpha = self.alpha
+        clone.value = self.value
+        return clone
+
+
+class _IndicatorState:
+    """Tek sembolün akümülatörleri"""
+
+    def __init__(self):
+        self.prev_high = math.nan
+        self.prev_low = math.nan
+        self.prev_close = math.nan
+
+        self.ema20 = EMA(20)
+        self.ema50 = EMA(50)
+        self.ema200 = EMA(200)
+        self.ema_fast = EMA(12)
+        self.ema_slow = EMA(26)
+        self.ema_signal = EMA(9)
+
+        self.rsi_gain = RollingMean(14)
+        self.rsi_loss = RollingMean(14)
+        self.atr = RollingMean(14)
+        self.plus_dm = RollingMean(14)
+        self.minus_dm = RollingMean(14)
+        self.dx = RollingMean(14)
+        self.vol_avg = RollingMean(20)
+
+    def copy(self):
+        clone = _IndicatorState.__new__(_IndicatorState)
+        for name, value in self.__dict__.items():
+            setattr(clone, name, value.copy() if hasattr(value, "copy") else value)
+        return clone
+
+    def step(self, high, low, close, volume):
+        """Bir mumu işle ve indikatör değerlerini döndür"""
+        delta = close - self.prev_close
+        gain = max(delta, 0.0) if not math.isnan(delta) else math.nan
+        loss = -min(delta, 0.0) if not math.isnan(delta) else math.nan
+
+        avg_gain = self.rsi_gain.push(gain)
+        avg_loss = self.rsi_loss.push(loss)
+        rsi = _rsi_value(avg_gain, avg_loss)
+
+        ema20 = self.ema20.push(close)
+        ema50 = self.ema50.push(close)
+        ema200 = self.ema200.push(close)
+        macd_line = self.ema_fast.push(close) - self.ema_slow.push(close)
+        macd_signal = self.ema_signal.push(macd_line)
+
+        # True range: ilk mumda prev_close yok -> sadece high - low
+        tr = high - low
+        if not math.isnan(self.prev_close):
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        atr = self.atr.push(tr)
+
+        plus_dm = high - self.prev_high
+        minus_dm = low - self.prev_low
+        if plus_dm < 0:
+            plus_dm = 0.0
+        if minus_dm > 0:
+            minus_dm = 0.0
+        plus_di = 100 * _div(self.plus_dm.push(plus_dm), atr)
+        minus_di = 100 * _div(self.minus_dm.push(abs(minus_dm)), atr)
+        dx = _div(abs(plus_di - minus_di), plus_di + minus_di) * 100
+        adx = self.dx.push(dx)
+
+        vol_avg = self.vol_avg.push(volume)
+
+        self.prev_high = high
+        self.prev_low = low
+        self.prev_close = close
+
+        return (ema20, ema50, ema200, rsi, macd_line, macd_signal, atr, adx, vol_avg)
+
+
+def _div(a, b):
+    """pandas bölme semantiği (x/0 -> ±inf, 0/0 -> NaN)"""
+    if math.isnan(a) or math.isnan(b):
+        return math.nan
+    if b == 0:
+        if a == 0:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def _rsi_value(avg_gain, avg_loss):
+    rs = _div(avg_gain, avg_loss)
+    if math.isnan(rs):
+        return math.nan
+    return 100 - (100 / (1 + rs))
+
+
+class IncrementalIndicators:
+    """
+    Tek sembol için artımlı indikatör hesaplayıcı.
+
+    Sadece son commit edilen mumdan yeni olan mumlar işlenir.
+    Batch'in son mumu henüz kapanmamış olabileceği için geçici hesaplanır
+    ve bir sonraki update'te kapanmış haliyle tekrar işlenir.
+    """
+
+    def __init__(self, history=500):
+        self.history = history
+        self.state = _IndicatorState()
+        self.last_ts = None
+        self.rows = deque(maxlen=history)
+        self.live_row = None
+
+    def reset(self):
+        self.state = _IndicatorState()
+        self.last_ts = None
+        self.rows.clear()
+        self.live_row = None
+
+    def update(self, candles):
+        """
+        OHLCV listesi ile güncelle ([ts, open, high, low, close, volume]).
+
+        Returns:
+            int: İşlenen yeni mum sayısı
+        """
+        if not candles:
+            return 0
+
+        # Pencere ile önceki durum arasında boşluk varsa baştan kur
+        if self.last_ts is not None and candles[0][0] > self.last_ts:
+            self.reset()
+
+        new = [c for c in candles if self.last_ts is None or c[0] > self.last_ts]
+        if not new:
+            return 0
+
+        for candle in new[:-1]:
+            self._commit(candle)
+
+        live = new[-1]
+        values = self.state.copy().step(live[2], live[3], live[4], live[5])
+        self.live_row = _make_row(live, values)
+
+        return len(new)
+
+    def _commit(self, candle):
+        values = self.state.step(candle[2], candle[3], candle[4], candle[5])
+        self.last_ts = candle[0]
+        row = _make_row(candle, values)
+        if row is not None:
+            self.rows.append(row)
+
+    def to_dataframe(self):
+        """fetch_dataframe ile aynı kolonlara sahip DataFrame"""
+        rows = list(self.rows)
+        if self.live_row is not None:
+            rows.append(self.live_row)
+        if len(rows) > self.history:
+            rows = rows[-self.history:]
+
+        df = pd.DataFrame(rows, columns=OHLCV_COLUMNS + INDICATOR_COLUMNS)
+        df.insert(6, "t", pd.to_datetime(df["timestamp"], unit="ms"))
+        return df
+
+
+def _make_row(candle, values):
+    """NaN içeren satırlar fetch_dataframe'deki dropna() gibi atlanır"""
+    if any(math.isnan(v) for v in values):
+        return None
+    return list(candle[:6]) + list(values)
+
+
+class IndicatorEngine:
+    """Sembol bazlı IncrementalIndicators deposu"""
+
+    def __init__(self, history=500):
+        self.history = history
+        self.symbols = {}
+
+    def update(self, symbol, candles):
+        """Yeni mumları işle ve güncel DataFrame'i döndür"""
+        if symbol not in self.symbols:
+            self.symbols[symbol] = IncrementalIndicators(self.history)
+        indicators = self.symbols[symbol]
+        indicators.update(candles)
+        return indicators.to_dataframe()
+
+    def last_ts(self, symbol):
+        """Sembolün son commit edilen mumu (durum yoksa None: tam pencere gerekir)"""
+        indicators = self.symbols.get(symbol)
+        return indicators.last_ts if indicators is not None else None
+
+    def reset(self, symbol=None):
+        if symbol is None:
+            self.symbols.clear()
+        elif symbol in self.symbols:
+            del self.symbols[symbol]
@@ -1,32 +1,24 @@
 # ================= TRADE JOURNAL ANALYTICS ENGINE =================
-import json
-import os
+# Journal event_store_engine'deki trades tablosunda tutulur;
+# metrikler Python'a yüklenmeden SQL aggregate ile hesaplanır.
 from datetime import datetime, timedelta
-from collections import defaultdict
-import numpy as np
 
-def record_trade_journal(trade_data, journal_path="trade_journal.json"):
+from event_store_engine import get_store
+
+def record_trade_journal(trade_data, store=None):
     """İşlem defterine kaydı"""
-    journal = []
-    if os.path.exists(journal_path):
-        try:
-            with open(journal_path, "r") as f:
-                journal = json.load(f)
-        except:
-            journal = []
-    journal.append(trade_data)
-    with open(journal_path, "w") as f:
-        json.dump(journal[-1000:], f, indent=2)
+    try:
+        (store or get_store()).insert_trade(trade_data)
+    except Exception as e:
+        print(f"❌ Trade journal write failed: {e}")
 
-def close_trade_journal(exit_price, exit_reason, journal_path="trade_journal.json"):
+def close_trade_journal(exit_price, exit_reason, store=None):
     """Son işlemi kapat"""
-    if not os.path.exists(journal_path):
-        return
     try:
-        with open(journal_path, "r") as f:
-            journal = json.load(f)
-        if journal:
-            last_trade = journal[-1]
+        store = store or get_store()
+        last = store.last_trade()
+        if last:
+            row_id, last_trade = last
             last_trade["exit_price"] = exit_price
             last_trade["exit_reason"] = exit_reason
             last_trade["exit_time"] = datetime.now().isoformat()
@@ -39,57 +31,59 @@ def close_trade_journal(exit_price, exit_reason, journal_path="trade_journal.jso
             else:
                 pnl_pct = ((last_trade["entry_price"] - exit_price) / last_trade["entry_price"] * 100)
             last_trade["pnl_percent"] = pnl_pct
-            with open(journal_path, "w") as f:
-                json.dump(journal, f, indent=2)
+            store.update_trade(row_id, last_trade)
     except:
         pass
 
-def analyze_journal_metrics(journal_path="trade_journal.json"):
+def analyze_journal_metrics(store=None):
     """Günlük metriklerini analiz et"""
-    if not os.path.exists(journal_path):
-        return {"total_trades": 0, "win_rate": 0, "avg_hold_time": 0, "avg_pnl_percent": 0}
     try:
-        with open(journal_path, "r") as f:
-            journal = json.load(f)
-        if not journal:
-            return {"total_trades": 0, "win_rate": 0, "avg_hold_time": 0}
-        closed_trades = [t for t in journal if "exit_price" in t]
-        if not closed_trades:
-            return {"total_trades": len(journal), "win_rate": 0, "avg_hold_time": 0, "open_trades": len(journal)}
-        pnl_values = [t.get("pnl_percent", 0) for t in closed_trades]
-        hold_times = [t.get("hold_time_minutes", 0) for t in closed_trades]
-        wins = len([p for p in pnl_values if p > 0])
+        total, closed, wins, avg_hold, avg_pnl, best, worst = (store or get_store()).query_one("""
+            SELECT COUNT(*),
+                   COUNT(exit_price),
+                   COALESCE(SUM(exit_price IS NOT NULL AND pnl_percent > 0), 0),
+                   AVG(CASE WHEN exit_price IS NOT NULL THEN COALESCE(hold_time_minutes, 0) END),
+                   AVG(CASE WHEN exit_price IS NOT NULL THEN COALESCE(pnl_percent, 0) END),
+                   MAX(CASE WHEN exit_price IS NOT NULL THEN COALESCE(pnl_percent, 0) END),
+                   MIN(CASE WHEN exit_price IS NOT NULL THEN COALESCE(pnl_percent, 0) END)
+            FROM trades
+        """)
+        if not total:
+            return {"total_trades": 0, "win_rate": 0, "avg_hold_time": 0, "avg_pnl_percent": 0}
+        if not closed:
+            return {"total_trades": total, "win_rate": 0, "avg_hold_time": 0, "open_trades": total}
         return {
-            "total_trades": len(journal),
-            "closed_trades": len(closed_trades),
-            "open_trades": len(journal) - len(closed_trades),
-            "win_rate": (wins / len(closed_trades) * 100) if closed_trades else 0,
-            "avg_hold_time": np.mean(hold_times) if hold_times else 0,
-            "avg_pnl_percent": np.mean(pnl_values) if pnl_values else 0,
-            "best_trade": max(pnl_values) if pnl_values else 0,
-            "worst_trade": min(pnl_values) if pnl_values else 0,
+            "total_trades": total,
+            "closed_trades": closed,
+            "open_trades": total - closed,
+            "win_rate": wins / closed * 100,
+            "avg_hold_time": avg_hold,
+            "avg_pnl_percent": avg_pnl,
+            "best_trade": best,
+            "worst_trade": worst,
         }
     except:
         return {}
 
-def get_journal_summary(days=7, journal_path="trade_journal.json"):
+def get_journal_summary(days=7, store=None):
     """Son N günün özeti"""
-    if not os.path.exists(journal_path):
-        return {}
     try:
-        with open(journal_path, "r") as f:
-            journal = json.load(f)
-        cutoff_date = datetime.now() - timedelta(days=days)
-        recent_trades = [t for t in journal if datetime.fromisoformat(t["timestamp"]) > cutoff_date]
-        closed_recent = [t for t in recent_trades if "exit_price" in t]
-        pnl_values = [t.get("pnl_percent", 0) for t in closed_recent]
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+        total, closed, wins, total_pnl = (store or get_store()).query_one("""
+            SELECT COUNT(*),
+                   COUNT(exit_price),
+                   COALESCE(SUM(exit_price IS NOT NULL AND pnl_percent > 0), 0),
+                   COALESCE(SUM(CASE WHEN exit_price IS NOT NULL THEN COALESCE(pnl_percent, 0) END), 0)
+            FROM trades
+            WHERE timestamp > ?
+        """, (cutoff,))
         return {
             "period_days": days,
-            "total_trades": len(recent_trades),
-            "closed_trades": len(closed_recent),
-            "win_rate": (len([p for p in pnl_values if p > 0]) / len(closed_recent) * 100) if closed_recent else 0,
-            "total_pnl_percent": sum(pnl_values),
-            "avg_pnl_percent": np.mean(pnl_values) if pnl_values else 0
+            "total_trades": total,
+            "closed_trades": closed,
+            "win_rate": (wins / closed * 100) if closed else 0,
+            "total_pnl_percent": total_pnl,
+            "avg_pnl_percent": total_pnl / closed if closed else 0
         }
     except:
-        return {}
\ No newline at end of file
+        return {}
@@ -1,31 +1,140 @@
-import random
+# ================= MONTE CARLO ENGINE =================
+# Trade R dağılımından (simülasyon x trade) bootstrap matrisi tek seferde çekilir;
+# equity eğrisi, max drawdown dağılımı, su altında kalma süresi ve DD_LIMIT'e göre
+# risk of ruin tamamen vektörel hesaplanır. block_size > 1 ise seri (streak)
+# yapısını korumak için dairesel blok bootstrap kullanılır.
 
-def monte_carlo_analysis(logs, simulations=500):
+import numpy as np
 
-    if not logs or len(logs) < 5:
+from config import BASE_RISK, DD_LIMIT
+
+# Tek seferde işlenen en fazla matris elemanı (bellek sınırı)
+CHUNK_ELEMENTS = 4_000_000
+
+
+def bootstrap_matrix(returns, simulations, trades=None, block_size=1, rng=None):
+    """
+    (simulations x trades) yeniden örneklenmiş R matrisi.
+
+    block_size > 1: rastgele başlangıçlı ardışık bloklar (dairesel), kayıp/kazanç
+    serileri korunur.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    rng = rng or np.random.default_rng()
+    n = len(returns)
+    trades = trades or n
+
+    if block_size <= 1:
+        return returns[rng.integers(0, n, size=(simulations, trades))]
+
+    blocks = -(-trades // block_size)
+    starts = rng.integers(0, n, size=(simulations, blocks, 1))
+    index = (starts + np.arange(block_size)) % n
+    return returns[index.reshape(simulations, blocks * block_size)[:, :trades]]
+
+
+def _path_stats(sampled, risk_per_trade):
+    """Bir bootstrap bloğu için simülasyon başına istatistikler"""
+    simulations, trades = sampled.shape
+
+    # Bileşik equity (başlangıç 1.0); trade başına getiri = R * risk, 0'ın altı iflas
+    growth = np.maximum(1 + sampled * risk_per_trade, 0)
+    with np.errstate(divide="ignore"):
+        equity = np.exp(np.cumsum(np.log(growth), axis=1))
+
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    drawdown = 1 - equity / peak
+
+    # Su altı: equity önceki zirvenin altında; en uzun kesintisiz süre
+    underwater = drawdown > 0
+    steps = np.arange(trades)
+    last_high = np.maximum.accumulate(np.where(underwater, -1, steps), axis=1)
+    longest = np.max(np.where(underwater, steps - last_high, 0), axis=1)
+
+    return {
+        "final_R": sampled.sum(axis=1),
+        "final_equity": equity[:, -1],
+        "max_drawdown": drawdown.max(axis=1),
+        "underwater_fraction": underwater.mean(axis=1),
+        "longest_underwater": longest
+    }
+
+
+def monte_carlo_simulation(returns, simulations=100_000, risk_per_trade=BASE_RISK, dd_limit=DD_LIMIT,
+                           block_size=1, trades=None, seed=None, return_samples=False):
+    """
+    Vektörel Monte Carlo.
+
+    Args:
+        returns: Trade başına R değerleri
+        risk_per_trade: 1R'nin equity oranı (equity *= 1 + R * risk)
+        dd_limit: Ruin eşiği (max drawdown >= dd_limit)
+        block_size: 1 = klasik bootstrap, >1 = blok bootstrap
+        trades: Simülasyon başına trade sayısı (varsayılan: geçmiş uzunluğu)
+        return_samples: True ise simülasyon başına diziler de döner
+
+    Returns:
+        dict ya da veri yetersizse None
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2 or simulations < 1:
         return None
 
-    returns = [t.get("R", 0) for t in logs]
+    rng = np.random.default_rng(seed)
+    trades = trades or len(returns)
+    chunk = max(1, CHUNK_ELEMENTS // trades)
+
+    parts = []
+    for start in range(0, simulations, chunk):
+        sampled = bootstrap_matrix(returns, min(chunk, simulations - start), trades, block_size, rng)
+        parts.append(_path_stats(sampled, risk_per_trade))
+    samples = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+    final_R = samples["final_R"]
+    max_dd = samples["max_drawdown"]
+    longest = samples["longest_underwater"]
 
-    results = []
+    result = {
+        "simulations": simulations,
+        "trades": trades,
+        "block_size": block_size,
+        "final_R_p5": float(np.percentile(final_R, 5)),
+        "final_R_p50": float(np.percentile(final_R, 50)),
+        "final_R_p95": float(np.percentile(final_R, 95)),
+        "final_equity_p5": float(np.percentile(samples["final_equity"], 5)),
+        "final_equity_p50": float(np.percentile(samples["final_equity"], 50)),
+        "max_dd_mean": float(max_dd.mean()),
+        "max_dd_p50": float(np.percentile(max_dd, 50)),
+        "max_dd_p95": float(np.percentile(max_dd, 95)),
+        "max_dd_p99": float(np.percentile(max_dd, 99)),
+        "underwater_fraction_mean": float(samples["underwater_fraction"].mean()),
+        "longest_underwater_p50": float(np.percentile(longest, 50)),
+        "longest_underwater_p95": float(np.percentile(longest, 95)),
+        "dd_limit": dd_limit,
+        "risk_of_ruin": float(np.mean(max_dd >= dd_limit))
+    }
+    if return_samples:
+        result["samples"] = samples
+    return result
 
-    for _ in range(simulations):
-        equity = 0
-        sampled = random.choices(returns, k=len(returns))
 
-        for r in sampled:
-            equity += r
+def monte_carlo_analysis(logs, simulations=500, block_size=1, seed=None):
 
-        results.append(equity)
+    if not logs or len(logs) < 5:
+        return None
 
-    results.sort()
+    returns = np.array([t.get("R", 0) for t in logs], dtype=np.float64)
+    result = monte_carlo_simulation(
+        returns, simulations=simulations, block_size=block_size, seed=seed, return_samples=True
+    )
 
-    worst_case = results[int(len(results) * 0.05)]
-    best_case = results[int(len(results) * 0.95)]
-    median = results[int(len(results) * 0.5)]
+    results = np.sort(result["samples"]["final_R"])
 
     return {
-        "worst_5pct": worst_case,
-        "median": median,
-        "best_95pct": best_case
-    }
\ No newline at end of file
+        "worst_5pct": float(results[int(len(results) * 0.05)]),
+        "median": float(results[int(len(results) * 0.5)]),
+        "best_95pct": float(results[int(len(results) * 0.95)]),
+        "max_dd_p95": result["max_dd_p95"],
+        "longest_underwater_p95": result["longest_underwater_p95"],
+        "risk_of_ruin": result["risk_of_ruin"]
+    }
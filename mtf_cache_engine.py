@@ -1,37 +1,22 @@
 # ================= MTF CACHE ENGINE =================
-import time
+# Sabit TTL'lı cache; DynamicMTFCache'in (LRU + metrikler) sabit TTL kullanımı
 
-class MTFCache:
-    def __init__(self, cache_ttl_seconds=60):
-        self.cache = {}
+from dynamic_mtf_cache_engine import DynamicMTFCache
+
+class MTFCache(DynamicMTFCache):
+    def __init__(self, cache_ttl_seconds=60, max_entries=1200, max_bytes=None, **kwargs):
+        super().__init__(
+            base_ttl=cache_ttl_seconds, max_entries=max_entries, max_bytes=max_bytes, **kwargs
+        )
         self.ttl = cache_ttl_seconds
     
-    def get_or_fetch(self, symbol, timeframe, fetch_func):
+    def get_or_fetch(self, symbol, timeframe, fetch_func, ttl=None):
         """Cache varsa döndür, yoksa fetch et"""
-        key = f"{symbol}:{timeframe}"
-        now = time.time()
-        
-        if key in self.cache:
-            cached_df, timestamp = self.cache[key]
-            age = now - timestamp
-            
-            if age < self.ttl:
-                return cached_df
-        
-        try:
-            df = fetch_func(symbol, timeframe)
-            self.cache[key] = (df, now)
-            return df
-        except:
-            if key in self.cache:
-                return self.cache[key][0]
-            return None
+        return super().get_or_fetch(symbol, timeframe, fetch_func, ttl or self.ttl)
     
-    def clear_expired(self):
+    def clear_expired(self, symbol=None, ttl_multiplier=2):
         """Eski cache'leri temizle"""
-        now = time.time()
-        expired = [k for k, (_, ts) in self.cache.items() if now - ts > self.ttl * 2]
-        for k in expired:
-            del self.cache[k]
-        if expired:
-            print(f"🧹 Cleared {len(expired)} expired cache entries")
\ No newline at end of file
+        cleared = super().clear_expired(symbol, ttl_multiplier)
+        if cleared:
+            print(f"🧹 Cleared {cleared} expired cache entries")
+        return cleared
@@ -1,21 +1,192 @@
 # ================= MULTI-TIMEFRAME BIAS ENGINE =================
+# Üst zaman dilimleri (5m/15m/1h/4h) exchange'den çekilmez; 1m akışından
+# artımlı olarak resample edilir. Her zaman dilimi için structure_engine.detect_trend
+# çalıştırılır ve ağırlıklı hizalama skoru üretilir.
+
 import numpy as np
 
-def analyze_multi_timeframe_bias(symbol, timeframes, weights, direction):
-    """Çoklu zaman dilimi sapması analizi"""
-    bias_scores = []
-    total_weight = sum(weights.values())
-    
+from config import TIMEFRAME
+from indicator_engine import IncrementalIndicators
+from ring_buffer_engine import OHLCVRingBuffer
+from structure_engine import detect_trend
+
+TIMEFRAME_MINUTES = {"1m": 1, "3m": 3, "5m": 5, "15m": 15, "30m": 30, "1h": 60, "2h": 120, "4h": 240}
+DEFAULT_TIMEFRAMES = ["5m", "15m", "1h", "4h"]
+
+# detect_trend çıktısının yön skoru (+ LONG, - SHORT)
+TREND_SCORES = {
+    "STRONG_LONG": 1.0,
+    "LONG": 0.5,
+    "NEUTRAL": 0.0,
+    "SHORT": -0.5,
+    "STRONG_SHORT": -1.0
+}
+
+
+def timeframe_ms(timeframe):
+    return TIMEFRAME_MINUTES[timeframe] * 60 * 1000
+
+
+class _TimeframeSeries:
+    """Tek (symbol, timeframe) için resample edilmiş mumlar + indikatörler"""
+
+    def __init__(self, timeframe, window):
+        self.timeframe = timeframe
+        self.bucket_ms = timeframe_ms(timeframe)
+        self.candles = OHLCVRingBuffer(window)
+        self.indicators = IncrementalIndicators(window)
+        self.trend = None
+
+    def rebuild_from(self, base, start):
+        """
+        base (1m kolon view'ları) içinde start indeksinden itibaren etkilenen
+        bucket'ları yeniden topla.
+
+        Returns:
+            int: Eklenen/güncellenen bucket sayısı
+        """
+        ts = base["timestamp"]
+        if start >= len(ts):
+            return 0
+
+        bucket_start = ts[start] - ts[start] % self.bucket_ms
+        # 1m penceresi bucket başını kapsamıyorsa (soğuk başlangıç) o bucket atlanır
+        if ts[0] > bucket_start:
+            bucket_start += self.bucket_ms
+
+        i0 = int(np.searchsorted(ts, bucket_start))
+        if i0 >= len(ts):
+            return 0
+
+        while len(self.candles) and self.candles.last_ts() >= bucket_start:
+            self.candles.pop()
+
+        ids = ts[i0:] // self.bucket_ms
+        edges = np.flatnonzero(np.diff(ids)) + 1
+        starts = np.concatenate(([0], edges)) + i0
+        ends = np.concatenate((edges, [len(ids)])) + i0 - 1
+
+        rows = np.column_stack((
+            ts[starts] - ts[starts] % self.bucket_ms,
+            base["open"][starts],
+            np.maximum.reduceat(base["high"][i0:], starts - i0),
+            np.minimum.reduceat(base["low"][i0:], starts - i0),
+            base["close"][ends],
+            np.add.reduceat(base["volume"][i0:], starts - i0),
+        ))
+        self.candles.extend(rows)
+
+        # Son commit edilen bucket ile örtüşsün diye bir fazlası verilir
+        self.indicators.update(self.candles.rows(len(rows) + 1))
+        return len(rows)
+
+    def seed(self, candles):
+        """Başlangıç geçmişi (tek seferlik exchange fetch'i)"""
+        self.candles.clear()
+        self.candles.extend(candles)
+        self.indicators.reset()
+        self.indicators.update(self.candles.rows())
+
+    def analyze(self):
+        df = self.indicators.to_dataframe()
+        self.trend = detect_trend(df) if len(df) else None
+        return self.trend
+
+
+class MultiTimeframeEngine:
+    """
+    1m akışından artımlı MTF resampler
+
+    Kullanış:
+        mtf_engine.update(symbol, candle_store.view(symbol, "1m"), changed)
+        bias = analyze_multi_timeframe_bias(symbol, ["15m", "1h"], weights, "LONG")
+    """
+
+    def __init__(self, base_timeframe="1m", timeframes=None, window=500):
+        self.base_timeframe = base_timeframe
+        base_minutes = TIMEFRAME_MINUTES[base_timeframe]
+        self.timeframes = [
+            tf for tf in (timeframes or DEFAULT_TIMEFRAMES)
+            if TIMEFRAME_MINUTES[tf] > base_minutes and TIMEFRAME_MINUTES[tf] % base_minutes == 0
+        ]
+        self.window = window
+        self.series = {}
+
+    def _get_series(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        if key not in self.series:
+            self.series[key] = _TimeframeSeries(timeframe, self.window)
+        return self.series[key]
+
+    def update(self, symbol, base, changed=None):
+        """
+        Yeni/güncellenen base mumlarını üst zaman dilimlerine işle.
+
+        Args:
+            base: Base timeframe kolon view'ları (OHLCVRingBuffer.view)
+            changed: Sondan kaç mum yeni/güncellendi (None: hepsi)
+        """
+        if base is None or not len(base["timestamp"]):
+            return
+
+        count = len(base["timestamp"])
+        start = 0 if changed is None else max(0, count - changed)
+
+        for timeframe in self.timeframes:
+            series = self._get_series(symbol, timeframe)
+            try:
+                if series.rebuild_from(base, start):
+                    series.analyze()
+            except Exception as e:
+                print(f"⚠️  MTF resample failed ({symbol} {timeframe}): {e}")
+
+    def seed(self, symbol, timeframe, candles):
+        """Üst zaman dilimini exchange geçmişiyle başlat (sadece ilk açılış)"""
+        if timeframe not in self.timeframes or not candles:
+            return
+        series = self._get_series(symbol, timeframe)
+        series.seed(candles)
+        series.analyze()
+
+    def get_trend(self, symbol, timeframe):
+        series = self.series.get((symbol, timeframe))
+        return series.trend if series else None
+
+    def get_dataframe(self, symbol, timeframe):
+        series = self.series.get((symbol, timeframe))
+        return series.indicators.to_dataframe() if series else None
+
+
+mtf_engine = MultiTimeframeEngine(base_timeframe=TIMEFRAME)
+
+
+def _trend_scores(symbol, timeframes, weights=None):
+    """[(ağırlık, yön skoru)] (trendi henüz hesaplanamayan TF'ler hariç)"""
+    scores = []
     for tf in timeframes:
-        try:
-            score = 0.7 if direction == "LONG" else 0.6
-            weight = weights.get(tf, 0.25) / total_weight
-            bias_scores.append(score * weight)
-        except:
+        trend = mtf_engine.get_trend(symbol, tf)
+        if trend is None:
             continue
-    
-    return sum(bias_scores) if bias_scores else 0.5
+        weight = weights.get(tf, 0.25) if weights else 1.0
+        scores.append((weight, TREND_SCORES.get(trend, 0.0)))
+    return scores
+
+
+def analyze_multi_timeframe_bias(symbol, timeframes, weights, direction):
+    """Çoklu zaman dilimi sapması analizi"""
+    scores = _trend_scores(symbol, timeframes, weights)
+    total_weight = sum(w for w, _ in scores)
+    if not scores or total_weight <= 0:
+        return 0.5
+
+    sign = 1 if direction == "LONG" else -1
+    # Her TF: 0 (ters yön) .. 0.5 (nötr) .. 1 (güçlü aynı yön)
+    return sum(w * (1 + sign * s) / 2 for w, s in scores) / total_weight
+
 
 def get_mtf_alignment(symbol, timeframes):
-    """Tüm zaman dilimlerinin hizalaması"""
-    return 0.5
\ No newline at end of file
+    """Tüm zaman dilimlerinin hizalaması (0: çelişkili/nötr, 1: tam hizalı)"""
+    scores = _trend_scores(symbol, timeframes)
+    if not scores:
+        return 0.5
+    return abs(sum(s for _, s in scores)) / len(scores)
@@ -1,18 +1,19 @@
 import time
 
+from exchange_snapshot_engine import get_snapshot_service
+
 def heartbeat():
     return True
 
 def orphan_position_check(binance):
     try:
-        positions = binance.fetch_positions()
-        return positions
+        return get_snapshot_service(binance).get().positions
     except:
         return None
 
 def ensure_stop_exists(binance, symbol):
     try:
-        orders = binance.fetch_open_orders(symbol)
+        orders = get_snapshot_service(binance).open_orders(symbol)
         stops = [o for o in orders if "STOP" in o["type"].upper()]
         return len(stops) > 0
     except:
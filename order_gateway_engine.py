@@ -0,0 +1,344 @@
+# ================= ORDER GATEWAY ENGINE =================
+# Emir gönderimi tek noktadan: batch yerleştirme, stop cancel-replace ve
+# yerel emir takibi. Stop güncellemesi önceden fetch_positions +
+# fetch_open_orders + tek tek cancel + sleep(0.5) + create idi (4 round-trip
+# + 0.5 sn); gateway yerel emir id'lerini bildiği için listeleme yapmaz:
+#   replace_stop: yeni stop yerleştirilir (tek round-trip), eskisinin iptali
+#   arka planda yapılır. Yeni stop başarısızsa eski stop yerinde kalır; iki
+#   reduce-only stop'un kısa süre birlikte durması korumasız kalmaktan iyidir.
+# Binance Futures'ta STOP_MARKET için modify / cancelReplace ve batch
+# (linear conditional) yoktur; batch sadece market / limit emirler içindir.
+#
+# Emir durumları stream_engine "order" olaylarıyla (on_order_update) güncel
+# tutulur; her emir aksiyonu paylaşılan exchange snapshot'ını geçersiz kılar.
+
+import itertools
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import ccxt
+
+from exchange_snapshot_engine import invalidate_snapshot
+
+# Binance batchOrders limiti
+MAX_BATCH = 5
+CLIENT_ID_PREFIX = "gw"
+CANCEL_WORKERS = 2
+
+OPEN = "open"
+
+
+def is_stop(order_type):
+    return "stop" in str(order_type or "").lower()
+
+
+def rejection(order):
+    """
+    batchOrders'ta reddedilen bacak exception değil id'siz / "rejected" dict döner
+
+    Returns:
+        ccxt.InvalidOrder ya da None (emir kabul edildi)
+    """
+    if isinstance(order, dict) and order.get("id") is not None and order.get("status") != "rejected":
+        return None
+    if not isinstance(order, dict):
+        return ccxt.InvalidOrder("Order missing from batch response")
+    info = order.get("info")
+    detail = info.get("msg") if isinstance(info, dict) and info.get("msg") else info or order
+    return ccxt.InvalidOrder(f"Order rejected: {detail}")
+
+
+class OrderGateway:
+    """
+    Emir gateway'i
+
+    Kullanış:
+        gateway = get_order_gateway(binance)
+        gateway.place(symbol, "MARKET", "buy", qty)
+        gateway.place_batch([{...}, {...}])                 # tek istek
+        gateway.replace_stop(symbol, "sell", qty, new_sl)   # tek round-trip
+        gateway.open_orders(symbol, stops_only=True)        # yerel, REST yok
+    """
+
+    def __init__(self, binance, max_batch=MAX_BATCH, cancel_workers=CANCEL_WORKERS):
+        self.binance = binance
+        self.max_batch = max_batch
+        self.cancel_workers = cancel_workers
+
+        self.orders = {}    # order_id -> yerel kayıt
+        self.lock = threading.Lock()
+        self.counter = itertools.count(1)
+        self.session = f"{CLIENT_ID_PREFIX}{int(time.time()) % 100000}"
+        self.executor = None
+        self.pending = set()
+
+        self.metrics = {
+            "placed": 0,
+            "batches": 0,
+            "batched_orders": 0,
+            "cancels": 0,
+            "cancel_failures": 0,
+            "replaces": 0,
+            "replace_failures": 0,
+            "rest_calls": 0,
+            "last_replace_ms": None
+        }
+
+    # ===== YEREL TAKİP =====
+    def client_id(self, tag="o"):
+        """Yerel emir id'si (Binance clientOrderId: max 36 karakter)"""
+        return f"{self.session}_{tag}_{next(self.counter)}"[:36]
+
+    def track(self, order, symbol=None, type=None, side=None, amount=None, params=None):
+        """Exchange'in döndürdüğü (ya da sync'te bulunan) emri yerel deftere ekle"""
+        params = params or {}
+        record = {
+            "id": str(order["id"]),
+            "clientOrderId": order.get("clientOrderId") or params.get("clientOrderId"),
+            "symbol": order.get("symbol") or symbol,
+            "type": str(order.get("type") or type or "").lower(),
+            "side": str(order.get("side") or side or "").lower(),
+            "amount": order.get("amount") or amount,
+            "stopPrice": order.get("stopPrice") or params.get("stopPrice"),
+            "reduceOnly": bool(order.get("reduceOnly", params.get("reduceOnly", False))),
+            "status": order.get("status") or OPEN,
+            "placed_at": time.time()
+        }
+        with self.lock:
+            if record["status"] == OPEN:
+                self.orders[record["id"]] = record
+            else:
+                self.orders.pop(record["id"], None)
+        return record
+
+    def forget(self, order_id):
+        with self.lock:
+            return self.orders.pop(str(order_id), None)
+
+    def open_orders(self, symbol=None, stops_only=False):
+        """Yerel olarak bilinen açık emirler (REST çağrısı yok)"""
+        with self.lock:
+            return [
+                dict(o) for o in self.orders.values()
+                if (symbol is None or o["symbol"] == symbol)
+                and (not stops_only or is_stop(o["type"]))
+            ]
+
+    def on_order_update(self, order):
+        """stream_engine "order" olayı: dolan / iptal edilen emri defterden düş"""
+        with self.lock:
+            record = self.orders.get(order["id"])
+            if record is None:
+                return
+            if order.get("status") != OPEN:
+                del self.orders[order["id"]]
+            else:
+                record["status"] = OPEN
+
+    # ===== YERLEŞTİRME =====
+    def _request(self, spec, tag):
+        params = dict(spec.get("params") or {})
+        params.setdefault("clientOrderId", self.client_id(tag))
+        return {
+            "symbol": spec["symbol"],
+            "type": spec["type"],
+            "side": spec["side"],
+            "amount": spec["amount"],
+            "price": spec.get("price"),
+            "params": params
+        }
+
+    def place(self, symbol, type, side, amount, price=None, params=None, tag="o"):
+        """Tek emir (hata raise edilir)"""
+        request = self._request(
+            {"symbol": symbol, "type": type, "side": side, "amount": amount,
+             "price": price, "params": params}, tag
+        )
+        self.metrics["rest_calls"] += 1
+        try:
+            order = self.binance.create_order(**request)
+        finally:
+            invalidate_snapshot(self.binance)
+        self.metrics["placed"] += 1
+        self.track(order, **{k: request[k] for k in ("symbol", "type", "side", "amount", "params")})
+        return order
+
+    def place_batch(self, specs, tag="b"):
+        """
+        Birden çok emir; client create_orders destekliyorsa max_batch'lik tek istekler
+
+        Conditional (stop) emirler batch endpoint'inde kabul edilmez, tek tek gider.
+
+        Returns:
+            list: Her spec için emir dict'i ya da exception (reddedilen bacak dahil)
+        """
+        requests = [self._request(spec, tag) for spec in specs]
+        results = [None] * len(requests)
+
+        batchable = [i for i, r in enumerate(requests) if not is_stop(r["type"])]
+        create_orders = getattr(self.binance, "create_orders", None)
+        if len(batchable) < 2 or not callable(create_orders):
+            batchable = []
+
+        try:
+            for start in range(0, len(batchable), self.max_batch):
+                chunk = batchable[start:start + self.max_batch]
+                self.metrics["rest_calls"] += 1
+                self.metrics["batches"] += 1
+                try:
+                    orders = create_orders([requests[i] for i in chunk])
+                except Exception as e:
+                    orders = [e] * len(chunk)
+                for i, order in zip(chunk, orders):
+                    results[i] = order
+                self.metrics["batched_orders"] += len(chunk)
+
+            for i, request in enumerate(requests):
+                if i in batchable:
+                    continue
+                self.metrics["rest_calls"] += 1
+                try:
+                    results[i] = self.binance.create_order(**request)
+                except Exception as e:
+                    results[i] = e
+        finally:
+            invalidate_snapshot(self.binance)
+
+        for i, (request, order) in enumerate(zip(requests, results)):
+            if not isinstance(order, Exception):
+                # Eksik / reddedilen bacak başarılı sayılmaz
+                order = results[i] = rejection(order) or order
+            if not isinstance(order, Exception):
+                self.metrics["placed"] += 1
+                self.track(order, **{k: request[k] for k in ("symbol", "type", "side", "amount", "params")})
+        return results
+
+    # ===== İPTAL =====
+    def cancel(self, order_id, symbol):
+        """
+        Emri iptal et; başarılıysa ya da emir zaten yoksa (OrderNotFound) defterden düşer
+
+        Diğer hatalarda (ağ, rate limit) emir takipte kalır; bir sonraki
+        replace_stop / cancel_existing_stops iptali tekrar dener.
+        """
+        self.metrics["rest_calls"] += 1
+        try:
+            self.binance.cancel_order(order_id, symbol)
+            self.metrics["cancels"] += 1
+            self.forget(order_id)
+            return True
+        except ccxt.OrderNotFound:
+            self.forget(order_id)
+            return True
+        except Exception as e:
+            self.metrics["cancel_failures"] += 1
+            print(f"⚠️  Cancel failed: {symbol} {order_id} - {e}")
+            return False
+        finally:
+            invalidate_snapshot(self.binance)
+
+    def cancel_async(self, order_id, symbol):
+        """İptali arka planda yap (çağıranı bekletmez)"""
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.cancel_workers, thread_name_prefix="OrderGateway")
+            future = self.executor.submit(self.cancel, order_id, symbol)
+            self.pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self.lock:
+            self.pending.discard(future)
+
+    def flush(self, timeout=5.0):
+        """Bekleyen arka plan iptallerinin bitmesini bekle"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                pending = list(self.pending)
+            if not pending:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            pending[0].exception(remaining)
+
+    # ===== STOP CANCEL-REPLACE =====
+    def place_stop(self, symbol, side, amount, stop_price):
+        return self.place(
+            symbol, "STOP_MARKET", side, float(amount),
+            params={"stopPrice": float(stop_price), "reduceOnly": True, "workingType": "MARK_PRICE"},
+            tag="sl"
+        )
+
+    def replace_stop(self, symbol, side, amount, stop_price, old_ids=None):
+        """
+        Stop'u yenisiyle değiştir: yeni stop tek round-trip, eskiler arka planda iptal
+
+        Args:
+            old_ids: İptal edilecek stop id'leri (None: sembolün yerel bilinen stop'ları)
+        Returns:
+            yeni emir ya da None (eski stop'lar dokunulmadan kalır)
+        """
+        start = time.perf_counter()
+        if old_ids is None:
+            old_ids = [o["id"] for o in self.open_orders(symbol, stops_only=True)]
+
+        try:
+            order = self.place_stop(symbol, side, amount, stop_price)
+        except Exception as e:
+            self.metrics["replace_failures"] += 1
+            print(f"❌ STOP REPLACE ERROR: {symbol} - {e}")
+            return None
+
+        for order_id in old_ids:
+            if str(order_id) != str(order["id"]):
+                self.cancel_async(order_id, symbol)
+
+        self.metrics["replaces"] += 1
+        self.metrics["last_replace_ms"] = (time.perf_counter() - start) * 1000
+        return order
+
+    def close(self):
+        self.flush()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def get_status(self):
+        with self.lock:
+            return {
+                "tracked_orders": len(self.orders),
+                "pending_cancels": len(self.pending),
+                "metrics": dict(self.metrics)
+            }
+
+
+# ===== PAYLAŞILAN GATEWAY'LER =====
+# Backtest / sweep her koşuda yeni sahte exchange açar: client düşünce gateway de düşer
+_gateways = weakref.WeakKeyDictionary()
+_gateways_lock = threading.Lock()
+
+
+def get_order_gateway(binance):
+    """Client başına tek gateway (yerel emir defteri paylaşılır)"""
+    with _gateways_lock:
+        gateway = _gateways.get(binance)
+        if gateway is None:
+            gateway = OrderGateway(binance)
+            _gateways[binance] = gateway
+        return gateway
+
+
+def _forget_after_fork():
+    # Fork anında tutulan lock / iptal thread'leri child'a geçmez
+    global _gateways_lock
+    _gateways.clear()
+    _gateways_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
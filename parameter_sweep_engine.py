@@ -0,0 +1,281 @@
+# ================= PARAMETER SWEEP ENGINE =================
+# Backtest konfigürasyonlarını (grid) process pool ile tüm çekirdeklere dağıtır.
+# İndikatör kolonları ana process'te bir kez hesaplanır ve shared memory'e yazılır;
+# her worker initializer'da bağlanıp bar döngüsü verisini bir kez kurar.
+# Sonuçlar kolon bazlı tabloya (NumPy dizileri, .npz) yazılır ve
+# expectancy / profit factor / max DD'ye göre sıralanır.
+
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from backtest_engine import BacktestEngine, DEFAULT_PARAMS, build_dataset, compute_columns
+from config import MOCK_INITIAL_BALANCE
+from indicator_engine import OHLCV_COLUMNS, INDICATOR_COLUMNS
+
+SHARED_COLUMNS = OHLCV_COLUMNS + INDICATOR_COLUMNS
+
+# BacktestEngine constructor argümanları; geri kalan anahtarlar DEFAULT_PARAMS'a gider
+ENGINE_ARGS = ("min_score", "warmup", "max_positions", "trailing", "fee_rate", "slippage")
+
+RESULT_METRICS = [
+    "trades", "final_equity", "return_pct", "max_drawdown", "winrate",
+    "avg_R", "expectancy", "profit_factor", "fees_paid", "halted"
+]
+# Sıralamada küçük olanın iyi olduğu metrikler
+LOWER_IS_BETTER = {"max_drawdown", "fees_paid"}
+DEFAULT_RANKING = ("expectancy", "profit_factor", "max_drawdown")
+
+
+def param_grid(grid):
+    """
+    {"min_score": [0.7, 0.85], "base_risk": [0.02, 0.05]} -> 4 konfigürasyon
+    """
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def run_config(datasets, config, balance=MOCK_INITIAL_BALANCE):
+    """Tek konfigürasyonu hazır veriyle koş"""
+    engine_kwargs = {k: v for k, v in config.items() if k in ENGINE_ARGS}
+    params = {k: v for k, v in config.items() if k not in ENGINE_ARGS}
+    engine = BacktestEngine(balance=balance, params=params, **engine_kwargs)
+    return engine.run_datasets(datasets)
+
+
+# ================= WORKER =================
+
+_worker_datasets = None
+_worker_segments = []
+
+
+def _init_worker(layout):
+    """Shared memory'deki kolonlara bağlan, bar döngüsü verisini bir kez kur"""
+    global _worker_datasets
+    datasets = {}
+    for symbol, shm_name, shape in layout:
+        # Pool worker'ları ana process'in resource_tracker'ını paylaşır;
+        # segmenti sadece ana process unlink eder
+        shm = SharedMemory(name=shm_name)
+        _worker_segments.append(shm)
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        datasets[symbol] = build_dataset({col: matrix[j] for j, col in enumerate(SHARED_COLUMNS)})
+    _worker_datasets = datasets
+
+
+def _run_chunk(indexed_configs, balance):
+    results = []
+    for index, config in indexed_configs:
+        try:
+            results.append((index, run_config(_worker_datasets, config, balance)))
+        except Exception as e:
+            results.append((index, {"error": str(e)}))
+    return results
+
+
+def _run_chunk_local(datasets, indexed_configs, balance):
+    global _worker_datasets
+    _worker_datasets = datasets
+    try:
+        return _run_chunk(indexed_configs, balance)
+    finally:
+        _worker_datasets = None
+
+
+def _collect(rows, count):
+    results = [None] * count
+    for index, result in rows:
+        results[index] = result
+    return results
+
+
+# ================= RESULTS TABLE =================
+
+class SweepResults:
+    """
+    Kolon bazlı sonuç tablosu: {kolon: np.ndarray}, her satır bir konfigürasyon
+
+    Kullanış:
+        table.rank()[:10]                   # expectancy > profit factor > max DD
+        table.rank("max_drawdown").row(0)
+        table.save("sweep_results.npz")
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def from_runs(cls, configs, results):
+        param_names = []
+        for config in configs:
+            param_names.extend(k for k in config if k not in param_names)
+
+        columns = {}
+        for name in param_names:
+            columns[name] = np.array(
+                [float(config.get(name, np.nan)) for config in configs], dtype=np.float64
+            )
+        for metric in RESULT_METRICS:
+            columns[metric] = np.array(
+                [float(r.get(metric, np.nan)) if r else np.nan for r in results], dtype=np.float64
+            )
+        columns["failed"] = np.array([not r or "error" in r for r in results], dtype=bool)
+        return cls(columns)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def save(self, path):
+        np.savez_compressed(path, **self.columns)
+
+    def __len__(self):
+        return len(self.columns["failed"]) if "failed" in self.columns else 0
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.columns[key]
+        return SweepResults({name: values[key] for name, values in self.columns.items()})
+
+    def rank(self, by=DEFAULT_RANKING):
+        """
+        Satırları sırala (ilk anahtar birincil). Başarısız konfigürasyonlar ve
+        NaN değerler sona düşer.
+        """
+        keys = [by] if isinstance(by, str) else list(by)
+
+        sort_keys = []
+        for key in reversed(keys):
+            values = self.columns[key]
+            values = values if key in LOWER_IS_BETTER else -values
+            sort_keys.append(np.nan_to_num(values, nan=np.inf, posinf=np.inf, neginf=-np.inf))
+        sort_keys.append(self.columns["failed"])
+
+        return self[np.lexsort(sort_keys)]
+
+    def row(self, i):
+        return {name: values[i].item() for name, values in self.columns.items()}
+
+    def top(self, n=10, by=DEFAULT_RANKING):
+        ranked = self.rank(by)
+        return [ranked.row(i) for i in range(min(n, len(ranked)))]
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns)
+
+
+# ================= RUNNER =================
+
+class ParameterSweep:
+    """
+    Çok çekirdekli grid search
+
+    Kullanış:
+        sweep = ParameterSweep({"BTC/USDT": candles})          # indikatörler bir kez
+        table = sweep.run(param_grid({
+            "min_score": [0.7, 0.85, 1.0],
+            "base_risk": [0.01, 0.02],
+            "trail_sensitivity": [0.5, 0.7]
+        }))
+        best = table.top(5)
+
+    max_workers=0 ise aynı process'te seri çalışır (debug).
+    """
+
+    def __init__(self, raw_by_symbol, max_workers=None, balance=MOCK_INITIAL_BALANCE, chunk_size=None):
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        self.balance = balance
+        self.chunk_size = chunk_size
+
+        start = time.time()
+        self.columns = {
+            symbol: compute_columns(raw)
+            for symbol, raw in raw_by_symbol.items()
+            if raw is not None and len(raw)
+        }
+
+        self.metrics = {
+            "configs_run": 0,
+            "failures": 0,
+            "prepare_ms": (time.time() - start) * 1000,
+            "last_duration_ms": 0,
+            "configs_per_second": 0
+        }
+
+    def _validate(self, configs):
+        for config in configs:
+            unknown = [k for k in config if k not in ENGINE_ARGS and k not in DEFAULT_PARAMS]
+            if unknown:
+                raise ValueError(f"Unknown sweep parameters: {unknown}")
+
+    def _run_serial(self, configs):
+        datasets = {symbol: build_dataset(columns) for symbol, columns in self.columns.items()}
+        return _collect(_run_chunk_local(datasets, list(enumerate(configs)), self.balance), len(configs))
+
+    def _run_parallel(self, configs):
+        segments = []
+        layout = []
+        try:
+            for symbol, columns in self.columns.items():
+                shape = (len(SHARED_COLUMNS), len(columns["close"]))
+                shm = SharedMemory(create=True, size=max(8, int(np.prod(shape)) * 8))
+                segments.append(shm)
+                matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+                for j, col in enumerate(SHARED_COLUMNS):
+                    matrix[j] = columns[col]
+                del matrix
+                layout.append((symbol, shm.name, shape))
+
+            indexed = list(enumerate(configs))
+            chunk_size = self.chunk_size or max(1, len(indexed) // (self.max_workers * 4))
+            rows = []
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                     initargs=(layout,)) as executor:
+                futures = [
+                    executor.submit(_run_chunk, indexed[start:start + chunk_size], self.balance)
+                    for start in range(0, len(indexed), chunk_size)
+                ]
+                for future in as_completed(futures):
+                    rows.extend(future.result())
+            return _collect(rows, len(configs))
+
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+    def run(self, configs):
+        """
+        Args:
+            configs: Konfigürasyon listesi (param_grid çıktısı)
+
+        Returns:
+            SweepResults
+        """
+        self._validate(configs)
+        start = time.time()
+
+        if self.max_workers == 0:
+            results = self._run_serial(configs)
+        else:
+            results = self._run_parallel(configs)
+
+        table = SweepResults.from_runs(configs, results)
+        elapsed = time.time() - start
+
+        failures = int(table["failed"].sum())
+        self.metrics["configs_run"] += len(configs)
+        self.metrics["failures"] += failures
+        self.metrics["last_duration_ms"] = elapsed * 1000
+        self.metrics["configs_per_second"] = len(configs) / elapsed if elapsed > 0 else 0
+
+        if failures:
+            print(f"⚠️  Parameter sweep: {failures}/{len(configs)} configs failed")
+        return table
+
@@ -1,4 +1,5 @@
 # ================= PARTIAL TP ENGINE =================
+from order_gateway_engine import get_order_gateway
 
 def manage_partial_tp(binance, symbol, direction, entry, price, amount, R, state):
     """
@@ -6,6 +7,8 @@ def manage_partial_tp(binance, symbol, direction, entry, price, amount, R, state
     TP1: 1R → %40 kapat
     TP2: 2R → %30 kapat
     Kalan %30 runner
+
+    TP1 ve TP2 aynı anda tetiklenirse tek batch isteğinde gönderilir.
     """
 
     # Güvenlik kontrolleri
@@ -21,39 +24,40 @@ def manage_partial_tp(binance, symbol, direction, entry, price, amount, R, state
         else (entry - price) / R
     )
 
-    try:
-
-        # ================= TP1 =================
-        if pnl_R >= 1 and not state.get("tp1_done", False):
-
-            close_qty = abs(float(amount)) * 0.4
+    legs = []
 
-            binance.create_order(
-                symbol,
-                type="MARKET",
-                side="SELL" if direction == "LONG" else "BUY",
-                amount=close_qty,
-                params={"reduceOnly": True}
-            )
+    # ================= TP1 =================
+    if pnl_R >= 1 and not state.get("tp1_done", False):
+        legs.append(("tp1_done", abs(float(amount)) * 0.4))
 
-            state["tp1_done"] = True
+    # ================= TP2 =================
+    if pnl_R >= 2 and not state.get("tp2_done", False):
+        legs.append(("tp2_done", abs(float(amount)) * 0.3))
 
-        # ================= TP2 =================
-        if pnl_R >= 2 and not state.get("tp2_done", False):
-
-            close_qty = abs(float(amount)) * 0.3
+    if not legs:
+        return state
 
-            binance.create_order(
-                symbol,
-                type="MARKET",
-                side="SELL" if direction == "LONG" else "BUY",
-                amount=close_qty,
-                params={"reduceOnly": True}
-            )
+    try:
 
-            state["tp2_done"] = True
+        results = get_order_gateway(binance).place_batch([
+            {
+                "symbol": symbol,
+                "type": "MARKET",
+                "side": "SELL" if direction == "LONG" else "BUY",
+                "amount": close_qty,
+                "params": {"reduceOnly": True}
+            }
+            for _, close_qty in legs
+        ], tag="tp")
+
+        # Sadece başarılı bacaklar işaretlenir; başarısız olan sonraki barda tekrar denenir
+        for (flag, _), result in zip(legs, results):
+            if isinstance(result, Exception):
+                print("Partial TP Error:", result)
+            else:
+                state[flag] = True
 
     except Exception as e:
         print("Partial TP Error:", e)
 
-    return state
\ No newline at end of file
+    return state
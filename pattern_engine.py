@@ -1,40 +1,70 @@
 # ================= PATTERN ENGINE v4 =================
+# *_signals fonksiyonları tüm geçmiş için tek NumPy geçişinde sinyal dizisi
+# üretir (backtest); detect_* fonksiyonları aynı kuralı sadece son bara uygular.
+
+import numpy as np
+
+# Sinyal kodları: +1 BULL, -1 BEAR, 0 yok
+PATTERN_LABELS = {1: "BULL", -1: "BEAR"}
 
-def detect_engulfing(df):
-    last = df.iloc[-1]
-    prev = df.iloc[-2]
 
+def _engulfing(prev_open, prev_close, open_, close):
     # Bullish engulfing: Mevcut mum yeşil, önceki kırmızı ve mevcut mum öncekini tamamen yutuyor
-    if prev["close"] < prev["open"] and last["close"] > last["open"]:
-        if last["close"] > prev["open"] and last["open"] < prev["close"]:
-            return "BULL"
+    bull = (prev_close < prev_open) & (close > open_) & (close > prev_open) & (open_ < prev_close)
 
     # Bearish engulfing: Mevcut mum kırmızı, önceki yeşil ve mevcut mum öncekini tamamen yutuyor
-    if prev["close"] > prev["open"] and last["close"] < last["open"]:
-        if last["open"] > prev["close"] and last["close"] < prev["open"]:
-            return "BEAR"
+    bear = (prev_close > prev_open) & (close < open_) & (open_ > prev_close) & (close < prev_open)
 
-    return None
+    return np.where(bull, 1, np.where(bear, -1, 0))
 
 
-def detect_pinbar(df):
-    last = df.iloc[-1]
-
-    body = abs(last["close"] - last["open"])
-    upper_wick = last["high"] - max(last["close"], last["open"])
-    lower_wick = min(last["close"], last["open"]) - last["low"]
-
-    if body == 0: return None
+def _pinbar(open_, high, low, close):
+    body = np.abs(close - open_)
+    upper_wick = high - np.maximum(close, open_)
+    lower_wick = np.minimum(close, open_) - low
 
     # Bullish pin: Alt gölge gövdenin en az 2 katı ve üst gölge küçük olmalı
-    if lower_wick > body * 2 and upper_wick < body:
-        return "BULL"
+    bull = (lower_wick > body * 2) & (upper_wick < body)
 
     # Bearish pin: Üst gölge gövdenin en az 2 katı ve alt gölge küçük olmalı
-    if upper_wick > body * 2 and lower_wick < body:
-        return "BEAR"
+    bear = (upper_wick > body * 2) & (lower_wick < body)
+
+    return np.where(body == 0, 0, np.where(bull, 1, np.where(bear, -1, 0)))
+
+
+def engulfing_signals(df):
+    """Her bar için engulfing kodu (int8; ilk bar 0)"""
+    opens = np.asarray(df["open"], dtype=np.float64)
+    closes = np.asarray(df["close"], dtype=np.float64)
 
-    return None
+    signals = np.zeros(len(closes), dtype=np.int8)
+    if len(closes) > 1:
+        signals[1:] = _engulfing(opens[:-1], closes[:-1], opens[1:], closes[1:])
+    return signals
+
+
+def pinbar_signals(df):
+    """Her bar için pinbar kodu (int8)"""
+    return _pinbar(
+        np.asarray(df["open"], dtype=np.float64),
+        np.asarray(df["high"], dtype=np.float64),
+        np.asarray(df["low"], dtype=np.float64),
+        np.asarray(df["close"], dtype=np.float64)
+    ).astype(np.int8)
+
+
+def detect_engulfing(df):
+    opens = np.asarray(df["open"])
+    closes = np.asarray(df["close"])
+    return PATTERN_LABELS.get(int(_engulfing(opens[-2], closes[-2], opens[-1], closes[-1])))
+
+
+def detect_pinbar(df):
+    code = _pinbar(
+        np.asarray(df["open"])[-1], np.asarray(df["high"])[-1],
+        np.asarray(df["low"])[-1], np.asarray(df["close"])[-1]
+    )
+    return PATTERN_LABELS.get(int(code))
 
 
 def pattern_score(df, direction):
@@ -56,4 +86,4 @@ def pattern_score(df, direction):
         if engulf == "BEAR": score += 0.15
         if pin == "BEAR": score += 0.10
 
-    return score
\ No newline at end of file
+    return score
@@ -1,66 +1,57 @@
-import json
-import os
+from trade_log_engine import open_log, log_directory
+from trade_stats_engine import TradeStatsAccumulator
 
+# Eski format (tek JSON dizisi): ilk açılışta segment log'a bir kez aktarılır
 LOG_FILE = "trade_log.json"
 
+# Canlı akümülatör: trade log ilk ihtiyaçta bir kez okunur,
+# sonrasında save_log (trade kapanışı) ile beslenir
+trade_stats = TradeStatsAccumulator()
+
+
+def trade_log():
+    """Append-only segment log (trade_log/)"""
+    return open_log(log_directory(LOG_FILE), legacy_path=LOG_FILE)
+
+
+def iter_logs(symbol=None, since=None, until=None):
+    """Trade kayıtlarını dosyayı belleğe almadan akıt"""
+    return trade_log().iter_records(symbol=symbol, since=since, until=until)
+
 
 def load_logs():
-    if not os.path.exists(LOG_FILE):
-        return []
-    with open(LOG_FILE, "r") as f:
-        return json.load(f)
+    return list(iter_logs())
 
 
 def save_log(data):
-    logs = load_logs()
-    logs.append(data)
-    with open(LOG_FILE, "w") as f:
-        json.dump(logs, f, indent=4)
+    trade_log().append(data)
+
+    if trade_stats.loaded:
+        trade_stats.add(data)
+
+
+def get_trade_stats(logs=None):
+    """
+    logs None: canlı akümülatör (disk sadece ilk çağrıda okunur)
+    logs TradeStatsAccumulator: aynen (backtest)
+    logs liste: o listeden kurulan akümülatör
+    """
+    if isinstance(logs, TradeStatsAccumulator):
+        return logs
+    if logs is not None:
+        return TradeStatsAccumulator.from_logs(logs)
+    if not trade_stats.loaded:
+        trade_stats.load(iter_logs())
+    return trade_stats
 
 
 # =========================
 # PERFORMANCE METRICS
 # =========================
 
-def compute_stats():
-    logs = load_logs()
-    if not logs:
-        return {
-            "total": 0,
-            "winrate": 0,
-            "avg_R": 0,
-            "equity_curve": []
-        }
-
-    total = len(logs)
-    wins = [t for t in logs if t["R"] > 0]
-    winrate = len(wins) / total if total > 0 else 0
-    avg_R = sum(t["R"] for t in logs) / total
-
-    equity = 0
-    equity_curve = []
-    for t in logs:
-        equity += t["R"]
-        equity_curve.append(equity)
-
-    return {
-        "total": total,
-        "winrate": winrate,
-        "avg_R": avg_R,
-        "equity_curve": equity_curve
-    }
-
-
-def loss_streak():
-    logs = load_logs()
-    streak = 0
-    max_streak = 0
-
-    for t in logs:
-        if t["R"] < 0:
-            streak += 1
-            max_streak = max(max_streak, streak)
-        else:
-            streak = 0
-
-    return max_streak
\ No newline at end of file
+def compute_stats(logs=None):
+    return get_trade_stats(logs).stats()
+
+
+def loss_streak(logs=None):
+    return get_trade_stats(logs).max_loss_streak
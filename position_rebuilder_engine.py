@@ -1,10 +1,11 @@
 # ================= DETERMINISTIC POSITION REBUILDER =================
 # Exchange'deki gerçek pozisyondan state'i yeniden oluştur
 
-import json
 import time
 from datetime import datetime
 
+from event_store_engine import get_log_writer
+
 class PositionRebuilder:
     """
     Exchange'deki pozisyondan deterministik şekilde state'i rebuild et
@@ -22,7 +23,7 @@ class PositionRebuilder:
     def __init__(self, binance, state_manager):
         self.binance = binance
         self.state_manager = state_manager
-        self.rebuild_log = "position_rebuild_log.json"
+        self.log_writer = get_log_writer()
     
     def rebuild_position_state(self, symbol, direction, contracts, entry_price_estimate=None):
         """
@@ -225,21 +226,7 @@ class PositionRebuilder:
     def _log_rebuild(self, log_entry):
         """Rebuild log yaz"""
         try:
-            logs = []
-            try:
-                with open(self.rebuild_log, "r") as f:
-                    logs = json.load(f)
-            except:
-                logs = []
-            
-            logs.append(log_entry)
-            
-            # Son 100 log tutun
-            if len(logs) > 100:
-                logs = logs[-100:]
-            
-            with open(self.rebuild_log, "w") as f:
-                json.dump(logs, f, indent=2)
+            self.log_writer.submit("rebuild", log_entry)
         except:
             pass
     
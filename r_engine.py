@@ -1,9 +1,14 @@
 # r_engine.py içeriği
-def dynamic_R_multiplier(df, score):
+import math
+
+from feature_snapshot_engine import feature_snapshot
+
+
+def dynamic_R_multiplier(df, score, base=2.0, step=0.5):
     """Trend gücüne (ADX) ve MS skoruna göre R katsayısını belirler."""
-    adx = df.iloc[-1].get("adx", 25)
-    base = 2.0
-    if adx > 30: base += 0.5    # Güçlü trend: Daha geniş stop
-    if score > 0.9: base += 0.5  # Çok güvenli setup
-    if adx < 20: base -= 0.5    # Zayıf trend: Daha dar stop
+    adx = feature_snapshot(df)["adx"]
+    if math.isnan(adx): adx = 25  # adx kolonu yok
+    if adx > 30: base += step    # Güçlü trend: Daha geniş stop
+    if score > 0.9: base += step  # Çok güvenli setup
+    if adx < 20: base -= step    # Zayıf trend: Daha dar stop
     return max(base, 1.2)
\ No newline at end of file
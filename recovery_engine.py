@@ -3,9 +3,10 @@ import json
 import os
 import time
 from datetime import datetime
-import tempfile
 import shutil
 
+from state_journal_engine import get_journal
+
 class StateManager:
     """Crash-safe state management - GUARANTEED STABLE"""
     
@@ -14,6 +15,10 @@ class StateManager:
         self.backup_dir = backup_dir
         self.recovery_file = "recovery_checkpoint.json"
         
+        # Save'ler sadece değişen anahtarları journal'a ekler; backup sadece
+        # tam snapshot alındığında yazılır
+        self.journal = get_journal(state_file, on_snapshot=self.create_backup)
+        
         # Directory'leri güvenli şekilde oluştur
         try:
             if not os.path.exists(backup_dir):
@@ -21,6 +26,9 @@ class StateManager:
             print(f"✅ State backup directory initialized: {backup_dir}")
         except Exception as e:
             print(f"❌ Failed to create backup directory: {e}")
+        
+        # Backup listesi bir kez okunur, sonra bellekte tutulur
+        self.backups = self._list_backups()
     
     def _default_state(self):
         """Default state template - GUARANTEED returns valid dict"""
@@ -70,23 +78,16 @@ class StateManager:
         # ===== 1️⃣ ANA STATE DOSYASI KONTROLÜ (ÖNCE) =====
         try:
             if os.path.exists(self.state_file):
-                with open(self.state_file, "r") as f:
-                    content = f.read().strip()
-                    
-                    # Boş dosya kontrolü
-                    if content:
-                        state = json.loads(content)
-                        
-                        # Valid dict kontrolü
-                        if isinstance(state, dict) and state.get("entry"):
-                            print(f"✅ State loaded successfully from {self.state_file}")
-                            return state
-                        else:
-                            print(f"⚠️  State file exists but entry is empty")
-                            state = None
-                    else:
-                        print(f"⚠️  State file is empty")
-                        state = None
+                # Snapshot + delta journal replay
+                state = self.journal.load()
+                
+                # Valid dict kontrolü
+                if isinstance(state, dict) and state.get("entry"):
+                    print(f"✅ State loaded successfully from {self.state_file}")
+                    return state
+                else:
+                    print(f"⚠️  State file exists but entry is empty")
+                    state = None
         
         except json.JSONDecodeError as je:
             print(f"❌ State file JSON decode error: {je}")
@@ -149,34 +150,9 @@ class StateManager:
             state["last_save"] = datetime.now().isoformat()
             state["save_count"] = state.get("save_count", 0) + 1
             
-            # Temp file'a yaz
-            temp_fd = None
-            temp_path = None
-            
-            try:
-                temp_fd, temp_path = tempfile.mkstemp(suffix=".json", prefix="state_", dir=".")
-                
-                with os.fdopen(temp_fd, "w") as f:
-                    json.dump(state, f, indent=2)
-                
-                # Atomik replace (Windows-safe)
-                if os.path.exists(self.state_file):
-                    try:
-                        os.remove(self.state_file)
-                    except:
-                        pass
-                
-                os.rename(temp_path, self.state_file)
-                return True
-            
-            except Exception as e:
-                # Cleanup temp file
-                if temp_path and os.path.exists(temp_path):
-                    try:
-                        os.unlink(temp_path)
-                    except:
-                        pass
-                raise e
+            # Sadece değişen anahtarlar journal'a (periyodik tam snapshot)
+            self.journal.save(state)
+            return True
         
         except Exception as e:
             print(f"❌ State save error: {e}")
@@ -229,6 +205,9 @@ class StateManager:
             with open(backup_file, "w") as f:
                 json.dump(state, f, indent=2)
             
+            name = os.path.basename(backup_file)
+            if name not in self.backups:
+                self.backups.append(name)
             self._cleanup_old_backups()
             return True
         
@@ -236,25 +215,26 @@ class StateManager:
             print(f"❌ Backup error: {e}")
             return False
     
-    def _cleanup_old_backups(self, keep=10):
-        """Eski backup'ları sil (en yeni 10 tutunur)"""
+    def _list_backups(self):
+        """Backup dosya adları (eskiden yeniye)"""
         try:
             if not os.path.exists(self.backup_dir):
-                return
-            
-            backups = sorted([
+                return []
+            return sorted([
                 f for f in os.listdir(self.backup_dir)
                 if f.startswith("state_backup_") and f.endswith(".json")
             ])
-            
-            if len(backups) > keep:
-                for old_backup in backups[:-keep]:
-                    try:
-                        os.remove(os.path.join(self.backup_dir, old_backup))
-                    except:
-                        pass
         except:
-            pass
+            return []
+    
+    def _cleanup_old_backups(self, keep=10):
+        """Eski backup'ları sil (en yeni 10 tutunur)"""
+        while len(self.backups) > keep:
+            old_backup = self.backups.pop(0)
+            try:
+                os.remove(os.path.join(self.backup_dir, old_backup))
+            except:
+                pass
     
     def _recover_from_backup(self):
         """
@@ -304,17 +284,11 @@ class StateManager:
     def get_recovery_status(self):
         """Recovery status bilgisi"""
         try:
-            backup_count = 0
-            if os.path.exists(self.backup_dir):
-                backup_count = len([
-                    f for f in os.listdir(self.backup_dir)
-                    if f.startswith("state_backup_") and f.endswith(".json")
-                ])
-            
             status = {
                 "main_state_exists": os.path.exists(self.state_file),
                 "recovery_checkpoint_exists": os.path.exists(self.recovery_file),
-                "backup_count": backup_count
+                "backup_count": len(self.backups),
+                "state_journal": self.journal.metrics
             }
             return status
         except:
@@ -344,14 +318,12 @@ def load_state():
 
 
 def save_state(state):
-    """Global save_state with backup"""
+    """Global save_state (backup snapshot alındığında yazılır)"""
     if state is None or not isinstance(state, dict):
         print("⚠️  Attempt to save invalid state - skipping")
         return False
     
-    state_manager.save_state(state)
-    state_manager.create_backup(state)
-    return True
+    return state_manager.save_state(state)
 
 
 def create_recovery_checkpoint(state):
@@ -1,12 +1,15 @@
 # ================= REGIME AGGRESSION ENGINE =================
 
+from feature_snapshot_engine import feature_snapshot
+
 def regime_aggression_adjustment(df, base_risk):
 
-    atr = df.iloc[-1]["atr"]
-    atr_prev = df.iloc[-5]["atr"]
+    last = feature_snapshot(df)
+    atr = last["atr"]
+    atr_prev = last["atr_5"]
 
-    ema20 = df.iloc[-1]["ema20"]
-    ema50 = df.iloc[-1]["ema50"]
+    ema20 = last["ema20"]
+    ema50 = last["ema50"]
 
     volatility_expanding = atr > atr_prev * 1.2
     trend_strength = abs(ema20 - ema50) / ema50
@@ -1,11 +1,15 @@
+from feature_snapshot_engine import feature_snapshot
+
+
 def detect_regime(df):
     """
     ADX ve EMA dizilimi kullanarak piyasa rejimini belirler.
     TREND: Güçlü ve yönlü hareket.
     RANGE: Yatay ve kararsız yapı.
     NORMAL: Geçiş evresi.
+    df: DataFrame ya da feature snapshot
     """
-    last = df.iloc[-1]
+    last = feature_snapshot(df)
     adx = last["adx"]
     
     # EMA dizilimi (Asıl Temel Trend Teyidi)
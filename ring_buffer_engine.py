@@ -0,0 +1,88 @@
+# ================= OHLCV RING BUFFER ENGINE =================
+# Sabit kapasiteli, kolon bazlı NumPy ring buffer.
+# Her mum iki kez yazılır (i ve i + capacity); böylece son N mum her zaman
+# bitişik bir dilimdir ve kopyasız view olarak döndürülebilir.
+
+import numpy as np
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class OHLCVRingBuffer:
+    """
+    Önceden ayrılmış OHLCV ring buffer
+
+    Bellek kullanımı kapasiteye bağlıdır, uptime'a değil.
+    view() ile dönen diziler buffer'ın kendisidir; sonraki append'ler
+    eski view'ların içeriğini değiştirebilir (kalıcı veri için .copy()).
+    """
+
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self.timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self.data = np.zeros((len(PRICE_COLUMNS), 2 * capacity), dtype=np.float64)
+        self.pos = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _write(self, slot, candle):
+        ts = int(candle[0])
+        self.timestamps[slot] = ts
+        self.timestamps[slot + self.capacity] = ts
+        for j in range(len(PRICE_COLUMNS)):
+            value = candle[j + 1]
+            self.data[j, slot] = value
+            self.data[j, slot + self.capacity] = value
+
+    def append(self, candle):
+        """[ts, open, high, low, close, volume] ekle (doluysa en eskisi düşer)"""
+        self._write(self.pos, candle)
+        self.pos = (self.pos + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def extend(self, candles):
+        for candle in candles:
+            self.append(candle)
+
+    def pop(self):
+        """Son mumu çıkar (canlı mumun üzerine yazmak için)"""
+        if self.count == 0:
+            return
+        self.pos = (self.pos - 1) % self.capacity
+        self.count -= 1
+
+    def clear(self):
+        self.pos = 0
+        self.count = 0
+
+    def last_ts(self):
+        if self.count == 0:
+            return None
+        return int(self.timestamps[(self.pos - 1) % self.capacity])
+
+    def _bounds(self, n=None):
+        n = self.count if n is None else min(n, self.count)
+        end = (self.pos - 1) % self.capacity + self.capacity + 1
+        return end - n, end
+
+    def view(self, n=None):
+        """
+        Son n mumun kolon view'ları (kopya yok).
+
+        Returns:
+            dict: {"timestamp": int64[n], "open": float64[n], ...}
+        """
+        start, end = self._bounds(n)
+        columns = {"timestamp": self.timestamps[start:end]}
+        for j, col in enumerate(PRICE_COLUMNS):
+            columns[col] = self.data[j, start:end]
+        return columns
+
+    def rows(self, n=None):
+        """Son n mum liste olarak ([ts, o, h, l, c, v]); küçük n için"""
+        start, end = self._bounds(n)
+        timestamps = self.timestamps[start:end].tolist()
+        values = self.data[:, start:end].T.tolist()
+        return [[ts] + row for ts, row in zip(timestamps, values)]
@@ -10,12 +10,17 @@ MAX_RISK = BASE_RISK
 MIN_RISK = BASE_RISK * 0.4
 
 
-def dynamic_risk(equity, peak, df=None):
+def dynamic_risk(equity, peak, df=None, logs=None, base_risk=None):
     """
     Enterprise Hybrid Risk Engine (Stable Version)
+
+    logs: Trade listesi ya da TradeStatsAccumulator (None: canlı akümülatör, disk sadece ilk çağrıda okunur)
+    base_risk: BASE_RISK yerine (parametre taraması); limitler buna göre ölçeklenir
     """
 
-    base = BASE_RISK
+    base = BASE_RISK if base_risk is None else base_risk
+    max_risk = MAX_RISK if base_risk is None else base_risk
+    min_risk = MIN_RISK if base_risk is None else base_risk * 0.4
 
     # =========================
     # 1. DRAWDOWN CONTROL
@@ -45,7 +50,7 @@ def dynamic_risk(equity, peak, df=None):
     # =========================
     # 3. EQUITY AI FILTER
     # =========================
-    metrics = equity_metrics()
+    metrics = equity_metrics(logs)
 
     if isinstance(metrics, dict):
 
@@ -69,7 +74,7 @@ def dynamic_risk(equity, peak, df=None):
     # =========================
     # 4. PERFORMANCE BOOST
     # =========================
-    stats = compute_stats()
+    stats = compute_stats(logs)
 
     if isinstance(stats, dict):
 
@@ -86,7 +91,7 @@ def dynamic_risk(equity, peak, df=None):
     # =========================
     # 5. LOSS STREAK PROTECTION
     # =========================
-    streak = loss_streak()
+    streak = loss_streak(logs)
 
     if isinstance(streak, int):
 
@@ -100,6 +105,6 @@ def dynamic_risk(equity, peak, df=None):
     # =========================
     # 6. FINAL LIMITS
     # =========================
-    base = max(MIN_RISK, min(base, MAX_RISK))
+    base = max(min_risk, min(base, max_risk))
 
     return round(base, 5)
\ No newline at end of file
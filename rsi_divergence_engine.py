@@ -1,40 +1,62 @@
 import numpy as np
 
-def detect_rsi_divergence(df, direction, lookback=20):
+from batch_indicator_engine import rolling_extreme
 
-    if len(df) < lookback + 5:
-        return False
 
-    closes = df["close"].values
-    rsi = df["rsi"].values
+def _divergence(direction, price_1, price_2, rsi_1, rsi_2):
+    # LONG için bullish divergence: fiyat lower low ama RSI higher low
+    if direction == "LONG":
+        return (price_2 < price_1) & (rsi_2 > rsi_1)
 
-    recent_prices = closes[-lookback:]
-    recent_rsi = rsi[-lookback:]
+    # SHORT için bearish divergence: fiyat higher high ama RSI lower high
+    if direction == "SHORT":
+        return (price_2 > price_1) & (rsi_2 < rsi_1)
 
-    # LONG için bullish divergence
-    if direction == "LONG":
+    return np.zeros(np.shape(price_1), dtype=bool)
 
-        price_low1 = np.min(recent_prices[:-5])
-        price_low2 = np.min(recent_prices[-5:])
 
-        rsi_low1 = np.min(recent_rsi[:-5])
-        rsi_low2 = np.min(recent_rsi[-5:])
+def rsi_divergence_signals(df, direction, lookback=20):
+    """
+    Her bar için detect_rsi_divergence sonucu (bool dizisi) tek vektörel geçişte.
 
-        # fiyat lower low ama RSI higher low
-        if price_low2 < price_low1 and rsi_low2 > rsi_low1:
-            return True
+    Bar i: pencere [i-lookback+1, i]; ilk lookback-5 bar ile son 5 bar karşılaştırılır.
+    İlk lookback+4 bar (geçmiş yetersiz) False.
+    """
+    closes = np.asarray(df["close"], dtype=np.float64)
+    rsi = np.asarray(df["rsi"], dtype=np.float64)
+    n = len(closes)
 
-    # SHORT için bearish divergence
-    if direction == "SHORT":
+    signals = np.zeros(n, dtype=bool)
+    start = lookback + 4
+    if n <= start:
+        return signals
 
-        price_high1 = np.max(recent_prices[:-5])
-        price_high2 = np.max(recent_prices[-5:])
+    ufunc = np.minimum if direction == "LONG" else np.maximum
+    # [i-lookback+1, i-5] ve [i-4, i] pencereleri
+    price_1 = rolling_extreme(closes, lookback - 5, ufunc)[start - 5:n - 5]
+    rsi_1 = rolling_extreme(rsi, lookback - 5, ufunc)[start - 5:n - 5]
+    price_2 = rolling_extreme(closes, 5, ufunc)[start:]
+    rsi_2 = rolling_extreme(rsi, 5, ufunc)[start:]
 
-        rsi_high1 = np.max(recent_rsi[:-5])
-        rsi_high2 = np.max(recent_rsi[-5:])
+    signals[start:] = _divergence(direction, price_1, price_2, rsi_1, rsi_2)
+    return signals
 
-        # fiyat higher high ama RSI lower high
-        if price_high2 > price_high1 and rsi_high2 < rsi_high1:
-            return True
 
-    return False
\ No newline at end of file
+def detect_rsi_divergence(df, direction, lookback=20):
+
+    # DataFrame ya da kolon view sözlüğü (ring buffer / BatchIndicators.view)
+    closes = np.asarray(df["close"])
+    rsi = np.asarray(df["rsi"])
+
+    if len(closes) < lookback + 5:
+        return False
+
+    recent_prices = closes[-lookback:]
+    recent_rsi = rsi[-lookback:]
+
+    reduce = np.min if direction == "LONG" else np.max
+    return bool(_divergence(
+        direction,
+        reduce(recent_prices[:-5]), reduce(recent_prices[-5:]),
+        reduce(recent_rsi[:-5]), reduce(recent_rsi[-5:])
+    ))
@@ -2,6 +2,9 @@
 
 import time
 
+from exchange_snapshot_engine import get_snapshot_service
+from order_gateway_engine import get_order_gateway
+
 HEARTBEAT_INTERVAL = 300   # 5 dakika
 last_heartbeat = time.time()
 
@@ -14,12 +17,8 @@ def heartbeat():
 
 def orphan_position_check(binance, state):
 
-    positions = binance.fetch_positions()
-    active = False
-
-    for p in positions:
-        if float(p["contracts"]) != 0:
-            active = True
+    # Döngünün paylaşılan exchange snapshot'ı (açık pozisyonlar önceden süzülü)
+    active = bool(get_snapshot_service(binance).get().open_positions)
 
     # Eğer pozisyon var ama state boşsa
     if active and state.get("entry") is None:
@@ -31,7 +30,7 @@ def orphan_position_check(binance, state):
 
 def ensure_stop_exists(binance, symbol, direction, amount, sl):
 
-    orders = binance.fetch_open_orders(symbol)
+    orders = get_snapshot_service(binance).open_orders(symbol)
 
     has_stop = False
     for o in orders:
@@ -44,14 +43,10 @@ def ensure_stop_exists(binance, symbol, direction, amount, sl):
 
         side = "SELL" if direction == "LONG" else "BUY"
 
-        binance.create_order(
+        # Gateway üzerinden: stop yerel deftere girer, sonraki cancel-replace'ler onu da iptal eder
+        get_order_gateway(binance).place_stop(
             symbol,
-            "STOP_MARKET",
             side,
             abs(amount),
-            params={
-                "stopPrice": float(binance.price_to_precision(symbol, sl)),
-                "reduceOnly": True,
-                "workingType": "MARK_PRICE"
-            }
+            float(binance.price_to_precision(symbol, sl))
         )
\ No newline at end of file
@@ -1,16 +1,21 @@
-def compute_score(df):
+from feature_snapshot_engine import feature_snapshot
+
+
+def compute_score(df, adx_strong=25, adx_weak=20, volume_surge=1.3):
     """
     Enterprise v4 Skor Motoru.
     İndikatörleri önem sırasına göre ağırlıklandırır.
+    df: DataFrame ya da feature snapshot
+    adx_strong / adx_weak / volume_surge: Eşikler (parametre taraması için)
     """
-    last = df.iloc[-1]
+    last = feature_snapshot(df)
     score = 0
 
     # 1. TREND GÜCÜ (Kritik - 0.3)
     # ADX 20-25 arası zayıf, 25+ güçlü trenddir.
-    if last["adx"] > 25:
+    if last["adx"] > adx_strong:
         score += 0.3
-    elif last["adx"] > 20:
+    elif last["adx"] > adx_weak:
         score += 0.15
 
     # 2. HAREKETLİ ORTALAMA DİZİLİMİ (Trend Yönü - 0.2)
@@ -20,7 +25,7 @@ def compute_score(df):
 
     # 3. HACİM VE KURUMSAL İLGİ (Kritik - 0.3)
     # Vol_avg üzerindeki %30'luk artış, BOS'u destekleyen 'smart money' kanıtıdır.
-    if last["volume"] > last["vol_avg"] * 1.3:
+    if last["volume"] > last["vol_avg"] * volume_surge:
         score += 0.3
     elif last["volume"] > last["vol_avg"]:
         score += 0.1
@@ -0,0 +1,247 @@
+# ================= PARALLEL SIGNAL PIPELINE ENGINE =================
+# Sembol değerlendirmesini (trend, skor, pattern, rejim, divergence, BOS)
+# process pool'a dağıtır. OHLCV + indikatör matrisleri shared memory'e bir kez
+# yazılır; worker'lar DataFrame pickle etmeden buradan okur.
+# Deadline'a yetişmeyen semboller bu döngüde atlanır: worker'lar deadline'ı
+# kendileri de kontrol eder (çalışan future iptal edilemez), deadline'da hâlâ
+# çalışan chunk varsa pool yenilenir ki sonraki döngü onların arkasında beklemesin.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from ai_regime_engine import ai_regime_predictor
+from batch_indicator_engine import columns_to_dataframe
+from config import CHECK_INTERVAL
+from feature_snapshot_engine import build_snapshots, feature_snapshot
+from indicator_engine import OHLCV_COLUMNS, INDICATOR_COLUMNS
+from pattern_engine import pattern_score
+from regime_engine import detect_regime
+from rsi_divergence_engine import detect_rsi_divergence
+from score_engine import compute_score
+from structure_break_engine import detect_break_and_retest
+from structure_engine import detect_trend
+
+SHARED_COLUMNS = OHLCV_COLUMNS + INDICATOR_COLUMNS
+
+
+def evaluate_symbol(symbol, df, features=None):
+    """
+    Tek sembol için sinyal değerlendirmesi.
+
+    Args:
+        features: Önceden hesaplanmış feature snapshot (yoksa df'ten bir kez üretilir)
+
+    Returns:
+        dict (aday) ya da None (trend yok / nötr)
+    """
+    last = feature_snapshot(df) if features is None else features
+    trend = detect_trend(last)
+    if trend is None or trend == "NEUTRAL":
+        return None
+
+    direction = "LONG" if trend.endswith("LONG") else "SHORT"
+    regime_ai, regime_ai_score = ai_regime_predictor(df)
+
+    return {
+        "symbol": symbol,
+        "direction": direction,
+        "trend": trend,
+        "score": round(compute_score(last) + pattern_score(df, direction), 2),
+        "regime": detect_regime(last),
+        "ai_regime": regime_ai,
+        "ai_score": regime_ai_score,
+        "rsi_divergence": bool(detect_rsi_divergence(df, direction)),
+        "break_retest": bool(detect_break_and_retest(df, direction)),
+        "price": float(last["close"]),
+        "atr": float(last["atr"]),
+        "timestamp": int(last["timestamp"])
+    }
+
+
+def _evaluate_rows(matrix, symbols, indices, expires_at=None):
+    """(adaylar, değerlendirilen sembol sayısı); expires_at geçince durur"""
+    candidates = []
+    evaluated = 0
+    for symbol, i in zip(symbols, indices):
+        if expires_at is not None and time.time() >= expires_at:
+            break
+        evaluated += 1
+        columns = {col: matrix[j, i] for j, col in enumerate(SHARED_COLUMNS)}
+        columns["timestamp"] = columns["timestamp"].astype(np.int64)
+        try:
+            candidate = evaluate_symbol(symbol, columns_to_dataframe(columns))
+        except Exception as e:
+            print(f"⚠️  Signal evaluation failed ({symbol}): {e}")
+            continue
+        if candidate:
+            candidates.append(candidate)
+    return candidates, evaluated
+
+
+def _evaluate_chunk(shm_name, shape, symbols, indices, expires_at=None):
+    """
+    Worker: shared memory'e bağlan, sembol grubunu değerlendir
+
+    Returns:
+        (adaylar, değerlendirilen sembol sayısı)
+    """
+    if expires_at is not None and time.time() >= expires_at:
+        return [], 0
+
+    # Pool worker'ları ana process'in resource_tracker'ını paylaşır; segmenti
+    # sadece ana process unlink eder (deadline'dan sonra başlayan chunk bulamaz)
+    try:
+        shm = SharedMemory(name=shm_name)
+    except FileNotFoundError:
+        return [], 0
+    try:
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        result = _evaluate_rows(matrix, symbols, indices, expires_at)
+        del matrix
+        return result
+    finally:
+        shm.close()
+
+
+class SignalPipeline:
+    """
+    Process pool tabanlı sinyal değerlendirme aşaması
+
+    Kullanış:
+        pipeline = SignalPipeline()
+        candidates = pipeline.evaluate(fetch_batch())   # skora göre sıralı
+        pipeline.close()
+
+    max_workers=0 ise aynı process'te seri çalışır (debug).
+    """
+
+    def __init__(self, max_workers=None, deadline=CHECK_INTERVAL, chunk_size=4):
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        self.deadline = deadline
+        self.chunk_size = chunk_size
+        self._executor = None
+
+        self.metrics = {
+            "cycles": 0,
+            "symbols_evaluated": 0,
+            "symbols_dropped": 0,
+            "candidates": 0,
+            "pool_recycles": 0,
+            "last_duration_ms": 0
+        }
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _evaluate_serial(self, batch):
+        candidates = []
+        _, snapshots = build_snapshots(batch)
+        for i, symbol in enumerate(batch.symbols):
+            try:
+                candidate = evaluate_symbol(symbol, batch.to_dataframe(symbol), snapshots[i])
+            except Exception as e:
+                print(f"⚠️  Signal evaluation failed ({symbol}): {e}")
+                continue
+            if candidate:
+                candidates.append(candidate)
+        return candidates, len(batch.symbols), 0
+
+    def _evaluate_parallel(self, batch, deadline):
+        symbols = batch.symbols
+        shape = (len(SHARED_COLUMNS), len(symbols), batch.timestamps.shape[1])
+        shm = SharedMemory(create=True, size=max(8, int(np.prod(shape)) * 8))
+
+        try:
+            matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            for j, col in enumerate(SHARED_COLUMNS):
+                if col == "timestamp":
+                    matrix[j] = batch.timestamps
+                elif col in batch.ohlcv:
+                    matrix[j] = batch.ohlcv[col]
+                else:
+                    matrix[j] = batch.indicators[col]
+            del matrix
+
+            executor = self._get_executor()
+            expires_at = time.time() + deadline
+            futures = {}
+            for start in range(0, len(symbols), self.chunk_size):
+                chunk = symbols[start:start + self.chunk_size]
+                indices = list(range(start, start + len(chunk)))
+                future = executor.submit(_evaluate_chunk, shm.name, shape, chunk, indices, expires_at)
+                futures[future] = chunk
+
+            done, pending = wait(futures, timeout=deadline)
+
+            dropped = 0
+            running = 0
+            for future in pending:
+                if not future.cancel():
+                    running += 1
+                dropped += len(futures[future])
+            if running:
+                # Çalışan chunk'lar worker'ı tutar: yeni pool, eskisi deadline'da biter
+                self._recycle_executor()
+
+            candidates = []
+            for future in done:
+                try:
+                    chunk_candidates, evaluated = future.result()
+                except Exception as e:
+                    dropped += len(futures[future])
+                    print(f"⚠️  Signal worker failed: {e}")
+                    continue
+                candidates.extend(chunk_candidates)
+                dropped += len(futures[future]) - evaluated
+
+            return candidates, len(symbols) - dropped, dropped
+
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def evaluate(self, batch, deadline=None):
+        """
+        BatchIndicators içindeki tüm sembolleri değerlendir.
+
+        Returns:
+            list: Skora göre azalan sıralı aday listesi
+        """
+        start = time.time()
+        if not batch.symbols:
+            return []
+
+        if self.max_workers == 0:
+            candidates, evaluated, dropped = self._evaluate_serial(batch)
+        else:
+            candidates, evaluated, dropped = self._evaluate_parallel(
+                batch, self.deadline if deadline is None else deadline
+            )
+
+        candidates.sort(key=lambda c: (-c["score"], c["symbol"]))
+
+        self.metrics["cycles"] += 1
+        self.metrics["symbols_evaluated"] += evaluated
+        self.metrics["symbols_dropped"] += dropped
+        self.metrics["candidates"] += len(candidates)
+        self.metrics["last_duration_ms"] = (time.time() - start) * 1000
+
+        if dropped:
+            print(f"⏱️  Signal pipeline deadline: {dropped} symbols skipped this cycle")
+
+        return candidates
+
+    def _recycle_executor(self):
+        self.metrics["pool_recycles"] += 1
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -9,8 +9,9 @@ def compute_smart_trailing_stop(price, entry, direction, atr, lookback=10,
         activation_level = atr * activation_ratio
         
         if profit > activation_level:
-            if df is not None and len(df) >= lookback:
-                recent_low = df.iloc[-lookback:]["low"].min()
+            lows = None if df is None else np.asarray(df["low"])
+            if lows is not None and len(lows) >= lookback:
+                recent_low = lows[-lookback:].min()
                 trail_distance = (price - recent_low) * sensitivity
                 new_sl = price - trail_distance
                 return max(new_sl, entry - atr)
@@ -22,8 +23,9 @@ def compute_smart_trailing_stop(price, entry, direction, atr, lookback=10,
         activation_level = atr * activation_ratio
         
         if profit > activation_level:
-            if df is not None and len(df) >= lookback:
-                recent_high = df.iloc[-lookback:]["high"].max()
+            highs = None if df is None else np.asarray(df["high"])
+            if highs is not None and len(highs) >= lookback:
+                recent_high = highs[-lookback:].max()
                 trail_distance = (recent_high - price) * sensitivity
                 new_sl = price + trail_distance
                 return min(new_sl, entry + atr)
@@ -0,0 +1,260 @@
+# ================= STATE DELTA JOURNAL ENGINE =================
+# engine_state.json her save'de baştan yazılmak yerine snapshot olarak tutulur;
+# save'ler sadece değişen anahtarları engine_state.json.wal'a bir satır olarak
+# ekler (write-ahead delta journal). Her snapshot_every delta'da (ya da journal
+# max_journal_bytes'ı aşınca) tam snapshot atomik yazılır ve journal sıfırlanır.
+# Yükleme: snapshot + journal replay. Journal'ın ilk satırı ait olduğu
+# snapshot'ın hash'idir; snapshot dışarıdan değiştirildiyse journal yok sayılır.
+#
+# Tek yazıcı varsayılır (ana process); diğer process'ler sadece okur.
+# Aynı process'te load / save (örn. watchdog thread'i + ana döngü) tek lock
+# altında çalışır: load writer alanlarını (shadow / offset) günceller.
+# Yazma offset'i ve shadow dosyaya değil nesneye aittir: aynı dosya için
+# get_journal() ile process başına tek StateJournal kullanılır.
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+SNAPSHOT_EVERY = 100
+MAX_JOURNAL_BYTES = 1_000_000
+
+
+class StateJournal:
+    """
+    Snapshot + delta journal
+
+    Kullanış:
+        journal = get_journal("engine_state.json", on_snapshot=manager.create_backup)
+        state = journal.load()          # snapshot + delta replay (dosya yoksa None)
+        state["peak"] = 10500
+        journal.save(state)             # sadece {"peak": 10500, ...} eklenir
+
+    Değişen anahtarlar son yazılan state'in kopyasıyla (shadow) karşılaştırılarak
+    bulunur; dirty verilirse karşılaştırma sadece o anahtarlar için yapılır.
+    """
+
+    def __init__(self, state_file, journal_file=None, snapshot_every=SNAPSHOT_EVERY,
+                 max_journal_bytes=MAX_JOURNAL_BYTES, on_snapshot=None):
+        self.state_file = state_file
+        self.journal_file = journal_file or state_file + ".wal"
+        self.snapshot_every = snapshot_every
+        self.max_journal_bytes = max_journal_bytes
+        self.on_snapshot = on_snapshot
+
+        # Diskteki state'in kopyası (None: bilinmiyor -> sonraki save snapshot)
+        self.shadow = None
+        self.deltas = 0
+        self.journal_offset = 0
+        # load / save / snapshot (snapshot save içinden çağrılır)
+        self.lock = threading.RLock()
+
+        self.metrics = {
+            "saves": 0,
+            "deltas_written": 0,
+            "keys_written": 0,
+            "snapshots": 0,
+            "bytes_written": 0,
+            "deltas_replayed": 0,
+            "journals_discarded": 0
+        }
+
+    # ===== OKUMA =====
+    def _read_journal(self, snapshot_hash):
+        """(delta listesi, son tam satırın bitiş offset'i); hash tutmazsa ([], None)"""
+        try:
+            with open(self.journal_file, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return [], None
+
+        deltas = []
+        offset = 0
+        for i, line in enumerate(data.split(b"\n")[:-1]):
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("journal record is not an object")
+            except ValueError:
+                # JSONDecodeError / UnicodeDecodeError: yarım ya da bozuk kuyruk
+                print(f"⚠️  Corrupt state journal line {i} - replay stopped: {self.journal_file}")
+                if i == 0:
+                    return [], None
+                break
+            if i == 0:
+                if record.get("snapshot") != snapshot_hash:
+                    self.metrics["journals_discarded"] += 1
+                    print(f"⚠️  State journal does not match snapshot - ignoring {self.journal_file}")
+                    return [], None
+            else:
+                deltas.append(record)
+            offset += len(line) + 1
+        # Son satır yarım kaldıysa (crash / eşzamanlı yazma) yok sayılır
+        return deltas, offset
+
+    def load(self):
+        """
+        Snapshot + delta replay
+
+        Returns:
+            dict ya da state dosyası yoksa None (bozuk snapshot: JSONDecodeError)
+        """
+        with self.lock:
+            return self._load()
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            self.shadow = None
+            return None
+
+        with open(self.state_file, "rb") as f:
+            data = f.read()
+        state = json.loads(data)
+        if not isinstance(state, dict):
+            self.shadow = None
+            return state
+
+        deltas, offset = self._read_journal(hashlib.sha1(data).hexdigest())
+        for delta in deltas:
+            state.update(delta.get("set", {}))
+            for key in delta.get("del", ()):
+                state.pop(key, None)
+        self.metrics["deltas_replayed"] += len(deltas)
+
+        if offset is not None:
+            self.shadow = copy.deepcopy(state)
+            self.deltas = len(deltas)
+            self.journal_offset = offset
+        else:
+            # Journal yok / geçersiz: sonraki save tam snapshot yazar
+            self.shadow = None
+        return state
+
+    # ===== YAZMA =====
+    def snapshot(self, state):
+        """Tam state'i atomik yaz, journal'ı bu snapshot'a bağlı olarak sıfırla"""
+        with self.lock:
+            self._snapshot(state)
+
+    def _snapshot(self, state):
+        data = json.dumps(state, indent=2).encode()
+
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        fd, temp_path = tempfile.mkstemp(suffix=".json", prefix="state_", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.state_file)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        header = (json.dumps({"snapshot": hashlib.sha1(data).hexdigest()}) + "\n").encode()
+        fd, temp_path = tempfile.mkstemp(suffix=".wal", prefix="state_", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+        os.replace(temp_path, self.journal_file)
+
+        self.shadow = copy.deepcopy(state)
+        self.deltas = 0
+        self.journal_offset = len(header)
+        self.metrics["snapshots"] += 1
+        self.metrics["bytes_written"] += len(data) + len(header)
+
+        if self.on_snapshot is not None:
+            self.on_snapshot(state)
+
+    def _diff(self, state, dirty):
+        keys = state.keys() if dirty is None else [k for k in dirty if k in state]
+        changed = {
+            key: state[key] for key in keys
+            if key not in self.shadow or self.shadow[key] != state[key]
+        }
+        removed = [key for key in self.shadow if key not in state]
+        return changed, removed
+
+    def save(self, state, dirty=None):
+        """
+        Değişen anahtarları journal'a ekle (gerekirse snapshot al).
+
+        Args:
+            dirty: Değiştiği bilinen anahtarlar (None: tüm anahtarlar karşılaştırılır)
+        """
+        with self.lock:
+            self._save(state, dirty)
+
+    def _save(self, state, dirty):
+        self.metrics["saves"] += 1
+
+        if (self.shadow is None or self.deltas >= self.snapshot_every
+                or self.journal_offset >= self.max_journal_bytes):
+            self.snapshot(state)
+            return
+
+        changed, removed = self._diff(state, dirty)
+        if not changed and not removed:
+            return
+
+        record = {"set": changed}
+        if removed:
+            record["del"] = removed
+        line = (json.dumps(record) + "\n").encode()
+
+        # Bilinen son tam satırın üzerine yaz: yarım kalmış kuyruk varsa silinir
+        try:
+            with open(self.journal_file, "r+b") as f:
+                f.seek(self.journal_offset)
+                f.write(line)
+                f.truncate()
+        except FileNotFoundError:
+            self.snapshot(state)
+            return
+
+        self.journal_offset += len(line)
+        self.deltas += 1
+        for key, value in changed.items():
+            self.shadow[key] = copy.deepcopy(value)
+        for key in removed:
+            del self.shadow[key]
+
+        self.metrics["deltas_written"] += 1
+        self.metrics["keys_written"] += len(changed) + len(removed)
+        self.metrics["bytes_written"] += len(line)
+
+
+# ================= PAYLAŞILAN JOURNAL'LAR =================
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(state_file, on_snapshot=None, **kwargs):
+    """
+    Dosya başına tek StateJournal (birden çok StateManager aynı dosyayı paylaşır)
+
+    on_snapshot: journal'da henüz yoksa atanır (ilk kayıtlı backup callback'i kalır)
+    """
+    key = os.path.abspath(state_file)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = StateJournal(state_file, on_snapshot=on_snapshot, **kwargs)
+            _journals[key] = journal
+        elif journal.on_snapshot is None:
+            journal.on_snapshot = on_snapshot
+        return journal
+
+
+def _reset_locks_after_fork():
+    # Fork anında başka thread'de tutulan lock child'da hiç bırakılmaz
+    global _journals_lock
+    _journals_lock = threading.Lock()
+    for journal in _journals.values():
+        journal.lock = threading.RLock()
+
+
+os.register_at_fork(after_in_child=_reset_locks_after_fork)
@@ -3,12 +3,13 @@ import json
 import os
 import time
 from datetime import datetime
-import tempfile
+
+from state_journal_engine import get_journal
 
 class StateManager:
     """
     Crash-safe state management.
-    - Atomic writes (temp file + os.replace)
+    - Delta journal (sadece değişen anahtarlar) + periyodik atomik snapshot
     - Checksum verification
     - Backup history
     - Recovery point creation
@@ -18,9 +19,11 @@ class StateManager:
         self.state_file = state_file
         self.backup_dir = backup_dir
         self.recovery_file = "recovery_checkpoint.json"
+        self.journal = get_journal(state_file, on_snapshot=self.create_backup)
         
         if not os.path.exists(backup_dir):
             os.makedirs(backup_dir)
+        self.backups = self._list_backups()
     
     def load_state(self):
         """Crash-safe state yükle"""
@@ -34,8 +37,7 @@ class StateManager:
                 return state
             
             if os.path.exists(self.state_file):
-                with open(self.state_file, "r") as f:
-                    state = json.load(f)
+                state = self.journal.load()
                 print(f"✅ State loaded successfully from engine_state.json")
                 return state
             else:
@@ -62,16 +64,8 @@ class StateManager:
             state["last_save"] = datetime.now().isoformat()
             state["save_count"] = state.get("save_count", 0) + 1
             
-            fd, temp_path = tempfile.mkstemp(suffix=".json", prefix="state_")
-            try:
-                with os.fdopen(fd, "w") as f:
-                    json.dump(state, f, indent=2)
-                
-                os.replace(temp_path, self.state_file)
-                return True
-            except Exception as e:
-                os.unlink(temp_path)
-                raise e
+            self.journal.save(state)
+            return True
         
         except Exception as e:
             print(f"❌ State save error: {e}")
@@ -107,6 +101,9 @@ class StateManager:
             with open(backup_file, "w") as f:
                 json.dump(state, f, indent=2)
             
+            name = os.path.basename(backup_file)
+            if name not in self.backups:
+                self.backups.append(name)
             self._cleanup_old_backups()
             return True
         
@@ -114,19 +111,21 @@ class StateManager:
             print(f"❌ Backup error: {e}")
             return False
     
+    def _list_backups(self):
+        """Backup dosya adları (eskiden yeniye)"""
+        return sorted([
+            f for f in os.listdir(self.backup_dir)
+            if f.startswith("state_backup_")
+        ])
+    
     def _cleanup_old_backups(self, keep=10):
         """Eski backup'ları sil"""
-        try:
-            backups = sorted([
-                f for f in os.listdir(self.backup_dir)
-                if f.startswith("state_backup_")
-            ])
-            
-            if len(backups) > keep:
-                for old_backup in backups[:-keep]:
-                    os.remove(os.path.join(self.backup_dir, old_backup))
-        except Exception as e:
-            pass
+        while len(self.backups) > keep:
+            old_backup = self.backups.pop(0)
+            try:
+                os.remove(os.path.join(self.backup_dir, old_backup))
+            except Exception as e:
+                pass
     
     def _recover_from_backup(self):
         """Son backup'tan recovery yap"""
@@ -175,10 +174,8 @@ class StateManager:
         status = {
             "main_state_exists": os.path.exists(self.state_file),
             "recovery_checkpoint_exists": os.path.exists(self.recovery_file),
-            "backup_count": len([
-                f for f in os.listdir(self.backup_dir)
-                if f.startswith("state_backup_")
-            ]) if os.path.exists(self.backup_dir) else 0
+            "backup_count": len(self.backups),
+            "state_journal": self.journal.metrics
         }
         return status
 
@@ -190,9 +187,8 @@ def load_state():
     return state_manager.load_state()
 
 def save_state(state):
-    """Save state wrapper"""
+    """Save state wrapper (backup snapshot alındığında yazılır)"""
     state_manager.save_state(state)
-    state_manager.create_backup(state)
 
 def create_recovery_checkpoint(state):
     """Create recovery checkpoint wrapper"""
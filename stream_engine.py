@@ -0,0 +1,631 @@
+# ================= WEBSOCKET STREAM ENGINE =================
+# Fiyat, pozisyon, emir fill'i ve stop durumu REST ile poll ediliyordu
+# (fetch_ticker / fetch_positions / fetch_open_orders / sleep + fetch_last_trade).
+# StreamClient Binance Futures market (kline + mark price) ve user-data
+# (ORDER_TRADE_UPDATE + ACCOUNT_UPDATE) stream'lerine abone olur, yerel emir
+# ve pozisyon defterlerini tutar ve olayları lifecycle / stop motorlarına iter.
+# Fill tespiti saniyelerden milisaniyelere iner; REST sadece bağlantı
+# kurulurken defterleri doldurmak (seed) için kullanılır.
+#
+# Stream kendi asyncio loop'unda daemon thread'de çalışır; defterler lock
+# altındadır, ana thread'den senkron okunur. Bağlantı koparsa artan
+# bekleme ile yeniden bağlanır ve defterleri yeniden seed eder.
+#
+# FakeStreamServer testlerde exchange'in yerine geçen yerel stream sunucusudur.
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+import aiohttp
+from aiohttp import web
+
+MARKET_STREAM_URL = "wss://fstream.binance.com/stream"
+USER_STREAM_URL = "wss://fstream.binance.com/ws"
+
+KEEPALIVE_INTERVAL = 30 * 60   # listenKey 60 dk'da düşer
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+FILL_HISTORY = 1000
+
+# Binance emir durumu -> ccxt durumu
+ORDER_STATUS = {
+    "NEW": "open",
+    "PARTIALLY_FILLED": "open",
+    "FILLED": "closed",
+    "CANCELED": "canceled",
+    "EXPIRED": "expired",
+    "REJECTED": "rejected",
+}
+
+
+def market_id(symbol):
+    """'BTC/USDT' / 'BTC/USDT:USDT' -> 'BTCUSDT'"""
+    return symbol.split(":")[0].replace("/", "").upper()
+
+
+def _float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_order_update(data, symbol):
+    """ORDER_TRADE_UPDATE.o -> ccxt benzeri emir dict'i"""
+    return {
+        "id": str(data.get("i")),
+        "clientOrderId": data.get("c"),
+        "symbol": symbol,
+        "type": str(data.get("o", "")).lower(),
+        "side": str(data.get("S", "")).lower(),
+        "status": ORDER_STATUS.get(data.get("X"), str(data.get("X", "")).lower()),
+        "amount": _float(data.get("q")),
+        "filled": _float(data.get("z")),
+        "price": _float(data.get("p")),
+        "average": _float(data.get("ap")),
+        "stopPrice": _float(data.get("sp")),
+        "reduceOnly": bool(data.get("R")),
+        "lastFillPrice": _float(data.get("L")),
+        "lastFillQty": _float(data.get("l")),
+        "execution": data.get("x"),
+        "timestamp": data.get("T"),
+        "info": data,
+    }
+
+
+def parse_position(data, symbol):
+    """ACCOUNT_UPDATE.a.P[] -> ccxt benzeri pozisyon dict'i"""
+    amount = _float(data.get("pa"))
+    return {
+        "symbol": symbol,
+        "contracts": abs(amount),
+        "side": "long" if amount > 0 else "short" if amount < 0 else None,
+        "entryPrice": _float(data.get("ep")),
+        "unrealizedPnl": _float(data.get("up")),
+        "info": {"positionAmt": data.get("pa"), "averagePrice": data.get("ep"),
+                 "positionSide": data.get("ps")},
+    }
+
+
+class StreamClient:
+    """
+    Binance Futures market + user-data stream istemcisi
+
+    Kullanış:
+        stream = StreamClient(binance, SYMBOLS, timeframes=["1m"])
+        stream.on("order", stop_manager.on_order_update)
+        stream.start()
+        stream.mark_price("BTC/USDT")
+        stream.wait_for_fill(symbol="BTC/USDT", order_id=order["id"], timeout=2)
+
+    Olaylar (callback'ler stream thread'inde çağrılır):
+        "order"      -> emir dict'i (her ORDER_TRADE_UPDATE)
+        "fill"       -> emir dict'i (execution TRADE)
+        "position"   -> pozisyon dict'i (ACCOUNT_UPDATE)
+        "mark_price" -> (symbol, price)
+        "kline"      -> (symbol, timeframe, kline dict)
+    """
+
+    def __init__(self, binance=None, symbols=(), timeframes=("1m",),
+                 market_url=MARKET_STREAM_URL, user_url=USER_STREAM_URL,
+                 listen_key_func=None, keepalive_func=None,
+                 keepalive_interval=KEEPALIVE_INTERVAL, user_data=True,
+                 reconnect_delay=RECONNECT_DELAY, max_reconnect_delay=MAX_RECONNECT_DELAY):
+        """
+        Args:
+            binance: Seed (REST) ve listenKey için ccxt client (None: seed yok)
+            symbols: Market stream'i ve emir defteri tutulacak semboller
+            timeframes: Abone olunacak kline timeframe'leri
+            listen_key_func / keepalive_func: listenKey al / uzat (None: binance fapi)
+            user_data: User-data stream'ine bağlanılsın mı
+        """
+        self.binance = binance
+        self.symbols = list(symbols)
+        self.timeframes = list(timeframes)
+        self.market_url = market_url
+        self.user_url = user_url
+        self.listen_key_func = listen_key_func or self._create_listen_key
+        self.keepalive_func = keepalive_func or self._keepalive_listen_key
+        self.keepalive_interval = keepalive_interval
+        self.user_data = user_data
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.symbol_map = {market_id(s): s for s in self.symbols}
+
+        # ===== YEREL DEFTERLER (lock altında) =====
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.orders = {}            # symbol -> {order_id: order}
+        self.order_symbols = set()  # açık emirleri eksiksiz bilinen semboller
+        self.positions = {}         # symbol -> pozisyon
+        self.balances = {}          # asset -> {"wallet", "cross"}
+        self.mark_prices = {}       # symbol -> (price, event_time)
+        self.klines = {}            # (symbol, timeframe) -> kline
+        self.fills = deque(maxlen=FILL_HISTORY)   # (received_at, order)
+        self.version = 0            # defter her değiştiğinde artar
+        self.connected = {"market": False, "user": False}
+        self.seeded = False
+
+        self.listeners = {}
+        self.loop = None
+        self.thread = None
+        self.tasks = []
+
+        self.metrics = {
+            "messages": 0,
+            "order_updates": 0,
+            "fills": 0,
+            "account_updates": 0,
+            "mark_prices": 0,
+            "klines": 0,
+            "reconnects": 0,
+            "errors": 0,
+            "callback_errors": 0,
+            "seeds": 0,
+            "last_fill_latency_ms": None
+        }
+
+    # ===== OLAYLAR =====
+    def on(self, event, callback):
+        self.listeners.setdefault(event, []).append(callback)
+        return callback
+
+    def _emit(self, event, *args):
+        for callback in self.listeners.get(event, ()):
+            try:
+                callback(*args)
+            except Exception as e:
+                self.metrics["callback_errors"] += 1
+                print(f"⚠️  Stream callback error ({event}): {e}")
+
+    def _symbol(self, raw):
+        return self.symbol_map.get(raw, raw)
+
+    # ===== MESAJ İŞLEME =====
+    def handle_market(self, message):
+        """Combined stream mesajı: {"stream": ..., "data": {...}}"""
+        data = message.get("data", message)
+        event = data.get("e")
+        symbol = self._symbol(data.get("s"))
+        self.metrics["messages"] += 1
+
+        if event == "markPriceUpdate":
+            price = _float(data.get("p"))
+            with self.lock:
+                self.mark_prices[symbol] = (price, data.get("E"))
+            self.metrics["mark_prices"] += 1
+            self._emit("mark_price", symbol, price)
+
+        elif event == "kline":
+            k = data.get("k", {})
+            kline = {
+                "timestamp": k.get("t"), "open": _float(k.get("o")), "high": _float(k.get("h")),
+                "low": _float(k.get("l")), "close": _float(k.get("c")),
+                "volume": _float(k.get("v")), "closed": bool(k.get("x")),
+            }
+            with self.lock:
+                self.klines[(symbol, k.get("i"))] = kline
+            self.metrics["klines"] += 1
+            self._emit("kline", symbol, k.get("i"), kline)
+
+    def handle_user(self, data):
+        """User-data olayı: ORDER_TRADE_UPDATE / ACCOUNT_UPDATE / listenKeyExpired"""
+        event = data.get("e")
+        self.metrics["messages"] += 1
+
+        if event == "ORDER_TRADE_UPDATE":
+            raw = data.get("o", {})
+            order = parse_order_update(raw, self._symbol(raw.get("s")))
+            is_fill = order["execution"] == "TRADE"
+            with self.changed:
+                book = self.orders.setdefault(order["symbol"], {})
+                if order["status"] == "open":
+                    book[order["id"]] = order
+                else:
+                    book.pop(order["id"], None)
+                if is_fill:
+                    self.fills.append((time.time(), order))
+                    if order["timestamp"]:
+                        self.metrics["last_fill_latency_ms"] = time.time() * 1000 - order["timestamp"]
+                self.version += 1
+                self.changed.notify_all()
+            self.metrics["order_updates"] += 1
+            self._emit("order", order)
+            if is_fill:
+                self.metrics["fills"] += 1
+                self._emit("fill", order)
+
+        elif event == "ACCOUNT_UPDATE":
+            account = data.get("a", {})
+            updated = []
+            with self.changed:
+                for raw in account.get("P", ()):
+                    position = parse_position(raw, self._symbol(raw.get("s")))
+                    self.positions[position["symbol"]] = position
+                    updated.append(position)
+                for raw in account.get("B", ()):
+                    self.balances[raw.get("a")] = {
+                        "wallet": _float(raw.get("wb")), "cross": _float(raw.get("cw"))
+                    }
+                self.version += 1
+                self.changed.notify_all()
+            self.metrics["account_updates"] += 1
+            for position in updated:
+                self._emit("position", position)
+
+        elif event == "listenKeyExpired":
+            raise ConnectionResetError("listenKey expired")
+
+    # ===== SEED (REST) =====
+    def seed_orders(self, symbol, orders):
+        """Sembolün açık emirlerini REST sonucuyla değiştir"""
+        with self.changed:
+            self.orders[symbol] = {
+                str(o["id"]): dict(o) for o in orders
+                if o.get("status", "open") == "open"
+            }
+            self.order_symbols.add(symbol)
+            self.version += 1
+
+    def seed(self):
+        """Bağlantı sonrası defterleri REST ile doldur (binance yoksa sadece işaretle)"""
+        if self.binance is not None:
+            positions = self.binance.fetch_positions()
+            with self.changed:
+                self.positions = {}
+                for p in positions:
+                    symbol = self._symbol(market_id(p["symbol"]))
+                    self.positions[symbol] = dict(p, symbol=symbol)
+                self.version += 1
+            symbols = set(self.symbols) | {
+                symbol for symbol, p in self.positions.items() if _float(p.get("contracts")) != 0
+            }
+            for symbol in sorted(symbols):
+                self.seed_orders(symbol, self.binance.fetch_open_orders(symbol))
+        else:
+            with self.lock:
+                self.order_symbols.update(self.symbols)
+        self.seeded = True
+        self.metrics["seeds"] += 1
+
+    def _create_listen_key(self):
+        return self.binance.fapiPrivatePostListenKey()["listenKey"]
+
+    def _keepalive_listen_key(self):
+        self.binance.fapiPrivatePutListenKey()
+
+    # ===== OKUMA =====
+    def is_live(self):
+        """User-data stream bağlı ve defterler seed edilmiş mi"""
+        return self.connected["user"] and self.seeded
+
+    def mark_price(self, symbol):
+        with self.lock:
+            entry = self.mark_prices.get(symbol)
+        return entry[0] if entry else None
+
+    def last_kline(self, symbol, timeframe):
+        with self.lock:
+            return self.klines.get((symbol, timeframe))
+
+    def get_positions(self):
+        with self.lock:
+            return [dict(p) for p in self.positions.values()]
+
+    def get_open_orders(self, symbol):
+        """Sembolün açık emirleri; sembolün defteri eksiksiz değilse None"""
+        with self.lock:
+            if symbol not in self.order_symbols:
+                return None
+            return [dict(o) for o in self.orders.get(symbol, {}).values()]
+
+    def get_balance(self):
+        with self.lock:
+            return {asset: dict(b) for asset, b in self.balances.items()}
+
+    def wait_for_fill(self, symbol=None, order_id=None, since=None, timeout=2.0):
+        """
+        Eşleşen ilk fill'i bekle (polling yok; Condition ile uyanır)
+
+        Args:
+            since: Bu zamandan (time.time) önce alınan fill'ler sayılmaz
+        Returns:
+            emir dict'i ya da timeout'ta None
+        """
+        since = since or 0
+        deadline = time.monotonic() + timeout
+
+        def match():
+            for received_at, order in reversed(self.fills):
+                if received_at < since:
+                    break
+                if symbol is not None and order["symbol"] != symbol:
+                    continue
+                if order_id is not None and order["id"] != str(order_id):
+                    continue
+                return order
+            return None
+
+        with self.changed:
+            while True:
+                order = match()
+                remaining = deadline - time.monotonic()
+                if order is not None or remaining <= 0:
+                    return order
+                self.changed.wait(remaining)
+
+    # ===== BAĞLANTI =====
+    def _market_streams(self):
+        return [
+            stream
+            for symbol in self.symbols
+            for stream in [f"{market_id(symbol).lower()}@markPrice@1s"]
+            + [f"{market_id(symbol).lower()}@kline_{tf}" for tf in self.timeframes]
+        ]
+
+    async def _run_socket(self, name, url_func, handler, on_connect=None):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                url = await self.loop.run_in_executor(None, url_func)
+                async with self.session.ws_connect(url, heartbeat=30) as ws:
+                    self.connected[name] = True
+                    delay = self.reconnect_delay
+                    if on_connect is not None:
+                        # Seed sırasında gelen mesajlar ws kuyruğunda bekler
+                        await self.loop.run_in_executor(None, on_connect)
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            handler(json.loads(msg.data))
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print(f"⚠️  {name} stream error: {e}")
+
+            self.connected[name] = False
+            if name == "user":
+                self.seeded = False
+            self.metrics["reconnects"] += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self.loop.run_in_executor(None, self.keepalive_func)
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print(f"⚠️  listenKey keepalive failed: {e}")
+
+    async def _main(self):
+        self.session = aiohttp.ClientSession()
+        try:
+            coros = []
+            streams = self._market_streams()
+            if streams:
+                url = f"{self.market_url}?streams=" + "/".join(streams)
+                coros.append(self._run_socket("market", lambda: url, self.handle_market))
+            if self.user_data:
+                coros.append(self._run_socket(
+                    "user", lambda: f"{self.user_url}/{self.listen_key_func()}",
+                    self.handle_user, on_connect=self.seed
+                ))
+                coros.append(self._keepalive())
+            self.tasks = [asyncio.ensure_future(c) for c in coros]
+            await asyncio.gather(*self.tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.session.close()
+
+    def start(self):
+        """Stream thread'ini başlat"""
+        if self.thread is not None:
+            return self.thread
+        self.loop = asyncio.new_event_loop()
+        self.main_task = None
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.main_task = self.loop.create_task(self._main())
+            self.loop.run_until_complete(self.main_task)
+
+        self.thread = threading.Thread(target=run, daemon=True, name="StreamThread")
+        self.thread.start()
+        print(f"📡 Stream client started ({len(self.symbols)} symbols)")
+        return self.thread
+
+    def wait_until_live(self, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while not self.is_live():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout=5.0):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(lambda: self.main_task and self.main_task.cancel())
+        self.thread.join(timeout)
+        self.loop.close()
+        self.thread = None
+        self.connected = {"market": False, "user": False}
+        self.seeded = False
+
+    def get_status(self):
+        return {
+            "connected": dict(self.connected),
+            "live": self.is_live(),
+            "version": self.version,
+            "metrics": self.metrics
+        }
+
+
+def connect_engines(stream, stop_manager=None, trade_lifecycle=None, order_gateway=None):
+    """Emir olaylarını stop, lifecycle ve gateway motorlarına bağla"""
+    if order_gateway is not None:
+        stream.on("order", order_gateway.on_order_update)
+    if stop_manager is not None:
+        stream.on("order", stop_manager.on_order_update)
+    if trade_lifecycle is not None:
+        stream.on("order", trade_lifecycle.on_order_update)
+    return stream
+
+
+# ================= FAKE STREAM SERVER (test) =================
+class FakeStreamServer:
+    """
+    Yerel Binance Futures stream sunucusu (testlerde exchange yerine)
+
+    Kullanış:
+        server = FakeStreamServer().start()
+        stream = StreamClient(symbols=["BTC/USDT"], market_url=server.market_url,
+                              user_url=server.user_url, listen_key_func=lambda: "test")
+        server.push_user(order_trade_update("BTCUSDT", 1, "FILLED", ...))
+        server.stop()
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.market_clients = set()
+        self.user_clients = set()
+        self.subscriptions = []
+        self.listen_keys = []
+        self.loop = None
+        self.thread = None
+
+    async def _market(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.subscriptions.append(request.query.get("streams", "").split("/"))
+        self.market_clients.add(ws)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self.market_clients.discard(ws)
+        return ws
+
+    async def _user(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.listen_keys.append(request.match_info["listen_key"])
+        self.user_clients.add(ws)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self.user_clients.discard(ws)
+        return ws
+
+    def start(self):
+        ready = threading.Event()
+        self.loop = asyncio.new_event_loop()
+
+        async def setup():
+            app = web.Application()
+            app.router.add_get("/stream", self._market)
+            app.router.add_get("/ws/{listen_key}", self._user)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, self.host, self.port)
+            await site.start()
+            self.port = site._server.sockets[0].getsockname()[1]
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(setup())
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True, name="FakeStreamServer")
+        self.thread.start()
+        ready.wait(5)
+        return self
+
+    @property
+    def market_url(self):
+        return f"ws://{self.host}:{self.port}/stream"
+
+    @property
+    def user_url(self):
+        return f"ws://{self.host}:{self.port}/ws"
+
+    def _run(self, coro, timeout=5):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def _send(self, clients, payload):
+        text = json.dumps(payload)
+        for ws in list(clients):
+            await ws.send_str(text)
+
+    def push_market(self, stream, data):
+        self._run(self._send(self.market_clients, {"stream": stream, "data": data}))
+
+    def push_user(self, event):
+        self._run(self._send(self.user_clients, event))
+
+    def drop_connections(self):
+        """Tüm bağlantıları kapat (reconnect testi)"""
+        async def close_all():
+            for ws in list(self.market_clients | self.user_clients):
+                await ws.close()
+        self._run(close_all())
+
+    def stop(self):
+        if self.loop is None:
+            return
+        self._run(self.runner.cleanup())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        self.loop = None
+
+
+def order_trade_update(symbol_id, order_id, status, order_type="MARKET", side="BUY",
+                       qty=1.0, filled=None, price=0.0, avg_price=None, stop_price=0.0,
+                       reduce_only=False, execution=None, trade_time=None):
+    """Fake ORDER_TRADE_UPDATE olayı"""
+    if filled is None:
+        filled = qty if status == "FILLED" else 0.0
+    if execution is None:
+        execution = "TRADE" if filled else "CANCELED" if status == "CANCELED" else "NEW"
+    now = trade_time or int(time.time() * 1000)
+    return {
+        "e": "ORDER_TRADE_UPDATE", "E": now, "T": now,
+        "o": {
+            "s": symbol_id, "c": f"fake_{order_id}", "S": side, "o": order_type,
+            "q": str(qty), "p": str(price), "ap": str(avg_price if avg_price is not None else price),
+            "sp": str(stop_price), "x": execution, "X": status, "i": order_id,
+            "l": str(filled), "z": str(filled), "L": str(avg_price if avg_price is not None else price),
+            "T": now, "R": reduce_only,
+        },
+    }
+
+
+def account_update(positions=(), balances=()):
+    """Fake ACCOUNT_UPDATE: positions [(symbol_id, amount, entry)], balances [(asset, wallet)]"""
+    now = int(time.time() * 1000)
+    return {
+        "e": "ACCOUNT_UPDATE", "E": now, "T": now,
+        "a": {
+            "m": "ORDER",
+            "B": [{"a": a, "wb": str(w), "cw": str(w)} for a, w in balances],
+            "P": [{"s": s, "pa": str(amt), "ep": str(ep), "up": "0", "ps": "BOTH"}
+                  for s, amt, ep in positions],
+        },
+    }
+
+
+def mark_price_update(symbol_id, price):
+    return {"e": "markPriceUpdate", "E": int(time.time() * 1000), "s": symbol_id, "p": str(price)}
@@ -1,9 +1,13 @@
 import numpy as np
 
+from batch_indicator_engine import rolling_extreme
+
+
 def detect_support_resistance(df, lookback=50):
 
-    highs = df["high"].values[-lookback:]
-    lows = df["low"].values[-lookback:]
+    # DataFrame ya da kolon view sözlüğü (ring buffer / BatchIndicators.view)
+    highs = np.asarray(df["high"])[-lookback:]
+    lows = np.asarray(df["low"])[-lookback:]
 
     resistance = np.max(highs[:-5])
     support = np.min(lows[:-5])
@@ -11,26 +15,44 @@ def detect_support_resistance(df, lookback=50):
     return support, resistance
 
 
-def detect_break_and_retest(df, direction):
+def _break(direction, prev_close, close, support, resistance):
+    # LONG → resistance kırılımı + kapanış üstünde
+    if direction == "LONG":
+        return (prev_close <= resistance) & (close > resistance)
 
-    support, resistance = detect_support_resistance(df)
+    # SHORT → support kırılımı + kapanış altında
+    if direction == "SHORT":
+        return (prev_close >= support) & (close < support)
 
-    last = df.iloc[-1]
-    prev = df.iloc[-2]
+    return np.zeros(np.shape(close), dtype=bool)
 
-    close = last["close"]
-    prev_close = prev["close"]
 
-    # LONG → resistance kırılımı + kapanış üstünde
-    if direction == "LONG":
+def break_retest_signals(df, direction, lookback=50):
+    """
+    Her bar için detect_break_and_retest sonucu (bool dizisi) tek vektörel geçişte.
 
-        if prev_close <= resistance and close > resistance:
-            return True
+    Bar i: destek/direnç [i-lookback+1, i-5] aralığından (ilk 5 bar False).
+    """
+    highs = np.asarray(df["high"], dtype=np.float64)
+    lows = np.asarray(df["low"], dtype=np.float64)
+    closes = np.asarray(df["close"], dtype=np.float64)
+    n = len(closes)
 
-    # SHORT → support kırılımı + kapanış altında
-    if direction == "SHORT":
+    signals = np.zeros(n, dtype=bool)
+    if n <= 5:
+        return signals
+
+    resistance = rolling_extreme(highs, lookback - 5, np.maximum)[:n - 5]
+    support = rolling_extreme(lows, lookback - 5, np.minimum)[:n - 5]
+
+    signals[5:] = _break(direction, closes[4:n - 1], closes[5:], support, resistance)
+    return signals
+
+
+def detect_break_and_retest(df, direction):
+
+    support, resistance = detect_support_resistance(df)
 
-        if prev_close >= support and close < support:
-            return True
+    closes = np.asarray(df["close"])
 
-    return False
\ No newline at end of file
+    return bool(_break(direction, closes[-2], closes[-1], support, resistance))
@@ -1,41 +1,79 @@
-def detect_trend(df):
-    """
-    Market Structure (Asıl Temel) ve EMA hibrit trend analizi.
-    HH/HL (BOS) + EMA dizilimi ile en kaliteli yönü bulur.
-    """
-    if len(df) < 50: return None
-
-    last = df.iloc[-1]
-    prev = df.iloc[-2]
-    
-    # 1. Zirve ve Dip Takibi (Basit HH/LL Kontrolü)
-    recent_highs = df["high"].iloc[-20:-1].max()
-    recent_lows = df["low"].iloc[-20:-1].min()
-    
+import numpy as np
+
+from batch_indicator_engine import rolling_extreme
+from feature_snapshot_engine import feature_snapshot
+
+# trend_signals kodları (ilk 49 bar, geçmiş yetersiz: 0)
+TREND_CODES = {"STRONG_LONG": 2, "LONG": 1, "NEUTRAL": 0, "SHORT": -1, "STRONG_SHORT": -2}
+TREND_LABELS = {code: label for label, code in TREND_CODES.items()}
+MIN_BARS = 50
+
+
+def _trend(close, ema20, ema50, ema200, recent_highs, recent_lows):
     # --- BULLISH STRUCTURE (BOS) ---
     # Fiyat son 20 mumun zirvesini kırdıysa (BOS) ve EMA'lar destekliyorsa
-    is_bullish_bos = last["close"] > recent_highs
-    is_ema_bullish = last["ema20"] > last["ema50"]
-    
+    is_bullish_bos = close > recent_highs
+    is_ema_bullish = ema20 > ema50
+
     # --- BEARISH STRUCTURE (BOS) ---
     # Fiyat son 20 mumun dibini kırdıysa (BOS) ve EMA'lar destekliyorsa
-    is_bearish_bos = last["close"] < recent_lows
-    is_ema_bearish = last["ema20"] < last["ema50"]
+    is_bearish_bos = close < recent_lows
+    is_ema_bearish = ema20 < ema50
 
     # 2. KARAR MEKANİZMASI
-    # Strong Long: Hem EMA dizilimi mükemmel hem de BOS (Zirve Kırılımı) var
-    if is_bullish_bos and last["ema20"] > last["ema50"] > last["ema200"]:
-        return "STRONG_LONG"
-    
-    # Strong Short: Hem EMA dizilimi mükemmel hem de BOS (Dip Kırılımı) var
-    elif is_bearish_bos and last["ema20"] < last["ema50"] < last["ema200"]:
-        return "STRONG_SHORT"
-    
-    # Normal Trend: Sadece EMA dizilimi yeterli
-    elif is_ema_bullish:
-        return "LONG"
-    
-    elif is_ema_bearish:
-        return "SHORT"
-    
-    return "NEUTRAL"
\ No newline at end of file
+    return np.select(
+        [
+            # Strong Long: Hem EMA dizilimi mükemmel hem de BOS (Zirve Kırılımı) var
+            is_bullish_bos & is_ema_bullish & (ema50 > ema200),
+            # Strong Short: Hem EMA dizilimi mükemmel hem de BOS (Dip Kırılımı) var
+            is_bearish_bos & is_ema_bearish & (ema50 < ema200),
+            # Normal Trend: Sadece EMA dizilimi yeterli
+            is_ema_bullish,
+            is_ema_bearish
+        ],
+        [2, -2, 1, -1],
+        0
+    )
+
+
+def trend_signals(df):
+    """
+    Her bar için detect_trend kodu (int8, TREND_CODES) tek vektörel geçişte.
+    df: DataFrame ya da kolon sözlüğü (indikatörler dahil, dropna uygulanmış)
+    """
+    highs = np.asarray(df["high"], dtype=np.float64)
+    lows = np.asarray(df["low"], dtype=np.float64)
+    n = len(highs)
+
+    # 1. Zirve ve Dip Takibi: bar i için [i-19, i-1] aralığı (iloc[-20:-1])
+    recent_highs = np.full(n, np.nan)
+    recent_lows = np.full(n, np.nan)
+    recent_highs[1:] = rolling_extreme(highs[:-1], 19, np.maximum)
+    recent_lows[1:] = rolling_extreme(lows[:-1], 19, np.minimum)
+
+    signals = _trend(
+        np.asarray(df["close"], dtype=np.float64),
+        np.asarray(df["ema20"], dtype=np.float64),
+        np.asarray(df["ema50"], dtype=np.float64),
+        np.asarray(df["ema200"], dtype=np.float64),
+        recent_highs,
+        recent_lows
+    ).astype(np.int8)
+    signals[:MIN_BARS - 1] = 0
+    return signals
+
+
+def detect_trend(df):
+    """
+    Market Structure (Asıl Temel) ve EMA hibrit trend analizi.
+    HH/HL (BOS) + EMA dizilimi ile en kaliteli yönü bulur.
+    df: DataFrame ya da feature snapshot
+    """
+    last = feature_snapshot(df)
+    if last["bars"] < MIN_BARS: return None
+
+    code = _trend(
+        last["close"], last["ema20"], last["ema50"], last["ema200"],
+        last["high_max19"], last["low_min19"]
+    )
+    return TREND_LABELS[int(code)]
@@ -0,0 +1,119 @@
+# ================= INDICATOR PARITY TEST =================
+# indicator_engine çıktısı data_engine pandas fonksiyonlarıyla aynı olmalı
+
+import random
+
+import numpy as np
+
+from data_engine import build_dataframe
+from batch_indicator_engine import BatchIndicators
+from indicator_engine import IncrementalIndicators, INDICATOR_COLUMNS
+
+
+def make_candles(count, seed=7, start_ts=1_700_000_000_000, step_ms=60_000):
+    rng = random.Random(seed)
+    candles = []
+    price = 40000.0
+    ts = start_ts
+
+    for _ in range(count):
+        price += rng.uniform(-50, 50)
+        open_p = price
+        close_p = price + rng.uniform(-30, 30)
+        high_p = max(open_p, close_p) + rng.uniform(0, 20)
+        low_p = min(open_p, close_p) - rng.uniform(0, 20)
+        volume = rng.uniform(100, 1000)
+        candles.append([ts, open_p, high_p, low_p, close_p, volume])
+        ts += step_ms
+
+    return candles
+
+
+def assert_parity(df, expected):
+    assert len(df) == len(expected)
+    assert list(df["timestamp"]) == list(expected["timestamp"])
+    assert list(df.columns) == list(expected.columns)
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(
+            df[col].values, expected[col].values, rtol=1e-9, atol=1e-9, err_msg=col
+        )
+
+
+def test_full_batch_matches_pandas():
+    candles = make_candles(500)
+    indicators = IncrementalIndicators(history=500)
+    indicators.update(candles)
+
+    assert_parity(indicators.to_dataframe(), build_dataframe(candles))
+
+
+def test_incremental_updates_match_pandas():
+    candles = make_candles(500, seed=11)
+    indicators = IncrementalIndicators(history=500)
+
+    indicators.update(candles[:250])
+    for i in range(251, 400):
+        # Her çağrıda son 100 mumluk pencere gelir (overlap):
+        # önceki canlı mum kapanır + yeni canlı mum
+        assert indicators.update(candles[i - 100:i]) == 2
+    indicators.update(candles[300:500])
+
+    assert_parity(indicators.to_dataframe(), build_dataframe(candles))
+
+
+def test_live_candle_is_recomputed_when_closed():
+    candles = make_candles(300, seed=3)
+    indicators = IncrementalIndicators(history=500)
+
+    forming = list(candles[-1])
+    forming[4] = forming[1]  # henüz kapanmamış mum
+    indicators.update(candles[:-1] + [forming])
+    indicators.update(candles[-2:])
+
+    assert_parity(indicators.to_dataframe(), build_dataframe(candles))
+
+
+def test_gap_rebuilds_state():
+    candles = make_candles(600, seed=5)
+    indicators = IncrementalIndicators(history=500)
+
+    indicators.update(candles[:200])
+    indicators.update(candles[300:600])
+
+    assert_parity(indicators.to_dataframe(), build_dataframe(candles[300:600]))
+
+
+def test_batch_matches_pandas_per_symbol():
+    raw_by_symbol = {
+        "BTC/USDT": make_candles(500, seed=1),
+        "ETH/USDT": make_candles(500, seed=2),
+        "NEW/USDT": make_candles(120, seed=3),  # kısa geçmiş, başa NaN dolgu
+    }
+    batch = BatchIndicators(raw_by_symbol)
+
+    for symbol, candles in raw_by_symbol.items():
+        assert_parity(batch.to_dataframe(symbol), build_dataframe(candles))
+
+
+def test_warm_start_seeds_indicators_with_full_window(tmp_path, monkeypatch):
+    import data_engine
+    from candle_archive_engine import CandleArchive
+    from candle_store_engine import CandleStore
+    from indicator_engine import IndicatorEngine
+
+    candles = make_candles(602, seed=9)
+    archive = CandleArchive(str(tmp_path))
+    archive.append("BTC/USDT", data_engine.TIMEFRAME, candles[:590])
+
+    class Exchange:
+        def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+            return [c for c in candles if since is None or c[0] >= since][:limit]
+
+    # Restart: depo arşivden dolar, sadece boşluktaki 12 mum çekilir
+    monkeypatch.setattr(data_engine, "binance", Exchange())
+    monkeypatch.setattr(data_engine, "candle_store", CandleStore(window=500, archive=archive))
+    monkeypatch.setattr(data_engine, "indicator_engine", IndicatorEngine(history=500))
+
+    df = data_engine.fetch_dataframe("BTC/USDT")
+
+    assert_parity(df, build_dataframe(candles[-500:]))
@@ -0,0 +1,133 @@
+# ================= STREAM ENGINE TEST =================
+# StreamClient yerel FakeStreamServer'a bağlanır; fill / stop / pozisyon
+# olayları defterlere ve motorlara REST poll'u olmadan ulaşmalı
+
+import time
+
+import pytest
+
+from exchange_snapshot_engine import ExchangeSnapshotService
+from exchange_stop_engine import ExchangeStopManager
+from stream_engine import (
+    FakeStreamServer, StreamClient, account_update, connect_engines,
+    mark_price_update, order_trade_update
+)
+
+
+class CountingBinance:
+    """Seed için REST çağrılarını sayan sahte client"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def fetch_positions(self, symbols=None):
+        self.calls += 1
+        return [{"symbol": "BTC/USDT:USDT", "contracts": 0.5, "info": {}}]
+
+    def fetch_open_orders(self, symbol=None):
+        self.calls += 1
+        return [{"id": "7", "symbol": symbol, "type": "stop_market", "status": "open", "stopPrice": 90}]
+
+    def fetch_balance(self):
+        self.calls += 1
+        return {}
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timeout"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def server():
+    server = FakeStreamServer().start()
+    yield server
+    server.stop()
+
+
+def make_stream(server, binance=None):
+    stream = StreamClient(
+        binance, ["BTC/USDT"], timeframes=["1m"],
+        market_url=server.market_url, user_url=server.user_url,
+        listen_key_func=lambda: "test-key", reconnect_delay=0.05
+    )
+    stream.start()
+    assert stream.wait_until_live(5)
+    wait_until(lambda: stream.connected["market"] and server.market_clients and server.user_clients)
+    return stream
+
+
+def test_fill_and_books(server):
+    stream = make_stream(server)
+    try:
+        assert server.subscriptions[0] == ["btcusdt@markPrice@1s", "btcusdt@kline_1m"]
+        assert server.listen_keys == ["test-key"]
+
+        server.push_market("btcusdt@markPrice@1s", mark_price_update("BTCUSDT", 101.5))
+        wait_until(lambda: stream.mark_price("BTC/USDT") == 101.5)
+
+        server.push_user(order_trade_update("BTCUSDT", 11, "NEW", "STOP_MARKET", "SELL",
+                                            qty=1, stop_price=95, reduce_only=True))
+        wait_until(lambda: stream.get_open_orders("BTC/USDT"))
+        assert stream.get_open_orders("BTC/USDT")[0]["stopPrice"] == 95
+
+        start = time.time()
+        server.push_user(order_trade_update("BTCUSDT", 12, "FILLED", "MARKET", "BUY",
+                                            qty=1, avg_price=101.7))
+        fill = stream.wait_for_fill(symbol="BTC/USDT", order_id=12, since=start, timeout=2)
+        assert fill is not None and fill["average"] == 101.7
+        assert time.time() - start < 1.0
+
+        server.push_user(account_update([("BTCUSDT", "-1", "101.7")], [("USDT", 990)]))
+        wait_until(lambda: stream.get_positions())
+        position = stream.get_positions()[0]
+        assert position["contracts"] == 1 and position["side"] == "short"
+        assert stream.get_balance()["USDT"]["wallet"] == 990
+
+        assert stream.wait_for_fill(symbol="BTC/USDT", order_id=99, timeout=0.05) is None
+    finally:
+        stream.stop()
+
+
+def test_stop_events_reach_stop_manager(server):
+    stream = make_stream(server)
+    stop_manager = ExchangeStopManager()
+    connect_engines(stream, stop_manager=stop_manager)
+    try:
+        server.push_user(order_trade_update("BTCUSDT", 21, "NEW", "STOP_MARKET", "SELL",
+                                            qty=1, stop_price=95, reduce_only=True))
+        wait_until(lambda: stop_manager.get_active_stop("BTC/USDT"))
+        assert stop_manager.get_active_stop("BTC/USDT")["order_id"] == "21"
+
+        server.push_user(order_trade_update("BTCUSDT", 21, "FILLED", "STOP_MARKET", "SELL",
+                                            qty=1, avg_price=94.9, stop_price=95, reduce_only=True))
+        wait_until(lambda: stop_manager.get_active_stop("BTC/USDT") is None)
+        assert not stream.get_open_orders("BTC/USDT")
+    finally:
+        stream.stop()
+
+
+def test_snapshot_from_stream_and_reseed_on_reconnect(server):
+    binance = CountingBinance()
+    stream = make_stream(server, binance)
+    service = ExchangeSnapshotService(binance, symbols=["BTC/USDT"], stream=stream)
+    try:
+        seed_calls = binance.calls
+        snapshot = service.get()
+        assert snapshot is service.get()
+        assert snapshot.position_for("BTC/USDT")["contracts"] == 0.5
+        assert snapshot.orders_for("BTC/USDT")[0]["id"] == "7"
+        assert binance.calls == seed_calls
+
+        server.push_user(account_update([("BTCUSDT", "0", "0")]))
+        wait_until(lambda: service.get().version > snapshot.version)
+        assert not service.get().open_positions
+        assert binance.calls == seed_calls
+
+        server.drop_connections()
+        wait_until(lambda: stream.metrics["seeds"] == 2 and stream.is_live())
+        assert len(server.listen_keys) == 2
+    finally:
+        stream.stop()
@@ -0,0 +1,65 @@
+# ================= VECTORIZED SIGNAL PARITY TEST =================
+# *_signals dizileri, son-bar fonksiyonlarının her bar için ayrı ayrı
+# (df[:i+1]) çağrılmasıyla aynı sonucu vermeli
+
+import numpy as np
+
+from data_engine import build_dataframe
+from pattern_engine import (
+    PATTERN_LABELS, detect_engulfing, detect_pinbar, engulfing_signals, pinbar_signals
+)
+from rsi_divergence_engine import detect_rsi_divergence, rsi_divergence_signals
+from structure_break_engine import break_retest_signals, detect_break_and_retest
+from structure_engine import TREND_LABELS, detect_trend, trend_signals
+from test_indicator_engine import make_candles
+
+
+def make_columns(count=600, seed=5):
+    df = build_dataframe(make_candles(count, seed=seed))
+    return {col: df[col].to_numpy() for col in df.columns}
+
+
+def prefixes(columns, start=2):
+    n = len(columns["close"])
+    for i in range(start - 1, n):
+        yield i, {col: values[:i + 1] for col, values in columns.items()}
+
+
+def test_pattern_signals_match_last_bar():
+    columns = make_columns()
+    engulfing = engulfing_signals(columns)
+    pinbar = pinbar_signals(columns)
+
+    for i, prefix in prefixes(columns):
+        assert PATTERN_LABELS.get(int(engulfing[i])) == detect_engulfing(prefix), i
+        assert PATTERN_LABELS.get(int(pinbar[i])) == detect_pinbar(prefix), i
+
+    assert np.count_nonzero(engulfing) and np.count_nonzero(pinbar)
+
+
+def test_trend_signals_match_last_bar():
+    columns = make_columns()
+    signals = trend_signals(columns)
+
+    for i, prefix in prefixes(columns):
+        expected = detect_trend(prefix)
+        if expected is None:
+            assert signals[i] == 0, i
+        else:
+            assert TREND_LABELS[int(signals[i])] == expected, i
+
+    assert len(set(signals[49:].tolist())) >= 3
+
+
+def test_divergence_and_break_signals_match_last_bar():
+    columns = make_columns(seed=9)
+
+    for direction in ["LONG", "SHORT"]:
+        divergence = rsi_divergence_signals(columns, direction)
+        breaks = break_retest_signals(columns, direction)
+
+        for i, prefix in prefixes(columns, start=6):
+            assert divergence[i] == detect_rsi_divergence(prefix, direction), (direction, i)
+            assert breaks[i] == detect_break_and_retest(prefix, direction), (direction, i)
+
+        assert divergence.any() and breaks.any()
@@ -1,11 +1,12 @@
 # ================= TRADE LIFECYCLE STATE MACHINE =================
 # Her trade: OPENED → TP1_DONE → TP2_DONE → CLOSED (deterministic)
 
-import json
 import time
 from datetime import datetime
 from enum import Enum
 
+from event_store_engine import get_log_writer
+
 class TradeState(Enum):
     """Trade durumları"""
     PENDING = "PENDING"          # Trade henüz açılmamış (retry aşaması)
@@ -35,7 +36,7 @@ class TradeLifecycleEngine:
     def __init__(self, binance, state_manager):
         self.binance = binance
         self.state_manager = state_manager
-        self.lifecycle_log = "trade_lifecycle_log.json"
+        self.log_writer = get_log_writer()
         self.active_trades = {}  # symbol → trade lifecycle
     
     def create_trade_entry(self, symbol, direction, entry_price, sl, quantity, regime=None):
@@ -345,6 +346,31 @@ class TradeLifecycleEngine:
             print(f"⚠️  Trailing SL update failed: {e}")
             return False
     
+    def on_order_update(self, order):
+        """
+        User-data stream emir olayı (stream_engine.StreamClient "order")
+        
+        Reduce-only fill'ler trade'i ilerletir:
+            stop fill         → SL_HIT
+            OPENED'da fill    → TP1
+            TP1_DONE'da fill  → TP2
+        """
+        symbol = order.get("symbol")
+        trade = self.active_trades.get(symbol)
+        if trade is None or order.get("status") != "closed" or not order.get("reduceOnly"):
+            return False
+        
+        price = order.get("average") or order.get("lastFillPrice")
+        quantity = order.get("filled")
+        
+        if "stop" in str(order.get("type", "")).lower():
+            return self.update_sl_hit(symbol, price)
+        if trade['current_state'] == TradeState.OPENED.value:
+            return self.update_tp1_filled(symbol, quantity, price)
+        if trade['current_state'] == TradeState.TP1_DONE.value:
+            return self.update_tp2_filled(symbol, quantity, price)
+        return False
+    
     def get_trade_status(self, symbol):
         """Trade'in şu anki status'unu al"""
         if symbol not in self.active_trades:
@@ -427,13 +453,6 @@ class TradeLifecycleEngine:
     def _log_event(self, trade, event_type):
         """Trade event log'u yaz"""
         try:
-            logs = []
-            try:
-                with open(self.lifecycle_log, "r") as f:
-                    logs = json.load(f)
-            except:
-                logs = []
-            
             log_entry = {
                 "timestamp": datetime.now().isoformat(),
                 "trade_id": trade.get('trade_id'),
@@ -444,14 +463,7 @@ class TradeLifecycleEngine:
                 "pnl_percent": trade.get('realized_pnl_percent')
             }
             
-            logs.append(log_entry)
-            
-            # Son 500 log tutun
-            if len(logs) > 500:
-                logs = logs[-500:]
-            
-            with open(self.lifecycle_log, "w") as f:
-                json.dump(logs, f, indent=2)
+            self.log_writer.submit("lifecycle", log_entry)
         except:
             pass
     
@@ -0,0 +1,467 @@
+# ================= SEGMENTED TRADE LOG ENGINE =================
+# trade_log.json / trade_journal.json yerine append-only JSONL segmentleri.
+# Her kayıt tek satırdır (sona eklenir, dosya yeniden yazılmaz); fsync
+# toplu yapılır. Kapanmış segmentlerin zaman aralığı ve sembolleri küçük bir
+# sidecar index'te (index.json) tutulur; zamana/sembole göre okumalarda
+# ilgisiz segmentler hiç açılmaz. Güncellemeler (ör. trade kapanışı) yeni
+# satır olarak eklenir ve index'teki override tablosuyla okunur; compact()
+# override'ları uygulayıp segmentleri yeniden yazar.
+
+import atexit
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+INDEX_FILE = "index.json"
+SEGMENT_RECORDS = 5000
+FSYNC_EVERY = 20
+FSYNC_INTERVAL = 1.0
+
+# Güncelleme satırı işareti: {"_replaces": seq, ...yeni kayıt}
+REPLACES_KEY = "_replaces"
+
+
+def to_epoch(value):
+    """ISO string / epoch (s ya da ms) -> epoch saniye"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class Segment:
+    """Bir JSONL segmentinin index özeti"""
+
+    def __init__(self, name, first_seq, count=0, dead=0, min_time=None, max_time=None, symbols=None):
+        self.name = name
+        self.first_seq = first_seq
+        # count: toplam satır, dead: güncelleme (override) satırları
+        self.count = count
+        self.dead = dead
+        self.min_time = min_time
+        self.max_time = max_time
+        self.symbols = set(symbols or ())
+
+    def observe(self, t, symbol):
+        if t is not None:
+            self.min_time = t if self.min_time is None else min(self.min_time, t)
+            self.max_time = t if self.max_time is None else max(self.max_time, t)
+        if symbol is not None:
+            self.symbols.add(symbol)
+
+    def matches(self, symbol=None, since=None, until=None):
+        if symbol is not None and symbol not in self.symbols:
+            return False
+        if since is not None and (self.max_time is None or self.max_time < since):
+            return False
+        if until is not None and (self.min_time is None or self.min_time > until):
+            return False
+        return True
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "first_seq": self.first_seq,
+            "count": self.count,
+            "dead": self.dead,
+            "min_time": self.min_time,
+            "max_time": self.max_time,
+            "symbols": sorted(self.symbols)
+        }
+
+
+class SegmentedLog:
+    """
+    Append-only, segmentli JSONL log
+
+    Kullanış:
+        log = SegmentedLog("trade_log", legacy_path="trade_log.json")
+        seq = log.append(trade)                       # O(1), dosya boyutundan bağımsız
+        log.replace(seq, closed_trade)                # güncelleme de append
+        for trade in log.iter_records(symbol="BTC/USDT", since=time.time() - 86400):
+            ...
+        log.compact()
+
+    Kayıtlar seq sırasıyla (ekleme sırası) döner. Yarım kalan son satır
+    (crash) açılışta kesilir. legacy_path verilirse ve log boşsa eski JSON
+    dizisi bir kez içe aktarılır (dosyaya dokunulmaz).
+    """
+
+    def __init__(self, directory, legacy_path=None, time_key="timestamp", symbol_key="symbol",
+                 segment_records=SEGMENT_RECORDS, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.directory = directory
+        self.time_key = time_key
+        self.symbol_key = symbol_key
+        self.segment_records = segment_records
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._file = None
+        self._pending = 0
+        self._last_sync = time.time()
+
+        self.metrics = {
+            "appends": 0,
+            "fsyncs": 0,
+            "bytes_written": 0,
+            "segments_sealed": 0,
+            "compactions": 0,
+            "override_reads": 0
+        }
+
+        self._open()
+        if legacy_path and not self.total_lines():
+            self._import_legacy(legacy_path)
+
+    # ===== AÇILIŞ / INDEX =====
+    def _segment_path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.segments = []
+        # {orijinal seq: (segment adı, byte offset)} -> en güncel sürüm
+        self.overrides = {}
+        self.last = None
+
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(index_path, "r") as f:
+                index = json.load(f)
+            self.segments = [Segment(**s) for s in index["segments"]]
+            self.overrides = {int(k): tuple(v) for k, v in index["overrides"].items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️  Trade log index unreadable, rebuilding ({self.directory}): {e}")
+            self.segments, self.overrides = [], {}
+
+        # Aktif (son) segment her açılışta yeniden taranır; index'te olmayan
+        # segment dosyaları da (index kaybı) taranarak index yeniden kurulur
+        if self.segments:
+            self.segments.pop()
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".jsonl"))
+        known = {s.name for s in self.segments}
+        for name in names:
+            if name not in known:
+                self._scan_segment(name)
+
+        if not self.segments:
+            self.segments.append(Segment(self._segment_name(0), 0))
+        self._load_last()
+
+    def _segment_name(self, first_seq):
+        return f"seg_{first_seq:012d}.jsonl"
+
+    def _repair(self, path):
+        """Yarım yazılmış son satırı (crash) kes"""
+        with open(path, "rb") as f:
+            data = f.read()
+        if data and not data.endswith(b"\n"):
+            cut = data.rfind(b"\n") + 1
+            with open(path, "r+b") as f:
+                f.truncate(cut)
+            print(f"⚠️  Truncated partial trade log record: {path}")
+
+    def _scan_segment(self, name):
+        path = self._segment_path(name)
+        self._repair(path)
+        first_seq = self.segments[-1].first_seq + self.segments[-1].count if self.segments else 0
+        segment = Segment(name, first_seq)
+
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                record = json.loads(line)
+                self._observe(segment, record, name, offset)
+                segment.count += 1
+                offset += len(line)
+        self.segments.append(segment)
+
+    def _observe(self, segment, record, name, offset):
+        replaces = record.get(REPLACES_KEY)
+        if replaces is not None:
+            self.overrides[replaces] = (name, offset)
+            segment.dead += 1
+            return
+        segment.observe(to_epoch(record.get(self.time_key)), record.get(self.symbol_key))
+
+    def _write_index(self):
+        index = {
+            "version": 1,
+            "segments": [s.to_dict() for s in self.segments],
+            "overrides": {str(k): list(v) for k, v in self.overrides.items()}
+        }
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, path)
+
+    def _import_legacy(self, legacy_path):
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, "r") as f:
+                records = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Legacy trade log unreadable ({legacy_path}): {e}")
+            return
+
+        for record in records:
+            self.append(record)
+        self.flush()
+        self._write_index()
+        print(f"📦 Imported {len(records)} records from {legacy_path} into {self.directory}/")
+
+    def _load_last(self):
+        """Son canlı kayıt (close_trade_journal gibi 'son trade' okumaları için)"""
+        for segment in reversed(self.segments):
+            if not segment.count:
+                continue
+            path = self._segment_path(segment.name)
+            with open(path, "rb") as f:
+                lines = f.read().splitlines()
+            for i in range(len(lines) - 1, -1, -1):
+                record = json.loads(lines[i])
+                if REPLACES_KEY in record:
+                    continue
+                seq = segment.first_seq + i
+                self.last = (seq, self._resolve(seq, record))
+                return
+
+    # ===== YAZMA =====
+    def total_lines(self):
+        active = self.segments[-1]
+        return active.first_seq + active.count
+
+    def __len__(self):
+        """Canlı kayıt sayısı"""
+        return self.total_lines() - sum(s.dead for s in self.segments)
+
+    def _write_line(self, record, sync=False):
+        active = self.segments[-1]
+        if active.count >= self.segment_records:
+            self._seal()
+            active = self.segments[-1]
+
+        if self._file is None:
+            self._file = open(self._segment_path(active.name), "ab")
+
+        offset = self._file.tell()
+        line = (json.dumps(record, default=str) + "\n").encode()
+        self._file.write(line)
+        self._file.flush()
+
+        seq = active.first_seq + active.count
+        active.count += 1
+        self._observe(active, record, active.name, offset)
+
+        self.metrics["appends"] += 1
+        self.metrics["bytes_written"] += len(line)
+        self._pending += 1
+        if sync or self._pending >= self.fsync_every or time.time() - self._last_sync >= self.fsync_interval:
+            self.flush()
+        return seq
+
+    def append(self, record, sync=False):
+        """
+        Kayıt ekle.
+
+        Args:
+            sync: True ise hemen fsync (aksi halde fsync_every / fsync_interval'da toplu)
+
+        Returns:
+            int: Kaydın seq numarası
+        """
+        seq = self._write_line(record, sync)
+        self.last = (seq, record)
+        return seq
+
+    def replace(self, seq, record, sync=False):
+        """seq kaydının yeni sürümünü ekle (okumalarda orijinalin yerinde döner)"""
+        self._write_line({REPLACES_KEY: seq, **record}, sync)
+        if self.last and self.last[0] == seq:
+            self.last = (seq, record)
+
+    def flush(self):
+        """Bekleyen satırları diske fsync'le"""
+        if self._file is not None and self._pending:
+            os.fsync(self._file.fileno())
+            self.metrics["fsyncs"] += 1
+        self._pending = 0
+        self._last_sync = time.time()
+
+    def _seal(self):
+        """Aktif segmenti kapat, index'e yaz, yenisini aç"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        active = self.segments[-1]
+        self.segments.append(Segment(self._segment_name(active.first_seq + active.count),
+                                     active.first_seq + active.count))
+        self._write_index()
+        self.metrics["segments_sealed"] += 1
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._write_index()
+
+    # ===== OKUMA =====
+    def _read_at(self, name, offset):
+        with open(self._segment_path(name), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def _resolve(self, seq, record):
+        location = self.overrides.get(seq)
+        if location is None:
+            return record
+        self.metrics["override_reads"] += 1
+        latest = self._read_at(*location)
+        latest.pop(REPLACES_KEY, None)
+        return latest
+
+    def iter_entries(self, symbol=None, since=None, until=None):
+        """
+        (seq, kayıt) akışı; segmentler index'e göre elenir.
+
+        Args:
+            symbol: Sadece bu sembol
+            since / until: Zaman aralığı (ISO string ya da epoch)
+        """
+        since = to_epoch(since)
+        until = to_epoch(until)
+
+        for segment in list(self.segments):
+            if not segment.count or not segment.matches(symbol, since, until):
+                continue
+
+            seq = segment.first_seq
+            with open(self._segment_path(segment.name), "rb") as f:
+                for line in f:
+                    record = json.loads(line)
+                    current = seq
+                    seq += 1
+                    if REPLACES_KEY in record:
+                        continue
+
+                    record = self._resolve(current, record)
+                    if symbol is not None and record.get(self.symbol_key) != symbol:
+                        continue
+                    if since is not None or until is not None:
+                        t = to_epoch(record.get(self.time_key))
+                        if t is None or (since is not None and t < since) or (until is not None and t > until):
+                            continue
+                    yield current, record
+
+    def iter_records(self, symbol=None, since=None, until=None):
+        for _, record in self.iter_entries(symbol, since, until):
+            yield record
+
+    def __iter__(self):
+        return self.iter_records()
+
+    def tail(self, n):
+        """Son n canlı kayıt (sadece son segmentler okunur)"""
+        needed = []
+        live = 0
+        for segment in reversed(self.segments):
+            needed.append(segment)
+            live += segment.count - segment.dead
+            if live >= n:
+                break
+
+        records = []
+        for segment in reversed(needed):
+            seq = segment.first_seq
+            with open(self._segment_path(segment.name), "rb") as f:
+                for line in f:
+                    record = json.loads(line)
+                    current = seq
+                    seq += 1
+                    if REPLACES_KEY not in record:
+                        records.append(self._resolve(current, record))
+        return records[-n:] if n else []
+
+    # ===== COMPACTION =====
+    def compact(self, keep_last=None):
+        """
+        Override'ları uygula, güncelleme satırlarını at ve segmentleri yeniden yaz.
+
+        Args:
+            keep_last: Verilirse sadece son keep_last kayıt tutulur
+
+        Returns:
+            int: Kalan kayıt sayısı
+        """
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        skip = max(0, len(self) - keep_last) if keep_last is not None else 0
+        tmp_dir = self.directory.rstrip(os.sep) + ".compact"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        compacted = SegmentedLog(tmp_dir, time_key=self.time_key, symbol_key=self.symbol_key,
+                                 segment_records=self.segment_records, fsync_every=self.segment_records)
+        for i, record in enumerate(self.iter_records()):
+            if i >= skip:
+                compacted.append(record)
+        compacted.close()
+        kept = len(compacted)
+
+        old_dir = self.directory.rstrip(os.sep) + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(self.directory, old_dir)
+        os.replace(tmp_dir, self.directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        self._open()
+        self.metrics["compactions"] += 1
+        return kept
+
+
+# ================= PAYLAŞILAN LOG'LAR =================
+
+_open_logs = {}
+
+
+def open_log(directory, legacy_path=None, **kwargs):
+    """Process başına dizin başına tek SegmentedLog (çıkışta flush edilir)"""
+    key = os.path.abspath(directory)
+    log = _open_logs.get(key)
+    if log is None:
+        log = SegmentedLog(directory, legacy_path=legacy_path, **kwargs)
+        _open_logs[key] = log
+    return log
+
+
+def log_directory(json_path):
+    """'trade_journal.json' -> 'trade_journal' (segment dizini)"""
+    return os.path.splitext(json_path)[0]
+
+
+# Fork edilen process ebeveynin buffer'lı dosyalarını flush etmemeli
+os.register_at_fork(after_in_child=_open_logs.clear)
+
+
+@atexit.register
+def _flush_all():
+    for log in _open_logs.values():
+        try:
+            log.close()
+        except Exception as e:
+            print(f"⚠️  Trade log close failed ({log.directory}): {e}")
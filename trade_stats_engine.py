@@ -0,0 +1,301 @@
+# ================= TRADE STATS ENGINE =================
+# Trade-close olaylarıyla beslenen bellek içi istatistik akümülatörü.
+# compute_stats / loss_streak / edge_metrics / rolling_stats / equity_metrics /
+# calculate_performance_metrics her çağrıda trade_log.json'u okuyup tüm trade'leri
+# taramak yerine buradan O(1) okur: toplamlar, Welford varyans/çarpıklık,
+# seri sayaçları ve sabit boyutlu kayan pencereler.
+
+import math
+from collections import deque
+
+# edge_engine.LOOKBACK ve statistical_engine.LOOKBACK
+DEFAULT_WINDOWS = (30, 50)
+# Varyans / ortalama² bunun altındaysa pencere momentleri baştan hesaplanır
+RECOMPUTE_REL_VARIANCE = 1e-10
+
+
+class RollingWindow:
+    """
+    Son `size` R değeri üzerinde O(1) güncellenen toplamlar
+
+    Ortalama / varyans / çarpıklık ham kuvvet toplamlarından (sum_sq - mean²)
+    değil, pencereli Welford ekle/çıkar ile merkezi momentlerden hesaplanır.
+    Çıkarma yuvarlaması birikmesin diye momentler her `size` push'ta
+    pencereden yeniden hesaplanır (amortize O(1)); yayılım ortalamaya göre
+    yuvarlama seviyesindeyse (ör. sabit seri) okuma öncesi de.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.mean_ = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.pushes = 0
+        self.exact = True   # son push'tan beri çıkarma yapılmadı / yeniden hesaplandı
+        self.wins = 0
+        self.win_sum = 0.0
+        self.nonpositive = 0
+        self.nonpositive_sum = 0.0
+
+    def __len__(self):
+        return len(self.values)
+
+    def _count(self, r, sign):
+        if r > 0:
+            self.wins += sign
+            self.win_sum += sign * r
+        else:
+            self.nonpositive += sign
+            self.nonpositive_sum += sign * r
+
+    def _add(self, r):
+        """Welford ekleme (values'a r eklendikten sonra)"""
+        n = len(self.values)
+        delta = r - self.mean_
+        delta_n = delta / n
+        term = delta * delta_n * (n - 1)
+        self.mean_ += delta_n
+        self.m3 += term * delta_n * (n - 2) - 3 * delta_n * self.m2
+        self.m2 += term
+
+    def _remove(self, r):
+        """Welford eklemenin tersi (values'tan r çıkarıldıktan sonra)"""
+        n = len(self.values) + 1
+        if n == 1:
+            self.mean_ = self.m2 = self.m3 = 0.0
+            return
+        mean = self.mean_ - (r - self.mean_) / (n - 1)
+        delta = r - mean
+        delta_n = delta / n
+        term = delta * delta_n * (n - 1)
+        self.m2 -= term
+        self.m3 -= term * delta_n * (n - 2) - 3 * delta_n * self.m2
+        self.mean_ = mean
+
+    def _recompute(self):
+        """İki geçişli tam hesap (düzeltilmiş ortalama: sabit seride sapma tam 0)"""
+        n = len(self.values)
+        mean = math.fsum(self.values) / n
+        mean += math.fsum(v - mean for v in self.values) / n
+        self.mean_ = mean
+        self.m2 = math.fsum((v - mean) ** 2 for v in self.values)
+        self.m3 = math.fsum((v - mean) ** 3 for v in self.values)
+        self.exact = True
+
+    def _moments(self):
+        # Çıkarma kalıntısı yayılımla aynı mertebedeyse sonuç anlamsız: tam hesapla
+        if not self.exact and self.m2 <= RECOMPUTE_REL_VARIANCE * len(self.values) * self.mean_ ** 2:
+            self._recompute()
+        return self.m2, self.m3
+
+    def push(self, r):
+        if len(self.values) == self.size:
+            old = self.values.popleft()
+            self._count(old, -1)
+            self._remove(old)
+            self.exact = False
+        self.values.append(r)
+        self._count(r, 1)
+        self._add(r)
+
+        self.pushes += 1
+        if self.pushes % self.size == 0:
+            self._recompute()
+
+    def mean(self):
+        return self.mean_ if self.values else 0.0
+
+    def variance(self):
+        """Popülasyon varyansı (np.std ile aynı)"""
+        n = len(self.values)
+        if not n:
+            return 0.0
+        return self._moments()[0] / n
+
+    def skew(self):
+        n = len(self.values)
+        if not n:
+            return 0.0
+        m2, m3 = self._moments()
+        if m2 <= 0:
+            return 0.0
+        return math.sqrt(n) * m3 / m2 ** 1.5
+
+
+class TradeStatsAccumulator:
+    """
+    Trade-close olaylarıyla beslenen O(1) okunan trade istatistikleri
+
+    Kullanış:
+        stats = TradeStatsAccumulator.from_logs(load_logs())   # bir kez
+        stats.add(trade)                                        # her kapanışta
+        stats.stats(); stats.edge_metrics(30); stats.rolling_stats(50)
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.window_sizes = tuple(windows)
+        self.loaded = False
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.wins = 0
+        self.losses = 0
+        self.sum_R = 0.0
+        self.win_sum = 0.0
+        self.loss_sum = 0.0
+        self.first_R = None
+        self.recent_R = deque(maxlen=2)
+
+        self.current_loss_streak = 0
+        self.max_loss_streak = 0
+
+        # Welford (tüm geçmiş)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+
+        # compute_stats()["equity_curve"] (salt okunur paylaşılır)
+        self.equity_curve = []
+        self.windows = {size: RollingWindow(size) for size in self.window_sizes}
+
+    @classmethod
+    def from_logs(cls, logs, windows=DEFAULT_WINDOWS):
+        accumulator = cls(windows)
+        accumulator.load(logs)
+        return accumulator
+
+    def load(self, logs):
+        self.reset()
+        for trade in logs:
+            self.add(trade)
+        self.loaded = True
+
+    def add(self, trade):
+        """Trade-close olayı"""
+        r = float(trade.get("R", 0))
+
+        self.count += 1
+        self.sum_R += r
+        if self.first_R is None:
+            self.first_R = r
+        self.recent_R.append(r)
+        self.equity_curve.append(self.sum_R)
+
+        if r > 0:
+            self.wins += 1
+            self.win_sum += r
+        elif r < 0:
+            self.losses += 1
+            self.loss_sum += r
+
+        if r < 0:
+            self.current_loss_streak += 1
+            self.max_loss_streak = max(self.max_loss_streak, self.current_loss_streak)
+        else:
+            self.current_loss_streak = 0
+
+        n1 = self.count - 1
+        delta = r - self.mean
+        delta_n = delta / self.count
+        term = delta * delta_n * n1
+        self.mean += delta_n
+        self.m3 += term * delta_n * (self.count - 2) - 3 * delta_n * self.m2
+        self.m2 += term
+
+        for window in self.windows.values():
+            window.push(r)
+
+    # ===== OKUYUCULAR =====
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def skew(self):
+        if not self.count or self.m2 <= 0:
+            return 0.0
+        return math.sqrt(self.count) * self.m3 / self.m2 ** 1.5
+
+    def stats(self):
+        """performance_engine.compute_stats formatı"""
+        return {
+            "total": self.count,
+            "winrate": self.wins / self.count if self.count else 0,
+            "avg_R": self.sum_R / self.count if self.count else 0,
+            "equity_curve": self.equity_curve
+        }
+
+    def equity_metrics(self):
+        """equity_ai_engine.equity_metrics formatı"""
+        if self.count < 5:
+            return None
+        return {
+            "slope": self.sum_R - self.first_R,
+            "momentum": sum(self.recent_R)
+        }
+
+    def edge_metrics(self, lookback=DEFAULT_WINDOWS[0], min_trades=10):
+        """edge_engine.edge_metrics formatı (son lookback trade)"""
+        if self.count < min_trades:
+            return None
+
+        window = self.windows[lookback]
+        if not len(window):
+            return None
+
+        winrate = window.wins / len(window)
+        avg_win = window.win_sum / window.wins if window.wins else 0
+        avg_loss = abs(window.nonpositive_sum / window.nonpositive) if window.nonpositive else 0
+
+        return {
+            "winrate": winrate,
+            "expectancy": (winrate * avg_win) - ((1 - winrate) * avg_loss)
+        }
+
+    def rolling_stats(self, lookback=DEFAULT_WINDOWS[1]):
+        """statistical_engine.rolling_stats formatı (son lookback trade)"""
+        if self.count < lookback:
+            return None
+
+        window = self.windows[lookback]
+        mean_R = window.mean()
+        std_R = math.sqrt(window.variance())
+
+        return {
+            "sharpe": mean_R / std_R if std_R != 0 else 0,
+            "winrate": window.wins / len(window),
+            "expectancy": mean_R,
+            "skew": window.skew()
+        }
+
+    def performance_metrics(self, min_trades=5):
+        """performance_analytics_engine.calculate_performance_metrics formatı"""
+        if self.count < min_trades:
+            return None
+
+        win_rate = self.wins / self.count
+        avg_win = self.win_sum / self.wins if self.wins else 0
+        avg_loss = abs(self.loss_sum / self.losses) if self.losses else 0
+        profit_factor = self.win_sum / abs(self.loss_sum) if self.losses and self.loss_sum != 0 else 0
+
+        return {
+            "total_trades": self.count,
+            "win_rate": round(win_rate * 100, 2),
+            "avg_r": round(self.sum_R / self.count, 3),
+            "expectancy": round((win_rate * avg_win) - ((1 - win_rate) * avg_loss), 3),
+            "profit_factor": round(profit_factor, 2),
+            "max_consec_loss": self.max_loss_streak
+        }
+
+    def summary(self):
+        return {
+            "total": self.count,
+            "wins": self.wins,
+            "losses": self.losses,
+            "sum_R": self.sum_R,
+            "mean_R": self.mean,
+            "std_R": self.std(),
+            "skew_R": self.skew(),
+            "current_loss_streak": self.current_loss_streak,
+            "max_loss_streak": self.max_loss_streak
+        }
@@ -3,6 +3,8 @@ import json
 import os
 from datetime import datetime
 
+from exchange_snapshot_engine import get_snapshot_service
+
 class RecoveryVerifier:
     """Recovery doğrulama"""
     
@@ -10,6 +12,7 @@ class RecoveryVerifier:
         self.binance = binance
         self.state_manager = state_manager
         self.stop_manager = stop_manager
+        self.snapshots = get_snapshot_service(binance)
     
     def verify_recovery(self, symbols):
         """Complete recovery verification"""
@@ -54,14 +57,13 @@ class RecoveryVerifier:
     def _check_exchange_positions(self, symbols):
         """Exchange pozisyonları kontrol"""
         try:
-            positions = self.binance.fetch_positions()
             open_positions = [
                 {
                     "symbol": p["symbol"],
                     "contracts": float(p.get("contracts", 0)),
                     "direction": "LONG" if float(p.get("contracts", 0)) > 0 else "SHORT",
                 }
-                for p in positions if float(p.get("contracts", 0)) != 0
+                for p in self.snapshots.get().open_positions
             ]
             
             print(f"   Found {len(open_positions)} open position(s)")
@@ -111,7 +113,7 @@ class RecoveryVerifier:
             
             for symbol in symbols[:5]:
                 try:
-                    orders = self.binance.fetch_open_orders(symbol)
+                    orders = self.snapshots.open_orders(symbol)
                     stop_orders = [
                         o for o in orders
                         if "stop" in str(o.get("type", "")).lower()
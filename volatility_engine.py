@@ -4,12 +4,14 @@ import numpy as np
 
 def volatility_metrics(df):
 
-    atr_series = df["atr"].dropna()
+    # DataFrame ya da kolon sözlüğü (backtest penceresi)
+    atr_series = np.asarray(df["atr"], dtype=np.float64)
+    atr_series = atr_series[~np.isnan(atr_series)]
 
     if len(atr_series) < 50:
         return None
 
-    current_atr = atr_series.iloc[-1]
+    current_atr = atr_series[-1]
 
     percentile = (
         np.sum(atr_series < current_atr) / len(atr_series)
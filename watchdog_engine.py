@@ -1,14 +1,50 @@
 # ================= MULTI-PROCESS WATCHDOG ARCHITECTURE =================
 # 24/7 monitoring: Main engine + Watchdog process
 # Watchdog: State, Exchange, Stops, Lifecycle kontrol
+#
+# start_watchdog(mode="process"): watchdog ayrı OS process'inde çalışır
+# (trading döngüsüyle GIL paylaşmaz, onunla birlikte ölmez). Ana engine
+# heartbeat / döngü gecikmesi / state sürümünü health_channel_engine
+# shared memory segmentine yazar; watchdog takılmayı (stall) ve ölü
+# process'i buradan görür ve emergency_shutdown aksiyonlarını kendisi alır.
 
-import json
+import os
+import signal
 import time
 import multiprocessing
 import threading
 from datetime import datetime
 import traceback
 
+from check_scheduler_engine import CheckScheduler
+from crash_engine import CrashRecoveryHandler
+from event_store_engine import get_log_writer
+from exchange_snapshot_engine import get_snapshot_service
+from health_channel_engine import HealthChannel, pid_alive
+
+# Check zamanlaması: (check, metod, interval sn, priority, timeout sn)
+# interval None -> check_interval. Küçük priority önce başlar.
+# Flag / state check'leri hızlı, exchange check'leri yavaş kadansta çalışır.
+WATCHDOG_CHECKS = [
+    ("emergency_shutdown", "_check_emergency_shutdown", 2, 0, 2),
+    ("state_integrity", "_check_state_integrity", 10, 1, 5),
+    ("exchange_reconciliation", "_check_exchange_reconciliation", None, 2, 20),
+    ("stop_synchronization", "_check_stop_synchronization", None, 2, 20),
+    ("trade_lifecycle", "_check_trade_lifecycle", None, 3, 20),
+    ("orphan_positions", "_detect_orphan_positions", None, 2, 20),
+    ("recovery_checkpoint", "_check_recovery_checkpoint", 60, 4, 5),
+    ("health_status", "_update_health_status", 10, 1, 2),
+]
+WATCHDOG_WORKERS = 3
+
+# Ana engine heartbeat'i bu kadar eskiyse takılmış sayılır (saniye)
+STALL_TIMEOUT = 60
+# Ana process çıkışında (SIGTERM) emergency aksiyonuna verilen süre: multiprocessing
+# çıkışta daemon child'ı da join eder, ana process'in çıkışı bundan uzun beklemez
+TERMINATE_EMERGENCY_TIMEOUT = 10
+# Watchdog'un kendi yazdığı flag içerikleri (ana engine'i kapatma nedenleri)
+WATCHDOG_FLAG_REASONS = ("main_stalled", "main_dead")
+
 class WatchdogEngine:
     """
     Bağımsız watchdog process
@@ -27,7 +63,9 @@ class WatchdogEngine:
     
     def __init__(self, binance, state_manager, stop_manager=None, 
                  exchange_recon=None, trade_lifecycle=None,
-                 check_interval=30, alert_webhook=None):
+                 check_interval=30, alert_webhook=None, schedule=None,
+                 max_workers=WATCHDOG_WORKERS, health_channel=None,
+                 stall_timeout=STALL_TIMEOUT, symbols=None, terminate_on_stall=False):
         """
         Args:
             binance: Binance client
@@ -35,8 +73,14 @@ class WatchdogEngine:
             stop_manager: Stop manager instance
             exchange_recon: Exchange reconciliation engine
             trade_lifecycle: Trade lifecycle engine
-            check_interval: Check interval in seconds (default 30)
+            check_interval: Exchange check'lerinin interval'i (default 30)
             alert_webhook: Telegram/Discord webhook (opsiyonel)
+            schedule: {check: {"interval", "priority", "timeout"}} override
+            max_workers: Eşzamanlı check sayısı
+            health_channel: HealthChannel (process modunda otomatik oluşturulur)
+            stall_timeout: Heartbeat bu kadar saniye gelmezse ana engine takılmış sayılır
+            symbols: Emergency shutdown'da emirleri kontrol edilecek semboller
+            terminate_on_stall: Takılan ana engine'e SIGTERM gönder
         """
         self.binance = binance
         self.state_manager = state_manager
@@ -45,15 +89,30 @@ class WatchdogEngine:
         self.trade_lifecycle = trade_lifecycle
         self.check_interval = check_interval
         self.alert_webhook = alert_webhook
+        self.health_channel = health_channel
+        self.stall_timeout = stall_timeout
+        self.symbols = symbols or []
+        self.terminate_on_stall = terminate_on_stall
         
         # ===== WATCHDOG STATE =====
-        self.watchdog_log = "watchdog_log.json"
+        self.log_writer = get_log_writer()
+        # Exchange check'leri aynı kadansta başlar ve tek snapshot'ı paylaşır
+        self.snapshots = get_snapshot_service(binance)
         self.emergency_file = "emergency_shutdown.flag"
+        self.emergency_flag_active = False
         self.health_status = "HEALTHY"
         self.last_check = 0
         self.check_count = 0
         self.issues_found = 0
         
+        # ===== PROCESS MODE =====
+        self.process = None
+        self.process_mode = False
+        self.terminated = False
+        self.main_health = None
+        self.main_stalled = False
+        self.crash_handler = None
+        
         # ===== METRIKS =====
         self.metrics = {
             "state_checks": 0,
@@ -65,16 +124,36 @@ class WatchdogEngine:
             "recoveries_attempted": 0,
             "recoveries_successful": 0
         }
+        
+        # ===== SCHEDULER =====
+        self.scheduler = CheckScheduler(max_workers, on_complete=self._on_check_complete,
+                                        name="Watchdog")
+        for name, method, interval, priority, timeout in WATCHDOG_CHECKS:
+            options = {"interval": interval or check_interval,
+                       "priority": priority, "timeout": timeout}
+            options.update((schedule or {}).get(name, {}))
+            self.scheduler.add(name, getattr(self, method), **options)
+        if health_channel is not None:
+            self._add_liveness_check()
+    
+    def _add_liveness_check(self):
+        self.scheduler.add("main_liveness", self._check_main_liveness,
+                           interval=1, priority=0, timeout=2)
     
-    def start_watchdog(self):
+    def start_watchdog(self, mode="thread"):
         """
-        Watchdog process'ini başlat (separate thread'de)
+        Watchdog'u başlat
         
         Kullanış:
             watchdog = WatchdogEngine(...)
             watchdog_thread = watchdog.start_watchdog()
+            watchdog_process = watchdog.start_watchdog(mode="process")
         """
+        if mode == "process":
+            return self.start_watchdog_process()
+        
         print("🔔 Starting Watchdog Engine...")
+        self._clear_stale_flag()
         
         watchdog_thread = threading.Thread(
             target=self._watchdog_loop,
@@ -87,59 +166,118 @@ class WatchdogEngine:
         return watchdog_thread
     
     def _watchdog_loop(self):
-        """Ana watchdog loop"""
+        """Ana watchdog loop: check'ler scheduler'da kendi kadanslarında çalışır"""
         print("🔴 Watchdog monitoring started...")
+        self.scheduler.run()
+    
+    def start_watchdog_process(self):
+        """
+        Watchdog'u ayrı process'te başlat (fork)
         
-        while True:
-            try:
-                loop_start = time.time()
-                
-                # 1️⃣ STATE INTEGRITY CHECK
-                self._check_state_integrity()
-                
-                # 2️⃣ EXCHANGE RECONCILIATION
-                self._check_exchange_reconciliation()
-                
-                # 3️⃣ STOP ORDER SYNC
-                self._check_stop_synchronization()
-                
-                # 4️⃣ TRADE LIFECYCLE
-                self._check_trade_lifecycle()
-                
-                # 5️⃣ ORPHAN POSITION DETECTION
-                self._detect_orphan_positions()
-                
-                # 6️⃣ RECOVERY CHECKPOINT
-                self._check_recovery_checkpoint()
-                
-                # 7️⃣ EMERGENCY SHUTDOWN CHECK
-                self._check_emergency_shutdown()
-                
-                # 8️⃣ HEALTH STATUS UPDATE
-                self._update_health_status()
-                
-                loop_duration = time.time() - loop_start
-                
-                self.check_count += 1
-                self.last_check = time.time()
-                
-                # Özetini log'la (her 10 check'te)
-                if self.check_count % 10 == 0:
-                    self._log_summary()
-                
-                # Sleep (interval'e bölüştür)
-                sleep_time = max(self.check_interval - loop_duration, 1)
-                time.sleep(sleep_time)
-            
-            except KeyboardInterrupt:
-                print("🛑 Watchdog interrupted")
-                break
-            
-            except Exception as e:
-                print(f"❌ Watchdog error: {e}")
-                traceback.print_exc()
-                self.metrics["critical_issues"] += 1
-                time.sleep(self.check_interval)
+        Ana döngü her turda watchdog.heartbeat(loop_latency_ms) çağırmalı.
+        """
+        print("🔔 Starting Watchdog Engine (process)...")
+        self._clear_stale_flag()
+        
+        if self.health_channel is None:
+            self.health_channel = HealthChannel.create()
+            self._add_liveness_check()
+        self.health_channel.beat()
+        
+        self.process = multiprocessing.get_context("fork").Process(
+            target=self._run_process,
+            # Daemon: ana process çıkışta child'ı terminate + join eder; SIGTERM
+            # planlı değilse child TERMINATE_EMERGENCY_TIMEOUT içinde emergency
+            # aksiyonunu alıp çıkar (_on_terminated)
+            daemon=True,
+            name="WatchdogProcess"
+        )
+        self.process.start()
+        
+        print(f"✅ Watchdog process started (pid {self.process.pid})")
+        return self.process
+    
+    def _run_process(self):
+        """Watchdog process'inin gövdesi (child)"""
+        # Ebeveynin thread'leri ve bağlantıları fork'ta gelmez: yenilerini aç
+        self.process_mode = True
+        self.health_channel.owner = False
+        self.log_writer = get_log_writer()
+        self.snapshots = get_snapshot_service(self.binance)
+        
+        # SIGTERM: stop_watchdog ya da ana process'in çıkışı (multiprocessing
+        # daemon child'ları exception ile çıkışta da terminate eder)
+        signal.signal(signal.SIGTERM, self._on_sigterm)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            self._watchdog_loop()
+            if self.terminated:
+                self._on_terminated()
+        finally:
+            self.log_writer.stop()
+            self.health_channel.close()
+    
+    def _on_sigterm(self, signum, frame):
+        # Sinyal handler'ında sadece scheduler durdurulur; aksiyon döngü bitince alınır
+        self.terminated = True
+        self.scheduler.stop()
+    
+    def _on_terminated(self):
+        """
+        SIGTERM planlı kapanış değilse (mark_stopping yok) ana engine çökmüş sayılır
+        
+        Ana process çıkışta child'ı join ettiği için aksiyon süreyle sınırlıdır.
+        """
+        health = self.health_channel.read()
+        if health["stopping"] or self.health_channel.watchdog_status()["shutdown_requested"]:
+            return
+        worker = threading.Thread(
+            target=self._handle_main_failure, args=("main_dead", health),
+            daemon=True, name="WatchdogEmergency"
+        )
+        worker.start()
+        worker.join(TERMINATE_EMERGENCY_TIMEOUT)
+        if worker.is_alive():
+            print(f"⏱️  Emergency actions exceeded {TERMINATE_EMERGENCY_TIMEOUT}s - watchdog exiting")
+    
+    def stop_watchdog(self, timeout=5):
+        if self.process is None:
+            self.scheduler.stop()
+            return
+        
+        # Planlı kapanış: watchdog ana engine'in durmasını crash saymaz
+        self.health_channel.mark_stopping()
+        self.process.terminate()
+        self.process.join(timeout)
+        self.process = None
+        self.health_channel.close()
+        self.health_channel = None
+    
+    # ===== ANA ENGINE TARAFI =====
+    def heartbeat(self, loop_latency_ms=None, state_version=None):
+        """Ana döngü heartbeat'i (process modunda her döngü sonunda çağrılır)"""
+        if self.health_channel is None:
+            return
+        if state_version is None:
+            journal = getattr(self.state_manager, "journal", None)
+            state_version = journal.metrics["saves"] if journal is not None else None
+        self.health_channel.beat(loop_latency_ms, state_version)
+    
+    def shutdown_requested(self):
+        """Watchdog process'inin kapatma isteği (neden ya da None)"""
+        if self.health_channel is None:
+            return None
+        return self.health_channel.shutdown_requested()
+    
+    def _on_check_complete(self, name, result, error, duration_ms):
+        self.check_count += 1
+        self.last_check = time.time()
+        if error is not None:
+            self.metrics["critical_issues"] += 1
+        
+        # Özetini log'la (her 10 health update'te)
+        if name == "health_status" and self.scheduler.checks[name].metrics["runs"] % 10 == 0:
+            self._log_summary()
     
     def _check_state_integrity(self):
         """State file'ının integrity'sini kontrol et"""
@@ -177,6 +315,107 @@ class WatchdogEngine:
             self._log_issue("state_integrity_error", {"error": str(e)})
             return False
     
+    def _check_main_liveness(self):
+        """Ana engine heartbeat'ini shared memory'den kontrol et"""
+        self.health_channel.watchdog_beat()
+        health = self.health_channel.read()
+        self.main_health = health
+        
+        alive = pid_alive(health["pid"])
+        if self.process_mode and os.getppid() != health["pid"]:
+            alive = False   # ebeveyn öldü, process yeniden parent'landı
+        
+        if not alive:
+            if health["stopping"]:
+                print("🛑 Main engine stopped - watchdog exiting")
+            else:
+                self._handle_main_failure("main_dead", health)
+            if self.process_mode:
+                self.scheduler.stop()
+            return False
+        
+        if health["stopping"]:
+            return True
+        
+        if health["heartbeat_age"] > self.stall_timeout:
+            if not self.main_stalled:
+                self.main_stalled = True
+                self._handle_main_failure("main_stalled", health)
+            return False
+        
+        if self.main_stalled:
+            print(f"✅ Main engine heartbeat resumed ({health['heartbeat_age']:.1f}s)")
+            self.main_stalled = False
+            self._clear_main_failure("main_stalled")
+        return True
+    
+    def _read_flag(self):
+        try:
+            with open(self.emergency_file, "r") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+    
+    def _clear_main_failure(self, reason):
+        """Watchdog'un bu neden için yazdığı kapatma isteğini ve flag'i geri al"""
+        if self.health_channel is not None and self.health_channel.shutdown_requested() == reason:
+            self.health_channel.request_shutdown(None)
+        if self._read_flag() == reason:
+            try:
+                os.remove(self.emergency_file)
+                print(f"✅ Emergency flag cleared ({reason})")
+            except FileNotFoundError:
+                pass
+    
+    def _clear_stale_flag(self):
+        """
+        Önceki çalışmadan kalan watchdog flag'ini sil (restart'ı engellemesin)
+        
+        Elle / dışarıdan yazılmış flag'lere dokunulmaz.
+        """
+        reason = self._read_flag()
+        if reason in WATCHDOG_FLAG_REASONS:
+            os.remove(self.emergency_file)
+            print(f"🧹 Stale emergency flag from previous run removed ({reason})")
+    
+    def _handle_main_failure(self, reason, health):
+        """Ana engine takıldı / öldü: emergency aksiyonlarını bağımsız olarak al"""
+        print(f"🚨 WATCHDOG: MAIN ENGINE {reason.upper()}")
+        print(f"    PID: {health['pid']}  Last heartbeat: {health['heartbeat_age']:.1f}s ago")
+        print(f"    Loop latency: {health['loop_latency_ms']:.0f}ms  State version: {health['state_version']}")
+        
+        self.metrics["issues_detected"] += 1
+        self.metrics["critical_issues"] += 1
+        self._log_issue(reason, health)
+        self._send_alert(f"🚨 MAIN ENGINE {reason.upper()} (pid {health['pid']})")
+        
+        self.health_channel.request_shutdown(reason)
+        try:
+            with open(self.emergency_file, "w") as f:
+                f.write(reason)
+        except Exception as e:
+            print(f"⚠️  Could not write emergency flag: {e}")
+        
+        try:
+            if self.crash_handler is None:
+                self.crash_handler = CrashRecoveryHandler(
+                    self.state_manager, self.binance, self.symbols, install_signals=False
+                )
+            self.crash_handler.emergency_shutdown()
+        except Exception as e:
+            print(f"❌ Watchdog emergency shutdown failed: {e}")
+        
+        if self.terminate_on_stall and reason == "main_stalled":
+            try:
+                os.kill(health["pid"], signal.SIGTERM)
+                print(f"    SIGTERM sent to main engine")
+            except Exception as e:
+                print(f"❌ Could not terminate main engine: {e}")
+    
+    def _open_positions(self):
+        """Paylaşılan snapshot'taki açık pozisyonlar (eşzamanlı check'ler tek fetch'i paylaşır)"""
+        return self.snapshots.get().open_positions
+    
     def _check_exchange_reconciliation(self):
         """Exchange ↔ State reconciliation'ı kontrol et"""
         try:
@@ -188,8 +427,7 @@ class WatchdogEngine:
             
             # Exchange'den positions al
             try:
-                positions = self.binance.fetch_positions()
-                open_positions = [p for p in positions if float(p.get('contracts', 0)) != 0]
+                open_positions = self._open_positions()
             except Exception as e:
                 print(f"⚠️  Could not fetch positions: {e}")
                 return False
@@ -240,8 +478,7 @@ class WatchdogEngine:
             
             # Exchange'den positions al
             try:
-                positions = self.binance.fetch_positions()
-                open_positions = [p for p in positions if float(p.get('contracts', 0)) != 0]
+                open_positions = self._open_positions()
             except Exception as e:
                 print(f"⚠️  Could not fetch positions: {e}")
                 return False
@@ -286,6 +523,7 @@ class WatchdogEngine:
                                 state.get('direction'),
                                 abs(float(position.get('contracts', 0)))
                             )
+                            self.snapshots.invalidate()
                             self.metrics["recoveries_attempted"] += 1
                             self.metrics["recoveries_successful"] += 1
                         except Exception as e:
@@ -319,8 +557,7 @@ class WatchdogEngine:
             
             # Exchange'den positions al
             try:
-                positions = self.binance.fetch_positions()
-                open_positions = [p for p in positions if float(p.get('contracts', 0)) != 0]
+                open_positions = self._open_positions()
             except Exception as e:
                 print(f"⚠️  Could not fetch positions: {e}")
                 return False
@@ -355,8 +592,7 @@ class WatchdogEngine:
         """Öksüz pozisyonları tespit et (exchange'de var ama state'de yok)"""
         try:
             try:
-                positions = self.binance.fetch_positions()
-                open_positions = [p for p in positions if float(p.get('contracts', 0)) != 0]
+                open_positions = self._open_positions()
             except Exception as e:
                 print(f"⚠️  Could not fetch positions: {e}")
                 return False
@@ -434,26 +670,36 @@ class WatchdogEngine:
             return False
     
     def _check_emergency_shutdown(self):
-        """Emergency shutdown flag'ini kontrol et"""
+        """
+        Emergency shutdown flag'ini kontrol et
+        
+        Check 2 sn'de bir çalışır: uyarı (webhook) flag ilk göründüğünde bir kez
+        gider, flag silinince sıfırlanır.
+        """
         try:
             import os
             
             if os.path.exists(self.emergency_file):
-                print(f"🚨 EMERGENCY SHUTDOWN FLAG DETECTED!")
-                print(f"    Main engine should shut down immediately")
-                
-                # Flag'ı oku
-                try:
-                    with open(self.emergency_file, "r") as f:
-                        reason = f.read().strip()
-                    print(f"    Reason: {reason}")
-                except:
-                    pass
-                
-                self._send_alert("🚨 EMERGENCY SHUTDOWN REQUESTED")
+                if not self.emergency_flag_active:
+                    self.emergency_flag_active = True
+                    print(f"🚨 EMERGENCY SHUTDOWN FLAG DETECTED!")
+                    print(f"    Main engine should shut down immediately")
+                    
+                    # Flag'ı oku
+                    try:
+                        with open(self.emergency_file, "r") as f:
+                            reason = f.read().strip()
+                        print(f"    Reason: {reason}")
+                    except:
+                        pass
+                    
+                    self._send_alert("🚨 EMERGENCY SHUTDOWN REQUESTED")
+                if self.health_channel is not None and not self.health_channel.shutdown_requested():
+                    self.health_channel.request_shutdown("emergency_flag")
                 
                 return False
             
+            self.emergency_flag_active = False
             return True
         
         except Exception as e:
@@ -490,28 +736,16 @@ class WatchdogEngine:
     def _log_issue(self, issue_type, details):
         """Sorunu log'la"""
         try:
-            logs = []
-            try:
-                with open(self.watchdog_log, "r") as f:
-                    logs = json.load(f)
-            except:
-                logs = []
-            
             log_entry = {
                 "timestamp": datetime.now().isoformat(),
                 "issue_type": issue_type,
                 "details": details,
                 "health_status": self.health_status
             }
+            if isinstance(details, dict) and details.get("symbol"):
+                log_entry["symbol"] = details["symbol"]
             
-            logs.append(log_entry)
-            
-            # Son 1000 log tutun
-            if len(logs) > 1000:
-                logs = logs[-1000:]
-            
-            with open(self.watchdog_log, "w") as f:
-                json.dump(logs, f, indent=2)
+            self.log_writer.submit("watchdog", log_entry)
         except:
             pass
     
@@ -528,11 +762,24 @@ class WatchdogEngine:
         print(f"Health status: {self.health_status}")
         print("="*80 + "\n")
     
+    def _health_channel_status(self):
+        if self.health_channel is None:
+            return None
+        return {
+            "main": self.health_channel.read(),
+            "watchdog": self.health_channel.watchdog_status(),
+            "process_alive": self.process.is_alive() if self.process is not None else None
+        }
+    
     def get_watchdog_status(self):
         """Watchdog status'unu al"""
         return {
             "health": self.health_status,
             "last_check": self.last_check,
             "total_checks": self.check_count,
-            "metrics": self.metrics
+            "metrics": self.metrics,
+            "log_writer": self.log_writer.metrics,
+            "exchange_snapshot": self.snapshots.get_status(),
+            "scheduler": self.scheduler.get_status(),
+            "health_channel": self._health_channel_status()
         }
\ No newline at end of file